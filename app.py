@@ -21,16 +21,22 @@ os.environ["QT_SCALE_FACTOR"] = str(custom_multiplier)
 # os.environ["QT_SCALE_FACTOR"] = str(custom_scale)
 # temp_app.quit()
 
+from core.debug import set_debug, startup_mark
+# QtWebEngineWidgets has to be imported before the QApplication is created
+from PyQt5 import QtWebEngineWidgets  # noqa: F401
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import QDir
+from PyQt5.QtCore import QDir, QTimer
 from ui.main_window import MainWindow
+from ui.asset_scheme import register_asset_scheme
+startup_mark("imports")
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='DocuWeave - WYSIWYG Markdown Editor')
     parser.add_argument('--debug', action='store_true', help='Show console window for debugging')
     args = parser.parse_args()
+    set_debug(args.debug)
 
     # Hide console if not in debug mode
     if not args.debug and sys.platform == 'win32':
@@ -41,7 +47,21 @@ def main():
         if hwnd != 0:  # Only hide if console window exists
             win32gui.ShowWindow(hwnd, win32con.SW_HIDE)
 
+    if sys.platform == 'win32':
+        import ctypes
+        import colorama  # ANSI colors for the console log
+        colorama.init(autoreset=True)
+        # Enable high DPI awareness once, before any window exists
+        try:
+            ctypes.windll.shcore.SetProcessDpiAwareness(1)
+        except Exception:
+            pass
+
+    # Custom URL schemes must be registered before the application is created
+    register_asset_scheme()
     app = QApplication(sys.argv)
+    # Names the per-user data directory that holds the web profile and its cache
+    app.setApplicationName("DocuWeave")
     
     # Register resources directory
     QDir.addSearchPath('resources', os.path.join(os.path.dirname(__file__), 'resources'))
@@ -49,9 +69,13 @@ def main():
     # Set application icon
     icon_path = os.path.join(os.path.dirname(__file__), "resources", "icon.ico")
     app.setWindowIcon(QIcon(icon_path))
+    startup_mark("QApplication")
     
     window = MainWindow()
     window.show()
+    startup_mark("window shown")
+    # Start the web engine once the shell has painted; content set before then is queued
+    QTimer.singleShot(0, window.editor_widget.start)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
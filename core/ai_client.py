@@ -0,0 +1,261 @@
+import json
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+
+from core.token_budget import token_estimator, DEFAULT_CONTEXT_WINDOW, MAX_CONTEXT_WINDOW
+from core.ai_scheduler import AIScheduler, CancelToken, RequestCancelled, INTERACTIVE
+
+DEFAULT_OLLAMA_URL = "http://localhost:11434"
+# Seconds to connect, and to wait between streamed chunks (covers model loading)
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 120
+LIST_TIMEOUT = 10
+MODEL_LIST_TTL = 60  # Seconds a fetched model list is reused
+POOL_SIZE = 10  # Kept-alive connections per server (enough for the parallel summary workers)
+WARM_UP_TIMEOUT = 300  # Loading a large model from disk can take minutes on CPU-only hosts
+DEFAULT_KEEP_ALIVE_MINUTES = 15  # How long the server keeps a model loaded after a request
+
+class OllamaClient:
+    """Minimal client for an Ollama server.
+
+    Requests go through one pooled requests.Session, so connections are
+    kept alive and reused across requests and threads; get_client() shares
+    a client per server. Every request waits for a slot in the client's
+    AIScheduler, which bounds how many reach the server at once, serves
+    INTERACTIVE callers before BACKGROUND ones and sends identical
+    concurrent requests only once. requests is imported on first use, so
+    creating a client is cheap. Errors surface as requests exceptions or
+    RuntimeError with the server's message.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_OLLAMA_URL):
+        self.base_url = base_url.rstrip('/')
+        self._session = None
+        self._lock = threading.Lock()
+        self._models: Optional[List[str]] = None
+        self._models_at = 0.0
+        # Sent with every request, so the model stays loaded while the user is working
+        self.keep_alive_minutes = DEFAULT_KEEP_ALIVE_MINUTES
+        self.warm_up_on_open = True  # Whether the AI dialogs pre-load the selected model
+        self._resident_until: Dict[str, float] = {}  # model -> when the server will unload it
+        self._context_lengths: Dict[str, int] = {}
+        self.scheduler = AIScheduler()
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def cached_models(self, max_age: float = MODEL_LIST_TTL) -> Optional[List[str]]:
+        """The last fetched model list if it is recent enough, without any request"""
+        with self._lock:
+            if self._models is not None and time.monotonic() - self._models_at < max_age:
+                return list(self._models)
+        return None
+
+    def list_models(self, max_age: float = MODEL_LIST_TTL, priority: int = INTERACTIVE,
+                    cancel: Optional[CancelToken] = None) -> List[str]:
+        """Names of the installed models; blocking, so call it off the GUI thread.
+
+        A list fetched less than max_age seconds ago is returned without a
+        request; pass 0 to force a refresh.
+        """
+        cached = self.cached_models(max_age)
+        if cached is not None:
+            return cached
+        return list(self.scheduler.call(lambda *_: self._fetch_models(), key=("tags",),
+                                        priority=priority, cancel=cancel))
+
+    def _fetch_models(self) -> List[str]:
+        response = self.session.get(f"{self.base_url}/api/tags", timeout=LIST_TIMEOUT)
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch models: {response.status_code}")
+        models = [model['name'] for model in response.json().get('models', [])]
+        with self._lock:
+            self._models = models
+            self._models_at = time.monotonic()
+        return models
+
+    def context_length(self, model: str, priority: int = INTERACTIVE,
+                       cancel: Optional[CancelToken] = None) -> int:
+        """The model's trained context length (from /api/show), or a safe default.
+
+        Blocking on first use per model; the answer is cached. Raises
+        RequestCancelled when cancelled first.
+        """
+        with self._lock:
+            cached = self._context_lengths.get(model)
+        if cached is not None:
+            return cached
+        def show(*_):
+            response = self.session.post(f"{self.base_url}/api/show",
+                                         json={"model": model, "name": model}, timeout=LIST_TIMEOUT)
+            if response.status_code != 200:
+                return DEFAULT_CONTEXT_WINDOW
+            info = response.json().get("model_info", {})
+            return next((int(value) for key, value in info.items()
+                         if key.endswith(".context_length")), DEFAULT_CONTEXT_WINDOW)
+        try:
+            length = self.scheduler.call(show, key=("show", model), priority=priority, cancel=cancel)
+        except RequestCancelled:
+            raise
+        except Exception as e:
+            print(f"\033[93mCould not read the context length of {model}: {e}\033[0m")
+            return DEFAULT_CONTEXT_WINDOW  # Not cached; try again next time
+        with self._lock:
+            self._context_lengths[model] = length
+        return length
+
+    def context_window(self, model: str, priority: int = INTERACTIVE,
+                       cancel: Optional[CancelToken] = None) -> int:
+        """The num_ctx requests use: the model's context length, capped to save memory"""
+        return min(self.context_length(model, priority, cancel), MAX_CONTEXT_WINDOW)
+
+    def _keep_alive(self) -> str:
+        return f"{self.keep_alive_minutes}m"
+
+    def _touch(self, model: str) -> None:
+        with self._lock:
+            self._resident_until[model] = time.monotonic() + self.keep_alive_minutes * 60
+
+    def is_resident(self, model: str) -> bool:
+        """Whether the model should still be loaded after our last request to it"""
+        with self._lock:
+            return self._resident_until.get(model, 0) > time.monotonic()
+
+    def warm_up(self, model: str, priority: int = INTERACTIVE, cancel: Optional[CancelToken] = None) -> float:
+        """Load a model with an empty prompt so the next request skips the load.
+
+        Blocking. Returns the load time the server reported, in seconds
+        (0 when it was already loaded).
+        """
+        # The same num_ctx as the real requests, or the server reloads the model for them
+        num_ctx = self.context_window(model, priority, cancel)
+
+        def load(*_):
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "prompt": "", "keep_alive": self._keep_alive(), "stream": False,
+                      "options": {"num_ctx": num_ctx}},
+                timeout=(CONNECT_TIMEOUT, WARM_UP_TIMEOUT)
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP Error {response.status_code}: {response.text}")
+            self._touch(model)
+            return response.json().get("load_duration", 0) / 1e9
+        return self.scheduler.call(load, key=("load", model, num_ctx), priority=priority, cancel=cancel)
+
+    def embed(self, model: str, text: str, priority: int = INTERACTIVE,
+              cancel: Optional[CancelToken] = None) -> List[float]:
+        """Embedding vector of a text; blocking"""
+        def embed(*_):
+            response = self.session.post(
+                f"{self.base_url}/api/embeddings",
+                json={"model": model, "prompt": text, "keep_alive": self._keep_alive()},
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP Error {response.status_code}: {response.text}")
+            self._touch(model)
+            return response.json()["embedding"]
+        return self.scheduler.call(embed, key=("embed", model, text), priority=priority, cancel=cancel)
+
+    def generate(self, model: str, prompt: str, on_token: Optional[Callable[[str], None]] = None,
+                 cancel: Optional[CancelToken] = None,
+                 on_done: Optional[Callable[[dict], None]] = None,
+                 num_ctx: Optional[int] = None, priority: int = INTERACTIVE) -> str:
+        """Generate a reply, streaming; on_token(text) is called as tokens arrive.
+
+        on_done(message) gets the final message with the server's timings
+        (load_duration, prompt_eval_duration, eval_duration in nanoseconds,
+        prompt_eval_count, eval_count). num_ctx sets the context window the
+        prompt was planned for. Returns the full reply, or what arrived so
+        far once cancelled. A caller asking for the same prompt while it is
+        being generated shares that request.
+        """
+        received = []
+
+        def on_received(token):
+            received.append(token)
+            if on_token is not None:
+                on_token(token)
+        try:
+            return self.scheduler.call(
+                lambda on_token, on_done, cancel: self._stream(model, prompt, num_ctx,
+                                                               on_token, on_done, cancel),
+                key=("generate", model, num_ctx, prompt), priority=priority, cancel=cancel,
+                on_token=on_received, on_done=on_done)
+        except RequestCancelled:
+            return "".join(received)
+        except Exception:
+            if cancel is not None and cancel.cancelled:
+                return "".join(received)
+            raise
+
+    def _stream(self, model, prompt, num_ctx, on_token, on_done, cancel) -> str:
+        """One streamed /api/generate request"""
+        request = {"model": model, "prompt": prompt, "stream": True, "keep_alive": self._keep_alive()}
+        if num_ctx:
+            request["options"] = {"num_ctx": num_ctx}
+        estimated = token_estimator().estimate(model, prompt)
+        # Ollama sends one JSON object per line as tokens are generated
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json=request,
+            stream=True,
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        cancel._track(response)
+        parts = []
+        try:
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP Error {response.status_code}: {response.text}")
+            # chunk_size=None yields data as it arrives instead of filling a buffer first
+            for line in response.iter_lines(chunk_size=None):
+                if cancel.cancelled:
+                    break
+                if not line:
+                    continue
+                message = json.loads(line)
+                if message.get("error"):
+                    raise RuntimeError(message["error"])
+                token = message.get("response", "")
+                if token:
+                    parts.append(token)
+                    on_token(token)
+                if message.get("done"):
+                    self._touch(model)
+                    token_estimator().record(model, prompt, estimated,
+                                             message.get("prompt_eval_count"), num_ctx)
+                    on_done(message)
+                # The stream ends after the "done" message; reading it to the end
+                # lets the connection go back to the pool instead of being closed
+        except Exception:
+            if cancel.cancelled:
+                return "".join(parts)  # The stream was closed by cancel()
+            raise
+        finally:
+            cancel._untrack(response)
+            response.close()
+        return "".join(parts)
+
+_clients: Dict[str, OllamaClient] = {}
+_clients_lock = threading.Lock()
+
+def get_client(base_url: str = DEFAULT_OLLAMA_URL) -> OllamaClient:
+    """The shared client for a server, so its connections and model list are reused"""
+    key = base_url.rstrip('/')
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = OllamaClient(key)
+        return client
@@ -0,0 +1,213 @@
+import os
+import heapq
+import itertools
+import threading
+from typing import Callable, Hashable, List, Optional
+
+INTERACTIVE = 0  # The user is waiting for it
+BACKGROUND = 1  # Batch summaries, indexing
+DEFAULT_MAX_CONCURRENT = 2  # Requests a local Ollama serves in parallel unless told otherwise
+# Slots background requests leave free, so an interactive request never waits behind a batch
+INTERACTIVE_RESERVED = 1
+
+def default_max_concurrent() -> int:
+    """Match the local server's parallelism when OLLAMA_NUM_PARALLEL is set for it"""
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", DEFAULT_MAX_CONCURRENT)))
+    except ValueError:
+        return DEFAULT_MAX_CONCURRENT
+
+class CancelToken:
+    """Cancels the requests made with it, closing their open streams at once"""
+
+    def __init__(self):
+        self.cancelled = False
+        self._responses = set()
+        self._lock = threading.Lock()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        with self._lock:
+            responses = list(self._responses)
+        for response in responses:
+            response.close()  # Aborts a blocking read in another thread
+
+    def _track(self, response) -> None:
+        """Close response (anything with close()) when cancelled"""
+        with self._lock:
+            self._responses.add(response)
+        if self.cancelled:
+            response.close()
+
+    def _untrack(self, response) -> None:
+        with self._lock:
+            self._responses.discard(response)
+
+class RequestCancelled(Exception):
+    """Raised by AIScheduler.call when the caller's CancelToken is cancelled"""
+
+class _Subscriber:
+    """One caller waiting for a request; close() (via CancelToken) detaches it"""
+
+    def __init__(self, scheduler, on_token, on_done):
+        self.scheduler = scheduler
+        self.request = None
+        self.on_token = on_token
+        self.on_done = on_done
+        self.event = threading.Event()
+
+    def close(self):
+        self.scheduler._detach(self)
+        self.event.set()
+
+class _Request:
+    def __init__(self, key, priority, fn):
+        self.key = key
+        self.priority = priority
+        self.fn = fn
+        self.cancel = CancelToken()  # Cancelled once no caller is waiting any more
+        self.subscribers: List[_Subscriber] = []
+        self.parts: List[str] = []  # Streamed so far, replayed to callers who join late
+        self.started = False
+        self.finished = False
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+class AIScheduler:
+    """Runs the requests to one AI server, a bounded number at a time.
+
+    Waiting requests start in priority order (INTERACTIVE before
+    BACKGROUND, then first come first served), and background requests
+    never take the last free slot. A request with the same key as one
+    already queued or running is not sent again: the caller joins it,
+    receives the tokens streamed so far and then the same result. A
+    request is aborted once all its callers have cancelled.
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None):
+        self._max_concurrent = max_concurrent or default_max_concurrent()
+        self._lock = threading.Lock()
+        self._queue = []  # (priority, order, request); stale entries are skipped
+        self._order = itertools.count()
+        self._inflight = {}  # key -> queued or running request
+        self._active = 0
+        self._active_background = 0
+
+    @property
+    def max_concurrent(self) -> int:
+        return self._max_concurrent
+
+    @max_concurrent.setter
+    def max_concurrent(self, value: int) -> None:
+        with self._lock:
+            self._max_concurrent = max(1, value)
+            self._dispatch()
+
+    @property
+    def background_slots(self) -> int:
+        """Background requests that may run at once"""
+        return max(1, self._max_concurrent - INTERACTIVE_RESERVED)
+
+    def call(self, fn: Callable, key: Optional[Hashable] = None, priority: int = INTERACTIVE,
+             cancel=None, on_token: Optional[Callable[[str], None]] = None,
+             on_done: Optional[Callable[[dict], None]] = None):
+        """Run fn(on_token, on_done, cancel) in a free slot and return its result; blocking.
+
+        fn gets the request's own CancelToken, and callbacks that pass
+        tokens and the final message on to every caller. Raises
+        RequestCancelled when cancel is cancelled first; fn's exceptions
+        are raised in every caller.
+        """
+        subscriber = _Subscriber(self, on_token, on_done)
+        with self._lock:
+            request = self._inflight.get(key) if key is not None else None
+            if request is None:
+                request = _Request(key, priority, fn)
+                if key is not None:
+                    self._inflight[key] = request
+                heapq.heappush(self._queue, (priority, next(self._order), request))
+            elif priority < request.priority and not request.started:
+                request.priority = priority  # Promoted; the old queue entry goes stale
+                heapq.heappush(self._queue, (priority, next(self._order), request))
+            subscriber.request = request
+            request.subscribers.append(subscriber)
+            if on_token is not None and request.parts:
+                on_token("".join(request.parts))
+            self._dispatch()
+
+        if cancel is not None:
+            cancel._track(subscriber)
+        try:
+            subscriber.event.wait()
+        finally:
+            if cancel is not None:
+                cancel._untrack(subscriber)
+        if not request.finished:
+            raise RequestCancelled()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _dispatch(self):
+        """Start queued requests while slots are free (lock held)"""
+        while self._queue and self._active < self._max_concurrent:
+            priority, _, request = self._queue[0]
+            if request.started or request.finished or priority != request.priority:
+                heapq.heappop(self._queue)
+                continue
+            if priority != INTERACTIVE and self._active_background >= self.background_slots:
+                return  # The rest are background requests too
+            heapq.heappop(self._queue)
+            request.started = True
+            self._active += 1
+            if priority != INTERACTIVE:
+                self._active_background += 1
+            threading.Thread(target=self._execute, args=(request,), daemon=True,
+                             name="ai-request").start()
+
+    def _execute(self, request):
+        def on_token(token):
+            with self._lock:
+                request.parts.append(token)
+                callbacks = [s.on_token for s in request.subscribers if s.on_token is not None]
+            for callback in callbacks:
+                callback(token)
+
+        def on_done(message):
+            with self._lock:
+                callbacks = [s.on_done for s in request.subscribers if s.on_done is not None]
+            for callback in callbacks:
+                callback(message)
+
+        try:
+            request.result = request.fn(on_token, on_done, request.cancel)
+        except Exception as e:
+            request.error = e
+        with self._lock:
+            request.finished = True
+            self._active -= 1
+            if request.priority != INTERACTIVE:
+                self._active_background -= 1
+            if self._inflight.get(request.key) is request:
+                del self._inflight[request.key]
+            subscribers, request.subscribers = request.subscribers, []
+            self._dispatch()
+        for subscriber in subscribers:
+            subscriber.event.set()
+
+    def _detach(self, subscriber):
+        """A caller stopped waiting; abort the request if it was the last one"""
+        with self._lock:
+            request = subscriber.request
+            if request is None or subscriber not in request.subscribers:
+                return
+            request.subscribers.remove(subscriber)
+            if request.subscribers or request.finished:
+                return
+            if self._inflight.get(request.key) is request:
+                del self._inflight[request.key]  # A new caller starts afresh
+            if not request.started:
+                request.finished = True  # Never sent; skipped by _dispatch
+                request.error = RequestCancelled()
+                return
+        request.cancel.cancel()
@@ -0,0 +1,54 @@
+from core.events import ContentChanged, MetadataChanged, ProjectEvent, ProjectLoaded
+
+class AutosaveWriter:
+    """Persists project changes as they are published, doing the least work needed.
+
+    Subscribes as a queued handler, so a burst of events is written once.
+    Content edits rewrite only the affected __content.html files; structural
+    changes (create, remove, move) need the manifest and a full save;
+    metadata changes rewrite only the manifest.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.dirty_paths = set()
+        self.structure_dirty = False
+        self.manifest_dirty = False
+        project.events.subscribe(self._on_events, ProjectEvent, queued=True)
+
+    def detach(self):
+        self.project.events.unsubscribe(self._on_events)
+
+    def _on_events(self, events):
+        for event in events:
+            if isinstance(event, ProjectLoaded):
+                # Freshly read from disk; earlier changes belonged to the old tree
+                self.dirty_paths.clear()
+                self.structure_dirty = False
+                self.manifest_dirty = False
+            elif isinstance(event, ContentChanged):
+                self.dirty_paths.add(event.path)
+            elif isinstance(event, MetadataChanged):
+                self.manifest_dirty = True
+            else:
+                self.structure_dirty = True
+        self.write()
+
+    def write(self):
+        """Write whatever is pending now"""
+        if not self.project.project_path:
+            return  # Unsaved project; nothing to write to yet
+        try:
+            if self.structure_dirty:
+                self.project.save_project(self.project.project_path)
+            else:
+                for path in self.dirty_paths:
+                    self.project.save_document_content(path)
+                if self.manifest_dirty:
+                    self.project.save_manifest()
+        except Exception as e:
+            print(f"\033[91mAutosave failed: {e}\033[0m")
+            return
+        self.dirty_paths.clear()
+        self.structure_dirty = False
+        self.manifest_dirty = False
@@ -0,0 +1,36 @@
+"""Process-wide debug switch, set from the --debug command line flag."""
+import time
+
+_debug_enabled = False
+_startup_t0 = time.perf_counter()
+_startup_marks = []  # (stage, perf_counter) in the order reached
+
+def set_debug(enabled: bool) -> None:
+    """Turn debug output on or off"""
+    global _debug_enabled
+    _debug_enabled = bool(enabled)
+
+def is_debug() -> bool:
+    """Check whether the app was started with --debug"""
+    return _debug_enabled
+
+def debug_log(message: str) -> None:
+    """Print a message only when debug mode is on"""
+    if _debug_enabled:
+        print(f"\033[90m[debug] {message}\033[0m")
+
+def startup_mark(stage: str) -> None:
+    """Record that a startup stage finished (always cheap; printed only with --debug)"""
+    _startup_marks.append((stage, time.perf_counter()))
+
+def print_startup_timing() -> None:
+    """Print how long each recorded startup stage took, once"""
+    if not _debug_enabled or not _startup_marks:
+        return
+    print("\033[90m[debug] Startup timing:\033[0m")
+    previous = _startup_t0
+    for stage, at in _startup_marks:
+        print(f"\033[90m[debug]   {stage:<28} {(at - previous) * 1000:8.1f} ms\033[0m")
+        previous = at
+    print(f"\033[90m[debug]   {'total':<28} {(previous - _startup_t0) * 1000:8.1f} ms\033[0m")
+    _startup_marks.clear()
@@ -0,0 +1,140 @@
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+@dataclass(frozen=True)
+class ProjectEvent:
+    """Base class for changes published by a Project"""
+
+@dataclass(frozen=True)
+class DocumentCreated(ProjectEvent):
+    path: str
+
+@dataclass(frozen=True)
+class DocumentRemoved(ProjectEvent):
+    path: str  # The document and its whole subtree are gone
+
+@dataclass(frozen=True)
+class DocumentMoved(ProjectEvent):
+    old_path: str  # Renamed in place or moved to another parent
+    new_path: str
+
+@dataclass(frozen=True)
+class ChildrenReordered(ProjectEvent):
+    path: str  # Parent whose children changed display order
+
+@dataclass(frozen=True)
+class ContentChanged(ProjectEvent):
+    path: str
+    old_hash: str
+    new_hash: str
+
+@dataclass(frozen=True)
+class MetadataChanged(ProjectEvent):
+    path: str
+    key: str  # Only the manifest needs saving; content is untouched
+
+@dataclass(frozen=True)
+class ProjectLoaded(ProjectEvent):
+    project_path: Optional[str]  # The whole document tree was replaced
+
+def content_hash(content: str) -> str:
+    """Stable hash of a document's content, as carried by ContentChanged"""
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+class EventBus:
+    """Delivers project events to subscribers, synchronously or queued.
+
+    Synchronous handlers are called with each event inside publish().
+    Queued handlers are called with the list of their events when the bus is
+    flushed; a dispatcher (e.g. a zero-delay Qt timer) can be set to schedule
+    that flush once per burst of events, so the handler does its work once
+    per batch. core stays free of Qt this way.
+
+    While the bus is held (see Project.transaction) events are collected and
+    delivered together on release(); synchronous handlers subscribed with
+    batch=True then get the whole list in one call.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Tuple[Callable, Optional[tuple], bool, bool]] = []
+        self._pending: List[Tuple[Callable, ProjectEvent]] = []
+        self._dispatcher: Optional[Callable[[Callable], None]] = None
+        self._flush_scheduled = False
+        self._held: Optional[List[ProjectEvent]] = None
+
+    def subscribe(self, handler: Callable, event_types=None, queued: bool = False,
+                  batch: bool = False) -> Callable:
+        """Subscribe to events of the given types (all if None).
+
+        handler(event) is called synchronously; handler([events]) is called
+        synchronously when batch is True, or once per flush when queued is True.
+        """
+        if event_types is not None and not isinstance(event_types, tuple):
+            event_types = tuple(event_types) if isinstance(event_types, (list, set)) else (event_types,)
+        self._subscribers.append((handler, event_types, queued, batch))
+        return handler
+
+    def unsubscribe(self, handler: Callable) -> None:
+        self._subscribers = [s for s in self._subscribers if s[0] != handler]
+        self._pending = [p for p in self._pending if p[0] != handler]
+
+    def set_dispatcher(self, dispatcher: Optional[Callable[[Callable], None]]) -> None:
+        """dispatcher(flush) must arrange for flush() to be called later"""
+        self._dispatcher = dispatcher
+
+    def publish(self, event: ProjectEvent) -> None:
+        if self._held is not None:
+            self._held.append(event)
+        else:
+            self._deliver([event])
+
+    def hold(self) -> None:
+        """Collect published events until release() or discard()"""
+        if self._held is None:
+            self._held = []
+
+    def release(self) -> None:
+        """Deliver the held events as one batch"""
+        events, self._held = self._held, None
+        if events:
+            self._deliver(events)
+
+    def discard(self) -> None:
+        """Drop the held events (the changes they describe were rolled back)"""
+        self._held = None
+
+    def _deliver(self, events: List[ProjectEvent]) -> None:
+        for handler, event_types, queued, batch in list(self._subscribers):
+            if event_types is None:
+                matching = events
+            else:
+                matching = [e for e in events if isinstance(e, event_types)]
+            if not matching:
+                continue
+            if queued:
+                self._pending.extend((handler, e) for e in matching)
+            elif batch:
+                self._call(handler, matching)
+            else:
+                for event in matching:
+                    self._call(handler, event)
+        if self._pending and self._dispatcher and not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._dispatcher(self.flush)
+
+    def flush(self) -> None:
+        """Deliver queued events, one list per handler, in publish order"""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        batches: Dict[Callable, List[ProjectEvent]] = {}
+        for handler, event in pending:
+            batches.setdefault(handler, []).append(event)
+        for handler, events in batches.items():
+            self._call(handler, events)
+
+    def _call(self, handler, payload):
+        try:
+            handler(payload)
+        except Exception as e:
+            print(f"\033[91mError in project event handler {getattr(handler, '__name__', handler)}: {e}\033[0m")
@@ -0,0 +1,108 @@
+import re
+from typing import Dict, List
+
+# setHtml() cannot display pages over 2 MB of UTF-8; documents larger than
+# this are edited in chunked (virtualized) mode, leaving room for the template
+LARGE_DOCUMENT_THRESHOLD = 1_000_000  # UTF-8 bytes
+# Approximate size of one chunk of top-level blocks
+CHUNK_TARGET_SIZE = 32_000  # characters
+
+VOID_ELEMENTS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+})
+
+# Comments, raw-text elements (whose bodies may contain "<"), end tags and
+# start tags, in that order of precedence
+_TOKEN_RE = re.compile(
+    r'<!--.*?-->'
+    r'|<(script|style|textarea)\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>.*?</\1\s*>'
+    r'|</([a-zA-Z][^\s>]*)\s*>'
+    r'|<([a-zA-Z][^\s/>]*)(?:[^>"\']|"[^"]*"|\'[^\']*\')*?(/?)>',
+    re.DOTALL | re.IGNORECASE,
+)
+
+def split_blocks(html: str) -> List[str]:
+    """Split HTML into its top-level nodes.
+
+    Text between top-level elements stays attached to the preceding block,
+    so joining the result gives back the input unchanged. Browser-serialized
+    markup is well formed, so a tag scanner is enough to track nesting.
+    """
+    if not html:
+        return []
+    blocks = []
+    depth = 0
+    previous = 0
+    for match in _TOKEN_RE.finditer(html):
+        raw_text_tag, end_tag, start_tag, self_closing = match.groups()
+        if end_tag:
+            if end_tag.lower() not in VOID_ELEMENTS and depth > 0:
+                depth -= 1
+            continue
+        tag = raw_text_tag or start_tag
+        if not tag:
+            continue  # Comment
+        if depth == 0 and match.start() > previous:
+            blocks.append(html[previous:match.start()])
+            previous = match.start()
+        if start_tag and not self_closing and start_tag.lower() not in VOID_ELEMENTS:
+            depth += 1
+    blocks.append(html[previous:])
+    return blocks
+
+def group_blocks(blocks: List[str], target_size: int = CHUNK_TARGET_SIZE) -> List[str]:
+    """Merge consecutive blocks into chunks of roughly target_size characters"""
+    chunks = []
+    current = []
+    current_size = 0
+    for block in blocks:
+        current.append(block)
+        current_size += len(block)
+        if current_size >= target_size:
+            chunks.append("".join(current))
+            current = []
+            current_size = 0
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+def is_large_document(html: str) -> bool:
+    """Check whether content should be edited in chunked mode, by its encoded size"""
+    if len(html) > LARGE_DOCUMENT_THRESHOLD:
+        return True  # At least one byte per character
+    if len(html) * 4 <= LARGE_DOCUMENT_THRESHOLD:
+        return False  # At most four bytes per character; no need to encode
+    return len(html.encode('utf-8')) > LARGE_DOCUMENT_THRESHOLD
+
+class ChunkedContent:
+    """Document content held as independently serialized chunks"""
+
+    def __init__(self, chunks: List[str]):
+        self.chunks = list(chunks)
+        self._html = None
+
+    @classmethod
+    def from_html(cls, html: str, target_size: int = CHUNK_TARGET_SIZE) -> 'ChunkedContent':
+        """Split content into chunks along top-level block boundaries"""
+        content = cls(group_blocks(split_blocks(html), target_size))
+        content._html = html
+        return content
+
+    def apply_changes(self, changes: Dict[int, str]) -> int:
+        """Replace the chunks that changed; returns how many were updated"""
+        updated = 0
+        for index, chunk_html in changes.items():
+            index = int(index)
+            if 0 <= index < len(self.chunks) and self.chunks[index] != chunk_html:
+                self.chunks[index] = chunk_html
+                updated += 1
+        if updated:
+            self._html = None
+        return updated
+
+    def to_html(self) -> str:
+        """Full document content, rebuilt only after a chunk changed"""
+        if self._html is None:
+            self._html = "".join(self.chunks)
+        return self._html
@@ -1,6 +1,13 @@
 import json
 import os
+import re
+from bisect import bisect_left, insort
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
 from typing import Dict, Optional, List, Any
+from core.events import (EventBus, DocumentCreated, DocumentRemoved, DocumentMoved,
+                         ChildrenReordered, ContentChanged, MetadataChanged, ProjectLoaded,
+                         content_hash)
 
 class Document:
     def __init__(self, name: str, content: str = "", parent_path: str = ""):
@@ -8,6 +15,9 @@ class Document:
         self.content = content
         self.parent_path = parent_path  # Path to parent document
         self.children: Dict[str, 'Document'] = {}  # name -> Document (children documents)
+        self.child_order: List[str] = []  # Child names in display order
+        self.manual_order = False  # True once the children were arranged by hand
+        self.metadata: Dict[str, Any] = {}  # Data about the document (e.g. its AI summary)
     
     def get_full_path(self) -> str:
         """Get full path including parent path"""
@@ -17,16 +27,36 @@ class Document:
     
     def add_child(self, doc: 'Document') -> None:
         """Add child document to this document"""
+        if doc.name not in self.children:
+            if self.manual_order:
+                self.child_order.append(doc.name)
+            else:
+                insort(self.child_order, doc.name)
         self.children[doc.name] = doc
     
     def get_child(self, name: str) -> Optional['Document']:
         """Get child document by name"""
         return self.children.get(name)
     
+    def child_index(self, name: str) -> int:
+        """Position of a child in display order, or -1"""
+        if not self.manual_order:
+            i = bisect_left(self.child_order, name)
+            return i if i < len(self.child_order) and self.child_order[i] == name else -1
+        try:
+            return self.child_order.index(name)
+        except ValueError:
+            return -1
+    
+    def ordered_children(self) -> List['Document']:
+        """Children in display order"""
+        return [self.children[name] for name in self.child_order]
+    
     def remove_child(self, name: str) -> bool:
         """Remove child document by name"""
         if name in self.children:
             del self.children[name]
+            del self.child_order[self.child_index(name)]
             return True
         return False
     
@@ -34,20 +64,50 @@ class Document:
         """Rename a child document"""
         if old_name in self.children and new_name not in self.children:
             doc = self.children[old_name]
+            index = self.child_index(old_name)
             doc.name = new_name
             self.children[new_name] = doc
             del self.children[old_name]
+            if self.manual_order:
+                self.child_order[index] = new_name  # Keeps its hand-picked place
+            else:
+                del self.child_order[index]
+                insort(self.child_order, new_name)
             return True
         return False
     
+    def set_child_order(self, names: List[str]) -> None:
+        """Arrange the children by hand; names must be exactly the child names"""
+        self.child_order = list(names)
+        self.manual_order = True
+    
+    def sort_children(self) -> None:
+        """Go back to alphabetical order"""
+        self.child_order = sorted(self.children)
+        self.manual_order = False
+    
+    def snapshot(self) -> 'Document':
+        """Copy of the tree's structure and metadata; content strings are shared, not copied"""
+        doc = Document(self.name, self.content, self.parent_path)
+        doc.children = {name: child.snapshot() for name, child in self.children.items()}
+        doc.child_order = list(self.child_order)
+        doc.manual_order = self.manual_order
+        doc.metadata = dict(self.metadata)  # Values are replaced, never changed in place
+        return doc
+    
     def to_dict(self) -> dict:
         """Convert to serializable dictionary"""
-        return {
+        data = {
             "name": self.name,
             "content": self.content,
             "parent_path": self.parent_path,
             "children": {name: doc.to_dict() for name, doc in self.children.items()}
         }
+        if self.manual_order:
+            data["order"] = list(self.child_order)
+        if self.metadata:
+            data["metadata"] = self.metadata
+        return data
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Document':
@@ -57,11 +117,21 @@ class Document:
             content=data.get("content", ""),
             parent_path=data.get("parent_path", "")
         )
+        doc.metadata = dict(data.get("metadata", {}))
         
         # Load children documents
         for name, child_data in data.get("children", {}).items():
             doc.children[name] = cls.from_dict(child_data)
         
+        order = data.get("order")
+        if order is not None:
+            # Saved manual order; tolerate names that no longer match
+            listed = [name for name in order if name in doc.children]
+            seen = set(listed)
+            doc.set_child_order(listed + [name for name in doc.children if name not in seen])
+        else:
+            doc.child_order = sorted(doc.children)
+        
         return doc
 
 class Project:
@@ -71,7 +141,48 @@ class Project:
         self.current_document: Optional[str] = None  # Full path to current document
         self.project_path: Optional[str] = None  # Path to .dwproj file
         self.untitled_counter = 0  # Track number of untitled documents
+        self.events = EventBus()  # Publishes document changes to the UI, autosave and indexes
+        self._transaction_depth = 0
+        self._pending_link_moves: List[tuple] = []  # (old_path, new_path) awaiting the link pass
     
+    @contextmanager
+    def transaction(self):
+        """Group many changes into one.
+
+        Inside the block, link rewrites are deferred and change events are
+        held. On exit the links are rewritten in a single pass over the
+        project and the events are delivered as one batch, so the sidebar
+        refreshes once and autosave writes once. If the block raises, the
+        document tree is restored to its state at entry and no events are
+        delivered. Transactions nest; only the outermost one commits.
+        """
+        if self._transaction_depth:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+        
+        # Content strings are immutable, so sharing them keeps the snapshot cheap
+        snapshot = (self.root_document.snapshot(), self.current_document, self.untitled_counter)
+        self._transaction_depth = 1
+        self._pending_link_moves = []
+        self.events.hold()
+        try:
+            yield self
+            if self._pending_link_moves:
+                self._rewrite_links(self._pending_link_moves)
+        except BaseException:
+            self.root_document = snapshot[0]
+            self.current_document, self.untitled_counter = snapshot[1], snapshot[2]
+            self.events.discard()
+            raise
+        finally:
+            self._transaction_depth = 0
+            self._pending_link_moves = []
+        self.events.release()
+
     def get_document_by_path(self, path: str) -> Optional[Document]:
         """Get document by its full path"""
         if not path:
@@ -99,10 +210,31 @@ class Project:
         """Update document content by path"""
         doc = self.get_document_by_path(path)
         if doc:
-            doc.content = content
+            if doc.content != content:
+                old_hash = content_hash(doc.content)
+                doc.content = content
+                self.events.publish(ContentChanged(path, old_hash, content_hash(content)))
             return True
         return False
     
+    def get_metadata(self, path: str, key: str) -> Any:
+        """Get one metadata value of a document, or None"""
+        doc = self.get_document_by_path(path)
+        return doc.metadata.get(key) if doc else None
+    
+    def set_metadata(self, path: str, key: str, value: Any) -> bool:
+        """Set (or with None, remove) one metadata value of a document"""
+        doc = self.get_document_by_path(path)
+        if doc is None:
+            return False
+        if value is None:
+            if doc.metadata.pop(key, None) is None:
+                return True
+        else:
+            doc.metadata[key] = value
+        self.events.publish(MetadataChanged(path, key))
+        return True
+    
     def has_children(self, path: str) -> bool:
         """Check if a document has children"""
         doc = self.get_document_by_path(path)
@@ -122,6 +254,7 @@ class Project:
         if not self.current_document:
             self.current_document = full_path
         
+        self.events.publish(DocumentCreated(full_path))
         return full_path
     
     def _ensure_document_path(self, path: str) -> Document:
@@ -147,6 +280,7 @@ class Project:
                 # Create missing document
                 next_doc = Document(name=doc_name, parent_path=current_path[:-len(doc_name)-1] if len(current_path) > len(doc_name) else "")
                 current_doc.add_child(next_doc)
+                self.events.publish(DocumentCreated(current_path))
             
             current_doc = next_doc
         
@@ -179,12 +313,12 @@ class Project:
                 # Find another document to set as current
                 if parent_doc.children:
                     # Use first document in current parent
-                    doc_name = next(iter(parent_doc.children))
-                    doc = parent_doc.children[doc_name]
+                    doc = parent_doc.ordered_children()[0]
                     self.current_document = doc.get_full_path()
                 else:
                     # No documents in this parent, use the parent itself
                     self.current_document = parent_path if parent_path else self._find_any_document_path()
+            self.events.publish(DocumentRemoved(path))
             return True
         return False
 
@@ -198,14 +332,28 @@ class Project:
                 
             # Check children documents
             if doc.children:
-                doc_name = next(iter(doc.children))
-                child_doc = doc.children[doc_name]
+                child_doc = doc.ordered_children()[0]
                 return child_doc.get_full_path()
             
             return None
         
         return find_path(self.root_document, "")
 
+    def get_subtree_paths(self, path: str = "") -> List[str]:
+        """Paths of a document and all its descendants in display order ("" for the whole project)"""
+        doc = self.get_document_by_path(path) if path else self.root_document
+        if doc is None:
+            return []
+        result = []
+        stack = [(doc, path)]
+        while stack:
+            current, current_path = stack.pop()
+            if current_path:
+                result.append(current_path)
+            for child in reversed(current.ordered_children()):
+                stack.append((child, f"{current_path}/{child.name}" if current_path else child.name))
+        return result
+    
     def _get_all_document_paths(self) -> List[str]:
         """Get paths to all documents in the project"""
         result = []
@@ -259,15 +407,40 @@ class Project:
         self._cleanup_orphaned_files(project_dir, saved_documents)
 
         # Save project metadata
+        self._write_manifest(filepath, saved_documents)
+
+    def _write_manifest(self, filepath: str, documents: Dict[str, str]) -> None:
         project_data = {
             'name': self.name,
-            'documents': saved_documents,
+            'documents': documents,
             'current_document': self.current_document,
             'document_structure': self.root_document.to_dict()
         }
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(project_data, f, indent=2)
 
+    def save_manifest(self) -> bool:
+        """Rewrite only the project file (structure and metadata); content files are left as is"""
+        if not self.project_path:
+            return False
+        project_dir = os.path.splitext(self.project_path)[0]
+        documents = {path: os.path.join(project_dir, f"{path}/__content.html")
+                     for path in self._get_all_document_paths()}
+        self._write_manifest(self.project_path, documents)
+        return True
+
+    def save_document_content(self, path: str) -> bool:
+        """Write a single document's content file; the manifest is left as is"""
+        doc = self.get_document_by_path(path)
+        if not self.project_path or not path or doc is None:
+            return False
+        project_dir = os.path.splitext(self.project_path)[0]
+        file_path = os.path.join(project_dir, f"{path}/__content.html")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(doc.content)
+        return True
+
     def _cleanup_orphaned_files(self, project_dir: str, saved_documents: Dict[str, str]):
         """Remove files that are no longer part of the project"""
         # Get set of files that should exist
@@ -317,6 +490,8 @@ class Project:
             if not self.current_document:
                 # Try to find any document to use as current
                 self.current_document = self._find_any_document_path()
+        
+        self.events.publish(ProjectLoaded(filepath))
     
     def _convert_legacy_format(self, project_data):
         """Convert legacy format with folders/documents to new unified document structure"""
@@ -360,54 +535,51 @@ class Project:
     
     def update_document_links(self, old_path: str, new_path: str) -> None:
         """Update docuweave://document/ links in all documents when a document path changes"""
-        import re
-        
-        # Create search pattern for links to the old path
-        # This handles both exact matches and child documents
-        # We need to handle URL-encoded paths as well
-        from urllib.parse import quote
-        
-        # Function to update links in a single document
-        def update_links_in_document(doc: Document):
-            if not doc.content:
-                return
-                
-            # Pattern for exact match
-            exact_pattern = f'docuweave://document/{re.escape(old_path)}"'
-            replacement = f'docuweave://document/{new_path}"'
-            doc.content = re.sub(exact_pattern, replacement, doc.content)
-            
-            # Pattern for child documents
-            if old_path:  # Only if old_path is not empty
-                child_pattern = f'docuweave://document/{re.escape(old_path)}/'
-                child_replacement = f'docuweave://document/{new_path}/'
-                doc.content = re.sub(child_pattern, child_replacement, doc.content)
-                
-            # URL-encoded versions
-            encoded_old_path = quote(old_path)
-            encoded_new_path = quote(new_path)
-            
-            exact_encoded_pattern = f'docuweave://document/{encoded_old_path}"'
-            encoded_replacement = f'docuweave://document/{encoded_new_path}"'
-            doc.content = re.sub(exact_encoded_pattern, encoded_replacement, doc.content)
-            
-            if old_path:  # Only if old_path is not empty
-                child_encoded_pattern = f'docuweave://document/{encoded_old_path}/'
-                child_encoded_replacement = f'docuweave://document/{encoded_new_path}/'
-                doc.content = re.sub(child_encoded_pattern, child_encoded_replacement, doc.content)
-        
-        # Process all documents recursively
-        def process_documents(doc):
-            # Update links in this document
-            if doc.name != "root":
-                update_links_in_document(doc)
-                
-            # Process children
-            for child in doc.children.values():
-                process_documents(child)
-        
-        # Start processing from root
-        process_documents(self.root_document)
+        if self._transaction_depth:
+            # Rewritten together with every other move when the transaction commits
+            self._pending_link_moves.append((old_path, new_path))
+        else:
+            self._rewrite_links([(old_path, new_path)])
+
+    _LINK_RE = re.compile(r'docuweave://document/([^"]*)"')
+
+    @staticmethod
+    def _map_link_path(path: str, moves: List[tuple]) -> str:
+        """Follow a link target through a sequence of (old_path, new_path) moves"""
+        for old_path, new_path in moves:
+            if path == old_path or (old_path and path.startswith(old_path + '/')):
+                path = new_path + path[len(old_path):]
+        return path
+
+    def _rewrite_links(self, moves: List[tuple]) -> None:
+        """Rewrite links (plain or URL-encoded) for any number of moves in one pass"""
+        def replace(match):
+            target = match.group(1)
+            mapped = self._map_link_path(target, moves)
+            if mapped == target:
+                # The link may be URL-encoded (e.g. spaces as %20)
+                decoded = unquote(target)
+                mapped_decoded = self._map_link_path(decoded, moves)
+                if mapped_decoded == decoded:
+                    return match.group(0)
+                mapped = quote(mapped_decoded)
+            return f'docuweave://document/{mapped}"'
+        
+        changed = []  # (path, old content) of documents whose links were rewritten
+        stack = list(self.root_document.children.values())
+        while stack:
+            doc = stack.pop()
+            stack.extend(doc.children.values())
+            if not doc.content or 'docuweave://document/' not in doc.content:
+                continue
+            old_content = doc.content
+            doc.content = self._LINK_RE.sub(replace, old_content)
+            if doc.content != old_content:
+                changed.append((doc.get_full_path(), old_content))
+        
+        for path, old_content in changed:
+            doc = self.get_document_by_path(path)
+            self.events.publish(ContentChanged(path, content_hash(old_content), content_hash(doc.content)))
 
     def rename_document(self, old_path: str, new_path: str) -> bool:
         """Rename a document or move it to a different parent"""
@@ -447,6 +619,8 @@ class Project:
                 # Update parent_path for all children
                 self._update_child_paths(doc, new_parent_path)
                 
+                self.events.publish(DocumentMoved(old_path, new_path))
+                
                 # Update any internal links to this document
                 self.update_document_links(old_path, new_path)
                 
@@ -457,24 +631,15 @@ class Project:
             new_parent = self._ensure_document_path(new_parent_path)
             
             if old_parent and new_parent and old_name in old_parent.children:
-                # Get document content and children
-                content = doc.content
-                children = doc.children.copy()
-                
                 # Remove from old parent
                 old_parent.remove_child(old_name)
                 
-                # Create in new parent with new name
-                new_doc = Document(name=new_name, content=content, parent_path=new_parent_path)
-                new_parent.add_child(new_doc)
-                
-                # Move all children to new document
-                for child_name, child_doc in children.items():
-                    child_doc.parent_path = new_path
-                    new_doc.children[child_name] = child_doc
+                # Re-parent the same document, keeping its children and their order
+                doc.name = new_name
+                new_parent.add_child(doc)
                 
                 # Update all children's parent paths recursively
-                self._update_child_paths(new_doc, new_parent_path)
+                self._update_child_paths(doc, new_parent_path)
                 
                 # Update current_document reference if needed
                 if self.current_document == old_path:
@@ -484,6 +649,8 @@ class Project:
                     relative_path = self.current_document[len(old_path) + 1:]
                     self.current_document = f"{new_path}/{relative_path}"
                 
+                self.events.publish(DocumentMoved(old_path, new_path))
+                
                 # Update any internal links to this document
                 self.update_document_links(old_path, new_path)
                 
@@ -491,6 +658,36 @@ class Project:
                 
         return False
     
+    def reorder_documents(self, parent_path: str, names: List[str], index: int) -> bool:
+        """Place the named children of a document, in the given order, at a display position"""
+        parent = self.get_document_by_path(parent_path)
+        if parent is None:
+            return False
+        names = [name for name in names if name in parent.children]
+        if not names:
+            return False
+        moving = set(names)
+        order = parent.child_order
+        # Positions are given in the current order, which still contains the moving names
+        index -= sum(1 for name in order[:max(index, 0)] if name in moving)
+        remaining = [name for name in order if name not in moving]
+        index = max(0, min(index, len(remaining)))
+        new_order = remaining[:index] + names + remaining[index:]
+        if new_order == order:
+            return True
+        parent.set_child_order(new_order)
+        self.events.publish(ChildrenReordered(parent_path))
+        return True
+
+    def sort_children(self, path: str) -> bool:
+        """Return a document's children to alphabetical order"""
+        doc = self.get_document_by_path(path)
+        if doc is None or not doc.manual_order:
+            return False
+        doc.sort_children()
+        self.events.publish(ChildrenReordered(path))
+        return True
+
     def _update_child_paths(self, doc: Document, parent_path: str):
         """Recursively update parent_path for a document and all its children"""
         # Update this document's parent_path
@@ -0,0 +1,150 @@
+import os
+import json
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.events import content_hash
+from core.text_extraction import extract_text
+
+DEFAULT_EMBED_MODEL = "nomic-embed-text"
+INDEX_NAME = ".related_index"  # .npy matrix and .json row index, in the project's content folder
+EMBED_MAX_CHARS = 6000  # Leading text embedded per document; enough to capture its topic
+DEFAULT_TOP_K = 8
+
+def _numpy():
+    import numpy  # Optional dependency, imported on first use
+    return numpy
+
+class RelatedIndex:
+    """Document embeddings for "related documents" queries.
+
+    One row per document in a float32 matrix of unit vectors, saved as
+    .npy next to a JSON list of (path, content hash). update() embeds only
+    documents whose content hash is new; a document that was renamed or
+    moved keeps its vector. related() is a single matrix-vector product
+    and a partial sort. embed(text) -> list of floats is injected, so it
+    can be stubbed. Safe to share between threads; calls run one at a time.
+    """
+
+    def __init__(self, directory: Optional[str], model: str, embed: Callable[[str], List[float]]):
+        self.directory = directory  # None for an unsaved project: kept in memory only
+        self.model = model
+        self.embed = embed
+        self.paths: List[str] = []
+        self.hashes: List[str] = []
+        self.matrix = None  # numpy array, len(paths) x dimensions
+        self._rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._load()
+
+    def _files(self):
+        base = os.path.join(self.directory, INDEX_NAME)
+        return base + ".npy", base + ".json"
+
+    def _load(self):
+        if not self.directory:
+            return
+        matrix_path, rows_path = self._files()
+        try:
+            with open(rows_path, 'r', encoding='utf-8') as f:
+                rows = json.load(f)
+            if rows.get("model") != self.model:
+                return  # Vectors from another model are not comparable
+            matrix = _numpy().load(matrix_path)
+        except (OSError, ValueError):
+            return  # No index yet, or unreadable: rebuilt by the next update
+        if len(matrix) != len(rows["paths"]):
+            return
+        self.paths, self.hashes, self.matrix = list(rows["paths"]), list(rows["hashes"]), matrix
+        self._rows = {path: i for i, path in enumerate(self.paths)}
+
+    def save(self) -> None:
+        if not self.directory or self.matrix is None:
+            return
+        matrix_path, rows_path = self._files()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(matrix_path, 'wb') as f:
+                _numpy().save(f, self.matrix)
+            with open(rows_path, 'w', encoding='utf-8') as f:
+                json.dump({"model": self.model, "paths": self.paths, "hashes": self.hashes}, f)
+        except OSError as e:
+            print(f"\033[91mCould not save the related documents index: {e}\033[0m")
+
+    def _vector(self, content: str, digest: str, embed: Callable[[str], List[float]]):
+        np = _numpy()
+        text = extract_text(content, digest).text[:EMBED_MAX_CHARS]
+        vector = np.asarray(embed(text) if text else [], dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def update(self, documents: Dict[str, str],
+               on_progress: Optional[Callable[[int, int], None]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None,
+               embed: Optional[Callable[[str], List[float]]] = None) -> int:
+        """Bring the index in line with {path: content}; returns how many documents were embedded.
+
+        Work already done is kept when cancelled part way. embed replaces
+        the index's embedding function for this update, e.g. with one that
+        can be cancelled.
+        """
+        with self._lock:
+            return self._update(documents, on_progress, is_cancelled, embed or self.embed)
+
+    def _update(self, documents, on_progress, is_cancelled, embed):
+        np = _numpy()
+        hashes = {path: content_hash(content) for path, content in documents.items()}
+        old_rows = {path: i for i, path in enumerate(self.paths)}
+        by_hash = {h: i for i, h in enumerate(self.hashes)}  # Lets moved documents keep their vector
+
+        vectors = []
+        paths = []
+        pending = []
+        for path, digest in hashes.items():
+            row = old_rows.get(path)
+            if row is None or self.hashes[row] != digest:
+                row = by_hash.get(digest)
+            if row is not None:
+                paths.append(path)
+                vectors.append(self.matrix[row])
+            else:
+                pending.append(path)
+
+        embedded = 0
+        for i, path in enumerate(pending):
+            if is_cancelled is not None and is_cancelled():
+                break
+            if on_progress is not None:
+                on_progress(i, len(pending))
+            vector = self._vector(documents[path], hashes[path], embed)
+            if vector.size == 0:
+                continue  # No text to embed
+            if vectors and vector.shape != vectors[0].shape:
+                raise RuntimeError("Embedding size changed; was the embedding model replaced?")
+            paths.append(path)
+            vectors.append(vector)
+            embedded += 1
+
+        changed = paths != self.paths or [hashes[path] for path in paths] != self.hashes
+        self.paths = paths
+        self.hashes = [hashes[path] for path in paths]
+        self.matrix = np.vstack(vectors).astype(np.float32) if vectors else None
+        self._rows = {path: i for i, path in enumerate(self.paths)}
+        if changed:  # Includes renames and moves, which keep the row count
+            self.save()
+        return embedded
+
+    def related(self, path: str, k: int = DEFAULT_TOP_K) -> List[Tuple[str, float]]:
+        """The k documents most similar to path, as (path, cosine similarity), best first"""
+        np = _numpy()
+        with self._lock:
+            row = self._rows.get(path)
+            if row is None or self.matrix is None or len(self.paths) < 2:
+                return []
+            scores = self.matrix @ self.matrix[row]  # Rows are unit vectors
+            paths = self.paths
+        scores[row] = -np.inf
+        k = min(k, len(paths) - 1)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(paths[i], float(scores[i])) for i in top]
@@ -1,10 +1,12 @@
 import os
 import re
-import markdown
 
 class Renderer:
     def __init__(self):
-        pass
+        self.theme_path = os.path.join(os.path.dirname(__file__), "..", "resources", "dark_theme.qss")
+        # Parsed theme variables, refreshed only when the stylesheet's mtime changes
+        self._theme_mtime = None
+        self._theme_variables = ""
 
     def render(self, markdown_text: str) -> str:
         # Simply return the trimmed text, assuming it is already HTML.
@@ -16,9 +18,20 @@ class Renderer:
 
     def get_theme_variables(self) -> str:
         """Extract the inner CSS variable definitions from dark_theme.qss and escape curly braces for formatting."""
-        qss_path = os.path.join(os.path.dirname(__file__), "..", "resources", "dark_theme.qss")
         try:
-            with open(qss_path, "r", encoding="utf-8") as file:
+            mtime = os.path.getmtime(self.theme_path)
+        except OSError as e:
+            print(f"Error reading theme variables: {e}")
+            return self._theme_variables
+        if mtime != self._theme_mtime:
+            self._theme_variables = self._parse_theme_variables()
+            self._theme_mtime = mtime
+        return self._theme_variables
+
+    def _parse_theme_variables(self) -> str:
+        """Read dark_theme.qss and return its escaped theme variable block"""
+        try:
+            with open(self.theme_path, "r", encoding="utf-8") as file:
                 qss_content = file.read()
             # Extract block between THEME_VARIABLES_START and THEME_VARIABLES_END
             m = re.search(r'/\* THEME_VARIABLES_START \*/(.*?)/\* THEME_VARIABLES_END \*/',
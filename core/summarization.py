@@ -0,0 +1,151 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional
+
+from core.text_extraction import extract_text
+
+# Sections are packed up to this many characters of plain text per prompt, unless
+# a token budget (core.token_budget) sized them for the model's context window
+CHUNK_CHARS = 6000
+# Concurrent requests for the map step (Ollama queues anything over OLLAMA_NUM_PARALLEL)
+DEFAULT_WORKERS = 2
+MAX_WORKERS = 8
+MAX_REDUCE_ROUNDS = 3
+# Bump when the prompts or the splitting change, so cached summaries are not reused
+PROMPT_VERSION = 2
+
+PROMPTS = {
+    "brief": "Please provide a brief summary of the following text in {max_length} words or less:\n\n{text}",
+    "detailed": "Please provide a detailed summary of the following text, capturing key points and important details in approximately {max_length} words:\n\n{text}",
+    "bullet_points": "Please summarize the following text as bullet points, highlighting the main ideas in {max_length} words or less:\n\n{text}",
+    "key_insights": "Please extract the key insights and takeaways from the following text in {max_length} words or less:\n\n{text}",
+}
+SECTION_PROMPT = ("The following is one section of a longer document. Summarize it in about "
+                  "{max_length} words, keeping names, numbers and conclusions:\n\n{text}")
+COMBINE_NOTE = "The text below consists of summaries of consecutive sections of one document.\n"
+
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+
+def build_prompt(summary_type: str, text: str, max_length: int) -> str:
+    """Prompt asking for a summary of the given type"""
+    template = PROMPTS.get(summary_type, PROMPTS["brief"])
+    return template.format(max_length=max_length, text=text)
+
+def split_text(text: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Split text that is too long on its own at sentence ends (or hard, as a last resort)"""
+    pieces = []
+    current = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            pieces.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_sections(html: str, max_chars: int = CHUNK_CHARS) -> List[str]:
+    """Split HTML into plain-text chunks of at most max_chars.
+
+    Chunks follow the document's structure: a heading starts a new chunk
+    once the current one is at least half full, and text blocks
+    (paragraphs, list items, table rows) are never split unless one alone
+    is too long.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for block in extract_text(html).blocks:
+        text = block.text
+        starts_section = block.level > 0
+        if current and (size + len(text) + 1 > max_chars or
+                        (starts_section and size >= max_chars // 2)):
+            chunks.append("\n".join(current))
+            current = []
+            size = 0
+        if len(text) > max_chars:
+            chunks.extend(split_text(text, max_chars))
+            continue
+        current.append(text)
+        size += len(text) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def _pack(texts: List[str], max_chars: int) -> List[str]:
+    """Join consecutive texts into groups of at most max_chars"""
+    groups = []
+    current = ""
+    for text in texts:
+        if current and len(current) + len(text) + 2 > max_chars:
+            groups.append(current)
+            current = ""
+        current = f"{current}\n\n{text}" if current else text
+    if current:
+        groups.append(current)
+    return groups
+
+def map_reduce_summary(chunks: List[str], generate: Callable, summary_type: str, max_length: int,
+                       workers: int = DEFAULT_WORKERS, max_chars: int = CHUNK_CHARS,
+                       on_progress: Optional[Callable[[str], None]] = None,
+                       is_cancelled: Optional[Callable[[], bool]] = None) -> str:
+    """Summarize chunks concurrently, then combine the partial summaries.
+
+    generate(prompt, final) returns the model's reply; final is True for the
+    last (reduce) request, whose reply is the result. Up to `workers` section
+    prompts run at once. Partial summaries that together are still too long
+    for one prompt are reduced again in groups.
+    """
+    report = on_progress or (lambda message: None)
+    cancelled = is_cancelled or (lambda: False)
+    if len(chunks) == 1:
+        return generate(build_prompt(summary_type, chunks[0], max_length), True)
+
+    # Map: a share of the final length per section, with enough room for detail
+    section_length = max(40, min(max_length, 2 * max_length // len(chunks)))
+    partials = [""] * len(chunks)
+    executor = ThreadPoolExecutor(max_workers=max(1, min(workers, MAX_WORKERS)))
+    try:
+        futures = {
+            executor.submit(generate, SECTION_PROMPT.format(max_length=section_length, text=chunk), False): i
+            for i, chunk in enumerate(chunks)
+        }
+        report(f"Summarizing {len(chunks)} sections...")
+        for done, future in enumerate(as_completed(futures), 1):
+            partials[futures[future]] = future.result().strip()
+            if cancelled():
+                return ""
+            report(f"Summarized section {done} of {len(chunks)}")
+    finally:
+        # Drop queued sections on cancel or error; running requests are aborted by the caller
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Reduce until the partial summaries fit in one prompt
+    for _ in range(MAX_REDUCE_ROUNDS):
+        if len(partials) == 1 or sum(len(p) + 2 for p in partials) <= max_chars:
+            break
+        if cancelled():
+            return ""
+        groups = _pack(partials, max_chars)
+        report(f"Combining {len(partials)} partial summaries...")
+        partials = [generate(SECTION_PROMPT.format(max_length=section_length, text=COMBINE_NOTE + group),
+                             False).strip() for group in groups]
+    report("Writing the final summary...")
+    return generate(build_prompt(summary_type, COMBINE_NOTE + "\n\n".join(partials), max_length), True)
+
+def summarize_html(html: str, generate: Callable, summary_type: str, max_length: int,
+                   workers: int = DEFAULT_WORKERS, max_chars: int = CHUNK_CHARS,
+                   on_progress: Optional[Callable[[str], None]] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None) -> str:
+    """Summarize a document, splitting along its HTML structure while that is still there.
+
+    A document whose text fits in max_chars is summarized in a single prompt.
+    """
+    chunks = split_sections(html, max_chars)
+    if not chunks:
+        return ""
+    return map_reduce_summary(chunks, generate, summary_type, max_length, workers=workers,
+                              max_chars=max_chars, on_progress=on_progress, is_cancelled=is_cancelled)
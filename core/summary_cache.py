@@ -0,0 +1,95 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024  # Summary text kept on disk
+CACHE_FILE = "summaries.json"
+
+def summary_key(content_hash: str, model: str, summary_type: str, max_length: int,
+                prompt_version: int) -> str:
+    """Cache key for one summary request"""
+    raw = json.dumps([content_hash, model, summary_type, max_length, prompt_version])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+class SummaryCache:
+    """Generated summaries on disk, least recently used evicted first.
+
+    Entries live in one JSON file in least-recently-used order; the total
+    size of the stored summaries is kept under max_bytes. Hits only
+    reorder the entries in memory; the order is written with the next
+    put() or by flush(). Safe to share between the dialog and background
+    jobs.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = os.path.join(directory, CACHE_FILE)
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()  # Oldest use first
+        self._size = 0
+        self._order_dirty = False  # Hits reordered entries since the last save
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get("entries", [])
+        except (OSError, ValueError, AttributeError):
+            return  # Missing or unreadable: start empty
+        for key, entry in entries:
+            self._entries[key] = entry
+            self._size += len(entry["summary"].encode('utf-8'))
+        self._evict()
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"entries": list(self._entries.items())}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._order_dirty = False
+        except OSError as e:
+            print(f"\033[91mCould not save summary cache: {e}\033[0m")
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= len(entry["summary"].encode('utf-8'))
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached summary for key, or None; marks it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            entry["used"] = time.time()
+            self._order_dirty = True
+            return entry["summary"]
+
+    def put(self, key: str, summary: str) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old["summary"].encode('utf-8'))
+            self._entries[key] = {"summary": summary, "used": time.time()}
+            self._size += len(summary.encode('utf-8'))
+            self._evict()
+            self._save()
+
+    def flush(self) -> None:
+        """Write the recently-used order if hits changed it (e.g. at shutdown)"""
+        with self._lock:
+            if self._order_dirty:
+                self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._save()
@@ -0,0 +1,123 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Optional, Tuple
+
+from core.events import content_hash
+
+CACHE_SIZE = 256  # Extracted documents kept in memory
+
+# Elements whose text is never shown
+SKIPPED_ELEMENTS = frozenset({"script", "style", "template", "noscript", "head", "title"})
+# Elements that start a new line of text
+BLOCK_ELEMENTS = frozenset({
+    "address", "article", "aside", "blockquote", "dd", "details", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "summary",
+    "table", "tr", "ul",
+})
+HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+
+@dataclass(frozen=True)
+class TextBlock:
+    text: str
+    level: int = 0  # Heading level 1-6, or 0 for body text
+
+@dataclass(frozen=True)
+class ExtractedText:
+    """Readable text of a document, one block (paragraph, list item, heading) per line"""
+    blocks: Tuple[TextBlock, ...]
+
+    @property
+    def text(self) -> str:
+        return "\n".join(block.text for block in self.blocks)
+
+    @property
+    def outline(self) -> Tuple[TextBlock, ...]:
+        """The headings, in document order"""
+        return tuple(block for block in self.blocks if block.level)
+
+    @property
+    def word_count(self) -> int:
+        return sum(len(block.text.split()) for block in self.blocks)
+
+class _TextExtractor(HTMLParser):
+    """Collects text blocks while streaming through the markup"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.blocks = []
+        self._parts = []
+        self._skip_depth = 0
+        self._heading = 0
+
+    def _end_block(self):
+        text = ' '.join(''.join(self._parts).split())
+        self._parts = []
+        if text:
+            self.blocks.append(TextBlock(text, self._heading))
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_ELEMENTS:
+            self._skip_depth += 1
+        elif tag == "br":
+            self._parts.append(" ")
+        elif tag in BLOCK_ELEMENTS or tag in ("td", "th"):
+            if tag in ("td", "th"):
+                self._parts.append(" ")  # Cells stay on their row's line
+            else:
+                self._end_block()
+            self._heading = HEADING_LEVELS.get(tag, self._heading)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "br":
+            self._parts.append(" ")
+        elif tag == "hr":
+            self._end_block()
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_ELEMENTS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_ELEMENTS:
+            self._end_block()
+            if tag in HEADING_LEVELS:
+                self._heading = 0
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def close(self):
+        super().close()
+        self._end_block()
+
+def parse_text(html: str) -> ExtractedText:
+    """Extract text and headings from HTML (uncached)"""
+    parser = _TextExtractor()
+    parser.feed(html or "")
+    parser.close()
+    return ExtractedText(tuple(parser.blocks))
+
+_cache: "OrderedDict[str, ExtractedText]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def extract_text(html: str, digest: Optional[str] = None) -> ExtractedText:
+    """Extracted text of a document, cached by content hash.
+
+    Unchanged content is parsed once, however many consumers (AI
+    summaries, indexing) ask for it. Pass digest when the content hash is
+    already known, e.g. from a ContentChanged event.
+    """
+    key = digest or content_hash(html or "")
+    with _cache_lock:
+        extracted = _cache.get(key)
+        if extracted is not None:
+            _cache.move_to_end(key)
+            return extracted
+    extracted = parse_text(html)
+    with _cache_lock:
+        _cache[key] = extracted
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return extracted
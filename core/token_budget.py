@@ -0,0 +1,83 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from core.debug import debug_log
+
+DEFAULT_CHARS_PER_TOKEN = 4.0  # English prose with common tokenizers
+DEFAULT_CONTEXT_WINDOW = 2048  # Ollama's num_ctx when nothing else is known
+MAX_CONTEXT_WINDOW = 8192  # Larger windows cost too much memory on CPU-only hosts
+PROMPT_OVERHEAD_TOKENS = 100  # Instructions around the document text
+TOKENS_PER_WORD = 1.4  # For reserving room for the reply
+SAFETY_MARGIN = 0.9  # Estimates are approximate; leave some slack
+CALIBRATION_WEIGHT = 0.3  # How far one measurement moves a model's ratio
+MIN_CALIBRATION_CHARS = 200  # Short prompts say little about the ratio
+
+class TokenEstimator:
+    """Estimates token counts from character counts, per model.
+
+    Starts from a fixed characters-per-token ratio and moves each model's
+    ratio towards what the server reports (prompt_eval_count) as requests
+    complete. Estimated and actual counts are logged in debug mode.
+    """
+
+    def __init__(self):
+        self._ratios: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def chars_per_token(self, model: str) -> float:
+        with self._lock:
+            return self._ratios.get(model, DEFAULT_CHARS_PER_TOKEN)
+
+    def estimate(self, model: str, text: str) -> int:
+        return int(len(text) / self.chars_per_token(model)) + 1
+
+    def record(self, model: str, prompt: str, estimated: int, actual_tokens: Optional[int],
+               num_ctx: Optional[int] = None) -> None:
+        """Log and learn from the token count the server reported for a prompt"""
+        if not actual_tokens:
+            return
+        debug_log(f"Prompt tokens for {model}: estimated {estimated}, actual {actual_tokens} "
+                  f"({len(prompt)} chars, {len(prompt) / actual_tokens:.2f} chars/token)")
+        if num_ctx and actual_tokens >= num_ctx - 1:
+            # The server cut the prompt to fit; the count says nothing about the ratio
+            print(f"\033[93mPrompt for {model} was truncated to the {num_ctx} token context window\033[0m")
+            return
+        if len(prompt) < MIN_CALIBRATION_CHARS:
+            return
+        measured = len(prompt) / actual_tokens
+        with self._lock:
+            current = self._ratios.get(model, DEFAULT_CHARS_PER_TOKEN)
+            if not current / 2 <= measured <= current * 2:
+                return  # Likely a cached prompt prefix being skipped; not a real ratio
+            self._ratios[model] = current + (measured - current) * CALIBRATION_WEIGHT
+
+_estimator = TokenEstimator()
+
+def token_estimator() -> TokenEstimator:
+    """The estimator shared by all AI requests, so calibration carries over"""
+    return _estimator
+
+@dataclass(frozen=True)
+class PromptPlan:
+    context_window: int  # Sent to the server as num_ctx
+    max_chunk_chars: int  # Document text that fits in one prompt
+    estimated_tokens: int  # For the whole document text
+    single_shot: bool  # Whether the document fits in one prompt
+
+def plan_summary(model: str, text: str, context_window: int, max_length_words: int) -> PromptPlan:
+    """Fit a summary of text into the model's context window.
+
+    Leaves room for the instructions and the reply, then decides whether
+    the text can go in a single prompt or must be summarized in chunks.
+    """
+    window = max(512, min(context_window, MAX_CONTEXT_WINDOW))
+    reply_tokens = int(max_length_words * TOKENS_PER_WORD) + 64
+    available = max(256, window - reply_tokens - PROMPT_OVERHEAD_TOKENS)
+    ratio = token_estimator().chars_per_token(model)
+    max_chars = max(1000, int(available * ratio * SAFETY_MARGIN))
+    estimated = token_estimator().estimate(model, text)
+    plan = PromptPlan(window, max_chars, estimated, len(text) <= max_chars)
+    debug_log(f"Summary plan for {model}: ~{estimated} tokens of text, {window} token window, "
+              f"{'single prompt' if plan.single_shot else f'chunks of {max_chars} chars'}")
+    return plan
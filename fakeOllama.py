@@ -0,0 +1,251 @@
+"""Fake Ollama server for offline testing and benchmarking of the AI features.
+
+Serves the parts of the Ollama API that DocuWeave uses (/api/tags,
+/api/generate with streaming and keep_alive, /api/embeddings, /api/show)
+with simulated model load, prompt and token timings.
+
+    python fakeOllama.py [--port 11434] [--load-ms 2000] [--token-ms 20]
+    python fakeOllama.py --bench [--requests 40] [--concurrency 4]
+
+--bench starts the server on a free port and measures time to first token,
+latency and throughput of core.ai_client, with the pooled shared client and
+with a new connection per request.
+"""
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_MODELS = ["llama3.2:latest", "llama3.2:3b", "mistral:latest"]
+EMBEDDING_SIZE = 64
+CONTEXT_LENGTH = 8192
+WORDS = ("the document describes a project plan with several sections covering goals "
+         "risks milestones and results for the team").split()
+
+def parse_keep_alive(value, default=300.0):
+    """Seconds a model stays loaded: numbers are seconds, strings like "5m"/"30s"/"1h"; negative is forever"""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    units = {"s": 1, "m": 60, "h": 3600}
+    text = str(value).strip()
+    try:
+        if text and text[-1] in units:
+            seconds = float(text[:-1]) * units[text[-1]]
+        else:
+            seconds = float(text)
+    except ValueError:
+        return default
+    return float("inf") if seconds < 0 else seconds
+
+def fake_embedding(text):
+    """Deterministic bag-of-words vector, so similar texts get similar embeddings"""
+    vector = [0.0] * EMBEDDING_SIZE
+    for word in text.lower().split():
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        vector[digest[0] % EMBEDDING_SIZE] += 1.0 if digest[1] % 2 else -1.0
+    return vector
+
+class FakeOllama:
+    """Simulated model state shared by all request handlers"""
+
+    def __init__(self, models, load_ms, prompt_ms_per_kchar, token_ms, tokens):
+        self.models = models
+        self.load_ms = load_ms
+        self.prompt_ms_per_kchar = prompt_ms_per_kchar
+        self.token_ms = token_ms
+        self.tokens = tokens
+        self._loaded_until = {}  # model -> monotonic time it is unloaded at
+        self._lock = threading.Lock()
+
+    def load(self, model, keep_alive):
+        """Load the model if needed; returns the load time in seconds"""
+        with self._lock:
+            now = time.monotonic()
+            loaded = self._loaded_until.get(model, 0) > now
+            self._loaded_until[model] = now + parse_keep_alive(keep_alive)
+        if loaded:
+            return 0.0
+        time.sleep(self.load_ms / 1000)
+        return self.load_ms / 1000
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real server
+    # Streamed chunks are small writes; with Nagle's algorithm a reused connection waits
+    # for the client's delayed ACK, which would make connection reuse look slower
+    disable_nagle_algorithm = True
+    fake = None  # Set by make_server
+
+    def log_message(self, format, *args):
+        pass  # Quiet; benchmarks make many requests
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        line = (json.dumps(data) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": name} for name in self.fake.models]})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+        except ValueError:
+            self._send_json({"error": "invalid JSON"}, 400)
+            return
+        model = request.get("model", "")
+        if self.path in ("/api/generate", "/api/embeddings", "/api/show") and model not in self.fake.models:
+            self._send_json({"error": f"model '{model}' not found"}, 404)
+        elif self.path == "/api/generate":
+            self._generate(request)
+        elif self.path == "/api/embeddings":
+            self.fake.load(model, request.get("keep_alive"))
+            self._send_json({"embedding": fake_embedding(request.get("prompt", ""))})
+        elif self.path == "/api/show":
+            self._send_json({"model_info": {"general.architecture": "llama",
+                                            "llama.context_length": CONTEXT_LENGTH}})
+        else:
+            self._send_json({"error": "not found"}, 404)
+
+    def _generate(self, request):
+        started = time.perf_counter()
+        fake = self.fake
+        load_seconds = fake.load(request["model"], request.get("keep_alive"))
+        prompt = request.get("prompt", "")
+        prompt_tokens = max(1, len(prompt) // 4)
+        prompt_seconds = len(prompt) / 1000 * fake.prompt_ms_per_kchar / 1000
+        time.sleep(prompt_seconds)
+        count = fake.tokens if prompt else 0  # An empty prompt only loads the model
+        stats = lambda eval_seconds: {
+            "done": True,
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": int(load_seconds * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_count": count,
+            "eval_duration": int(eval_seconds * 1e9),
+        }
+
+        if request.get("stream", True) is False:
+            time.sleep(count * fake.token_ms / 1000)
+            text = " ".join(random.choice(WORDS) for _ in range(count))
+            self._send_json(dict(stats(count * fake.token_ms / 1000), model=request["model"], response=text))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        eval_started = time.perf_counter()
+        try:
+            for i in range(count):
+                time.sleep(fake.token_ms / 1000)
+                self._send_chunk({"model": request["model"], "response": random.choice(WORDS) + " ",
+                                  "done": False})
+            self._send_chunk(dict(stats(time.perf_counter() - eval_started),
+                                  model=request["model"], response=""))
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # The client cancelled
+
+def make_server(port, fake):
+    Handler.fake = fake
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    return server
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def run_bench(url, model, requests_count, concurrency):
+    """Time requests through core.ai_client, pooled and with a new connection each"""
+    from concurrent.futures import ThreadPoolExecutor
+    from core.ai_client import OllamaClient, get_client
+
+    prompt = "Please summarize: " + " ".join(WORDS) * 20
+
+    def one_request(client, i):
+        started = time.perf_counter()
+        first = []
+        # A distinct prompt each, or the client's scheduler would merge the concurrent requests
+        client.generate(model, f"{prompt} ({i})",
+                        on_token=lambda token: first or first.append(time.perf_counter()))
+        return first[0] - started if first else float("nan"), time.perf_counter() - started
+
+    def new_client():
+        client = OllamaClient(url)
+        client.scheduler.max_concurrent = concurrency
+        return client
+
+    get_client(url).scheduler.max_concurrent = concurrency  # Measure connections, not the request limit
+    for label, client_for in (("pooled session", lambda: get_client(url)),
+                              ("new connection", new_client)):
+        one_request(client_for(), -1)  # Warm up (loads the model)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda i: one_request(client_for(), i), range(requests_count)))
+        elapsed = time.perf_counter() - started
+        ttft = [r[0] * 1000 for r in results]
+        latency = [r[1] * 1000 for r in results]
+        print(f"{label:>15}: {requests_count / elapsed:6.1f} req/s | "
+              f"first token p50 {percentile(ttft, 0.5):6.1f} ms, p95 {percentile(ttft, 0.95):6.1f} ms | "
+              f"latency p50 {percentile(latency, 0.5):7.1f} ms, p95 {percentile(latency, 0.95):7.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for offline AI testing")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--models", default=",".join(DEFAULT_MODELS), help="Comma separated model names")
+    parser.add_argument("--load-ms", type=float, default=2000, help="Simulated model load time")
+    parser.add_argument("--prompt-ms-per-kchar", type=float, default=5, help="Simulated prompt evaluation time")
+    parser.add_argument("--token-ms", type=float, default=20, help="Simulated time per generated token")
+    parser.add_argument("--tokens", type=int, default=60, help="Tokens generated per request")
+    parser.add_argument("--bench", action="store_true", help="Benchmark core.ai_client against the fake server")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per benchmark run")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent benchmark requests")
+    args = parser.parse_args()
+
+    fake = FakeOllama([m.strip() for m in args.models.split(",") if m.strip()], args.load_ms,
+                      args.prompt_ms_per_kchar, args.token_ms, args.tokens)
+    server = make_server(0 if args.bench else args.port, fake)
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    if not args.bench:
+        print(f"\033[92mFake Ollama listening on {url}\033[0m (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        run_bench(url, fake.models[0], args.requests, args.concurrency)
+    except ImportError as e:
+        print(f"\033[91mBenchmark needs the app's requirements: {e}\033[0m")
+        sys.exit(2)
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Import-time audit for app startup.
+
+Runs `python -X importtime -c "import app"`, prints the slowest imports and
+fails (exit code 1) when a module that should be imported lazily is loaded
+at startup, or when the total import time goes over the budget.
+
+    python importAudit.py [--budget-ms 1500] [--top 15]
+
+The same check runs in the test suite (tests/test_import_time.py).
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+DEFAULT_BUDGET_MS = 1500
+
+# Only imported when the feature is first used
+LAZY_MODULES = [
+    "requests",
+    "markdown",
+    "numpy",
+    "PyQt5.QtSvg",
+    "ui.ai_summarize_dialog",
+    "core.summarization",
+    "core.summary_cache",
+    "core.ai_client",
+    "core.ai_scheduler",
+    "core.text_extraction",
+    "core.token_budget",
+    "core.related_index",
+    "ui.batch_summarize_dialog",
+    "ui.related_documents_dialog",
+    "ui.emoji_selector",
+    "ui.image_dialog",
+    "ui.table_dialog",
+    "ui.link_type_dialog",
+    "ui.external_link_dialog",
+    "ui.internal_link_dialog",
+]
+if sys.platform != "win32":
+    LAZY_MODULES.append("colorama")  # Only initialized for the Windows console
+
+def run_importtime(root):
+    """Import app.py with -X importtime and return [(module, self_us, cumulative_us, depth)]"""
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            cwd=root, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "no output"
+        raise RuntimeError(f"Importing app failed: {last_line}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            depth = (len(name) - len(name.lstrip())) // 2
+            entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return entries
+
+def audit(root, budget_ms=DEFAULT_BUDGET_MS):
+    """Run the import audit; returns (entries, total_ms, failures)"""
+    entries = run_importtime(root)
+    imported = {name for name, _, _, _ in entries}
+    # Everything app.py pulls in, without the interpreter's own startup imports
+    total_ms = next((cumulative_us for name, _, cumulative_us, _ in entries if name == "app"),
+                    sum(self_us for _, self_us, _, _ in entries)) / 1000
+
+    failures = []
+    eager = [name for name in LAZY_MODULES if name in imported]
+    if eager:
+        failures.append("imported at startup but should be lazy: " + ", ".join(eager))
+    if total_ms > budget_ms:
+        failures.append(f"total import time {total_ms:.1f} ms is over the {budget_ms:.0f} ms budget")
+    return entries, total_ms, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit DocuWeave's cold import time")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Fail when the total import time exceeds this")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to show")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    try:
+        entries, total_ms, failures = audit(root, args.budget_ms)
+    except RuntimeError as e:
+        print(f"\033[91m{e}\033[0m")
+        sys.exit(2)
+
+    print(f"Slowest imports (cumulative, {len(entries)} modules):")
+    for name, _, cumulative_us, depth in sorted(entries, key=lambda e: -e[2])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {'  ' * depth}{name}")
+    print(f"Total import time: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if failures:
+        for failure in failures:
+            print(f"\033[91mFAIL: {failure}\033[0m")
+        sys.exit(1)
+    print("\033[92mImport audit passed\033[0m")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""Startup import-time budget; see importAudit.py for the command-line report."""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import importAudit
+
+pytest.importorskip("PyQt5.QtWebEngineWidgets")  # app.py cannot be imported without the GUI stack
+
+@pytest.fixture(scope="module")
+def audit_result():
+    budget_ms = float(os.environ.get("IMPORT_BUDGET_MS", importAudit.DEFAULT_BUDGET_MS))
+    entries, total_ms, _ = importAudit.audit(ROOT, budget_ms)
+    return entries, total_ms, budget_ms
+
+def test_lazy_modules_not_imported_at_startup(audit_result):
+    entries, _, _ = audit_result
+    imported = {name for name, _, _, _ in entries}
+    eager = [name for name in importAudit.LAZY_MODULES if name in imported]
+    assert not eager, f"imported at startup but should be lazy: {', '.join(eager)}"
+
+def test_import_time_within_budget(audit_result):
+    _, total_ms, budget_ms = audit_result
+    assert total_ms <= budget_ms, f"total import time {total_ms:.1f} ms is over the {budget_ms:.0f} ms budget"
@@ -1,78 +1,221 @@
-import json
-import requests
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
+import os
+import time
+import threading
+import functools
+from PyQt5.QtWidgets import (QApplication, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, 
                            QTextEdit, QLabel, QComboBox, QLineEdit, QProgressBar,
-                           QMessageBox, QGroupBox, QSpinBox, QWidget)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QFont
+                           QMessageBox, QGroupBox, QSpinBox, QWidget, QCheckBox)
+from PyQt5.QtCore import (Qt, QObject, QRunnable, QThread, QThreadPool, QTimer, QStandardPaths,
+                          pyqtSignal)
+from PyQt5.QtGui import QFont, QTextCursor
+from core.summarization import (summarize_html, map_reduce_summary, split_text,
+                                DEFAULT_WORKERS, MAX_WORKERS, PROMPT_VERSION)
+from core.token_budget import plan_summary
+from core.text_extraction import extract_text
+from core.ai_client import get_client, CancelToken, DEFAULT_OLLAMA_URL, MODEL_LIST_TTL
+from core.summary_cache import SummaryCache, summary_key
+from core.events import content_hash
+
+_summary_cache = None
+
+def summary_cache():
+    """The summary cache shared by the dialog and batch jobs (created on first use)"""
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = SummaryCache(os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "summaries"))
+        QApplication.instance().aboutToQuit.connect(_summary_cache.flush)
+    return _summary_cache
+
+class _BackgroundSignals(QObject):
+    """Delivers the outcome of a background call on the GUI thread"""
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+class _BackgroundTask(QRunnable):
+    def __init__(self, fn, signals):
+        super().__init__()
+        self.fn = fn
+        self.signals = signals
+
+    def run(self):
+        try:
+            value = self.fn()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.succeeded.emit(value)
+
+_background_pool = None
+_shutdown = CancelToken()  # Cancelled when the app quits, so pool threads stop waiting
+_pending_signals = set()  # Kept referenced until their outcome is delivered
+_stopped_workers = set()  # Cancelled summary workers, kept referenced until their thread ends
+
+def run_in_background(fn, on_result, on_error=None):
+    """Run fn() on a pool thread; on_result(value) or on_error(message) is called on the GUI thread.
+
+    For short AI requests (model lists, warm-ups), which would otherwise
+    need a QThread each. The requests themselves wait for the client's
+    scheduler (see core.ai_scheduler), so the pool is kept apart from the
+    global one used for rendering.
+    """
+    global _background_pool
+    if _background_pool is None:
+        _background_pool = QThreadPool()
+        _background_pool.setMaxThreadCount(4)
+        QApplication.instance().aboutToQuit.connect(_shutdown.cancel)
+    signals = _BackgroundSignals()
+    signals.succeeded.connect(on_result)
+    if on_error is not None:
+        signals.failed.connect(on_error)
+    signals.succeeded.connect(lambda _: _pending_signals.discard(signals))
+    signals.failed.connect(lambda _: _pending_signals.discard(signals))
+    _pending_signals.add(signals)
+    _background_pool.start(_BackgroundTask(fn, signals))
+
+def fetch_models(ollama_url, on_models, on_error=None, max_age=MODEL_LIST_TTL):
+    """Call on_models(names) with the server's models; at once if a fresh list is cached"""
+    client = get_client(ollama_url)
+    cached = client.cached_models(max_age)
+    if cached is not None:
+        on_models(cached)
+        return
+    run_in_background(lambda: client.list_models(max_age, cancel=_shutdown), on_models, on_error)
+
+def apply_model_list(combo, models):
+    """Replace a model combo box's items, keeping the current choice when possible"""
+    if not models:
+        return  # Keep the defaults; the name can still be typed in
+    current_text = combo.currentText()
+    combo.clear()
+    combo.addItems(models)
+    
+    # Try to restore previous selection
+    index = combo.findText(current_text)
+    combo.setCurrentIndex(index if index >= 0 else 0)
 
 class OllamaWorker(QThread):
-    """Worker thread for Ollama API calls to avoid blocking the UI"""
+    """Worker thread for Ollama API calls to avoid blocking the UI.
+
+    Long documents are split into sections (see core.summarization) that are
+    summarized by up to `max_workers` concurrent requests, then combined;
+    only the final request streams its tokens to the dialog.
+    """
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
     progress = pyqtSignal(str)
+    partial = pyqtSignal(str)  # New text as tokens arrive
+    first_token = pyqtSignal(float)  # Seconds from sending the request to the first token
+    timings = pyqtSignal(dict)  # Server-reported seconds summed over all requests: load, prompt, generation
     
-    def __init__(self, content, model, ollama_url, summary_type, max_length):
+    def __init__(self, content, model, ollama_url, summary_type, max_length, html=None,
+                 max_workers=DEFAULT_WORKERS):
         super().__init__()
         self.content = content
+        self.html = html
         self.model = model
-        self.ollama_url = ollama_url
+        self.client = get_client(ollama_url)
         self.summary_type = summary_type
         self.max_length = max_length
+        self.max_workers = max_workers
+        self._cancel = CancelToken()
+        self._num_ctx = None  # Context window the prompts are planned for
+        self._timings = {"load": 0.0, "prompt": 0.0, "generation": 0.0, "tokens": 0, "requests": 0}
+        self._timings_lock = threading.Lock()
+        
+    def cancel(self):
+        """Stop generating; closing the responses aborts the blocking reads at once"""
+        self._cancel.cancel()
+        
+    def _add_timings(self, message):
+        with self._timings_lock:
+            self._timings["load"] += message.get("load_duration", 0) / 1e9
+            self._timings["prompt"] += message.get("prompt_eval_duration", 0) / 1e9
+            self._timings["generation"] += message.get("eval_duration", 0) / 1e9
+            self._timings["tokens"] += message.get("eval_count", 0)
+            self._timings["requests"] += 1
+        
+    def _generate(self, prompt, final):
+        """Send one prompt and return the reply; the final reply is streamed to the dialog"""
+        if not final:
+            return self.client.generate(self.model, prompt, cancel=self._cancel,
+                                        on_done=self._add_timings, num_ctx=self._num_ctx)
+        started = time.perf_counter()
+        received = []
+        
+        def on_token(token):
+            if not received:
+                self.first_token.emit(time.perf_counter() - started)
+            received.append(token)
+            self.partial.emit(token)
+        return self.client.generate(self.model, prompt, on_token=on_token, cancel=self._cancel,
+                                    on_done=self._add_timings, num_ctx=self._num_ctx)
         
     def run(self):
+        import requests  # Imported on first use; it is slow to import
         try:
-            # Create appropriate prompt based on summary type
-            prompts = {
-                "brief": f"Please provide a brief summary of the following text in {self.max_length} words or less:\n\n{self.content}",
-                "detailed": f"Please provide a detailed summary of the following text, capturing key points and important details in approximately {self.max_length} words:\n\n{self.content}",
-                "bullet_points": f"Please summarize the following text as bullet points, highlighting the main ideas in {self.max_length} words or less:\n\n{self.content}",
-                "key_insights": f"Please extract the key insights and takeaways from the following text in {self.max_length} words or less:\n\n{self.content}"
-            }
-            
-            prompt = prompts.get(self.summary_type, prompts["brief"])
-            
             self.progress.emit("Connecting to Ollama...")
+            # Fit the prompts to the model's context window; short documents go in one prompt
+            text = extract_text(self.html).text if self.html else self.content
+            window = self.client.context_window(self.model, cancel=self._cancel)
+            plan = plan_summary(self.model, text, window, self.max_length)
+            self._num_ctx = plan.context_window
+            if plan.single_shot:
+                self.progress.emit(f"Summarizing in one prompt (~{plan.estimated_tokens} tokens)...")
+            else:
+                self.progress.emit(f"Long document (~{plan.estimated_tokens} tokens): "
+                                   "summarizing in sections...")
             
-            # Make request to Ollama API
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=60
-            )
+            if self.html:
+                summary = summarize_html(
+                    self.html, self._generate, self.summary_type, self.max_length,
+                    workers=self.max_workers, max_chars=plan.max_chunk_chars,
+                    on_progress=self.progress.emit,
+                    is_cancelled=lambda: self._cancel.cancelled)
+            else:
+                summary = map_reduce_summary(
+                    split_text(self.content, plan.max_chunk_chars), self._generate,
+                    self.summary_type, self.max_length,
+                    workers=self.max_workers, max_chars=plan.max_chunk_chars,
+                    on_progress=self.progress.emit,
+                    is_cancelled=lambda: self._cancel.cancelled)
             
-            if response.status_code == 200:
-                result = response.json()
-                summary = result.get('response', 'No summary generated.')
+            if not self._cancel.cancelled:
+                self.timings.emit(dict(self._timings))
                 self.finished.emit(summary)
-            else:
-                self.error.emit(f"HTTP Error {response.status_code}: {response.text}")
                 
         except requests.exceptions.ConnectionError:
-            self.error.emit("Could not connect to Ollama. Please make sure Ollama is running and accessible.")
+            if not self._cancel.cancelled:
+                self.error.emit("Could not connect to Ollama. Please make sure Ollama is running and accessible.")
         except requests.exceptions.Timeout:
-            self.error.emit("Request timed out. The model might be taking too long to respond.")
+            if not self._cancel.cancelled:
+                self.error.emit("Request timed out. The model might be taking too long to respond.")
         except Exception as e:
-            self.error.emit(f"An error occurred: {str(e)}")
+            if not self._cancel.cancelled:
+                self.error.emit(f"An error occurred: {str(e)}")
 
 class AISummarizeDialog(QDialog):
-    def __init__(self, content, parent=None):
+    def __init__(self, content, parent=None, html=None):
         super().__init__(parent)
         self.content = content
+        self.html = html  # Original markup, used to split long documents into sections
         self.worker = None
         self.summary_result = ""
+        self._loading_model = None  # Model being pre-loaded
+        self._content_hash = content_hash(html if html is not None else content)
+        self._pending_key = None  # Cache key of the summary being generated
+        self._shown_cached_key = None  # Generating again for this key bypasses the cache
         
         # Use the same pattern as other dialogs
         self.setObjectName("aiSummarizeDialog")
         self.setWindowTitle("AI Summarization")
-        self.setFixedSize(700, 600)
+        self.setFixedSize(700, 680)
         self.setWindowFlags(Qt.Dialog | Qt.WindowTitleHint)
         
         self.init_ui()
+        self._load_models_quietly()
+        if self.client().warm_up_on_open:
+            self._warm_up_timer.start()
         
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -95,7 +238,7 @@ class AISummarizeDialog(QDialog):
         url_label.setFixedWidth(120)
         url_layout.addWidget(url_label)
         
-        self.url_input = QLineEdit("http://localhost:11434")
+        self.url_input = QLineEdit(DEFAULT_OLLAMA_URL)
         self.url_input.setPlaceholderText("Enter Ollama server URL...")
         self.url_input.setStyleSheet("font-size: 14px;")
         self.url_input.setFixedHeight(35)
@@ -127,11 +270,11 @@ class AISummarizeDialog(QDialog):
         model_layout.addWidget(self.model_combo)
         
         # Refresh button
-        refresh_btn = QPushButton("Refresh Models")
-        refresh_btn.setStyleSheet("font-size: 14px;")
-        refresh_btn.setFixedHeight(35)
-        refresh_btn.clicked.connect(self.refresh_models)
-        model_layout.addWidget(refresh_btn)
+        self.refresh_btn = QPushButton("Refresh Models")
+        self.refresh_btn.setStyleSheet("font-size: 14px;")
+        self.refresh_btn.setFixedHeight(35)
+        self.refresh_btn.clicked.connect(self.refresh_models)
+        model_layout.addWidget(self.refresh_btn)
         
         config_layout.addLayout(model_layout)
         
@@ -171,8 +314,62 @@ class AISummarizeDialog(QDialog):
         options_layout.addWidget(self.length_spin)
         
         config_layout.addLayout(options_layout)
+        
+        # Concurrent requests when a long document is summarized in sections
+        parallel_layout = QHBoxLayout()
+        parallel_label = QLabel("Parallel:")
+        parallel_label.setStyleSheet("font-size: 16px;")
+        parallel_label.setFixedWidth(120)
+        parallel_layout.addWidget(parallel_label)
+        
+        self.parallel_spin = QSpinBox()
+        self.parallel_spin.setStyleSheet("font-size: 14px;")
+        self.parallel_spin.setFixedHeight(35)
+        self.parallel_spin.setRange(1, MAX_WORKERS)
+        self.parallel_spin.setValue(DEFAULT_WORKERS)
+        self.parallel_spin.setSuffix(" requests")
+        self.parallel_spin.setToolTip("How many sections of a long document are summarized at once")
+        parallel_layout.addWidget(self.parallel_spin)
+        parallel_layout.addStretch()
+        
+        # How long the server keeps the model loaded after each request
+        keep_label = QLabel("Keep Loaded:")
+        keep_label.setStyleSheet("font-size: 16px;")
+        parallel_layout.addWidget(keep_label)
+        
+        client = self.client()
+        self.keep_alive_spin = QSpinBox()
+        self.keep_alive_spin.setStyleSheet("font-size: 14px;")
+        self.keep_alive_spin.setFixedHeight(35)
+        self.keep_alive_spin.setRange(0, 240)
+        self.keep_alive_spin.setValue(client.keep_alive_minutes)
+        self.keep_alive_spin.setSuffix(" min")
+        self.keep_alive_spin.setToolTip("How long Ollama keeps the model in memory after each request")
+        self.keep_alive_spin.valueChanged.connect(self._on_keep_alive_changed)
+        parallel_layout.addWidget(self.keep_alive_spin)
+        
+        self.warm_up_check = QCheckBox("Pre-load model")
+        self.warm_up_check.setStyleSheet("font-size: 14px;")
+        self.warm_up_check.setChecked(client.warm_up_on_open)
+        self.warm_up_check.setToolTip("Load the selected model as soon as the dialog opens")
+        self.warm_up_check.toggled.connect(self._on_warm_up_toggled)
+        parallel_layout.addWidget(self.warm_up_check)
+        
+        config_layout.addLayout(parallel_layout)
+        
+        # Model load state, reported apart from generation time
+        self.model_status_label = QLabel("")
+        self.model_status_label.setStyleSheet("font-size: 13px; color: gray;")
+        config_layout.addWidget(self.model_status_label)
         layout.addLayout(config_layout)
         
+        # Pre-load once the model choice settles (the list can change a few times while loading)
+        self._warm_up_timer = QTimer(self)
+        self._warm_up_timer.setSingleShot(True)
+        self._warm_up_timer.setInterval(400)
+        self._warm_up_timer.timeout.connect(self.warm_up_model)
+        self.model_combo.currentIndexChanged.connect(self._on_model_changed)
+        
         # Progress bar
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -187,9 +384,20 @@ class AISummarizeDialog(QDialog):
         layout.addWidget(self.progress_label)
         
         # Result area
+        result_header = QHBoxLayout()
         result_label = QLabel("Generated Summary:")
         result_label.setStyleSheet("font-size: 16px; margin-top: 10px;")
-        layout.addWidget(result_label)
+        result_header.addWidget(result_label)
+        result_header.addStretch()
+        
+        # Shown when the summary came from the cache instead of the model
+        self.cached_label = QLabel("Cached")
+        self.cached_label.setStyleSheet("font-size: 13px; margin-top: 10px; padding: 2px 8px; "
+                                        "color: #4CAF50; border: 1px solid #4CAF50; border-radius: 4px;")
+        self.cached_label.setToolTip("Loaded from the summary cache; Regenerate runs the model again")
+        self.cached_label.setVisible(False)
+        result_header.addWidget(self.cached_label)
+        layout.addLayout(result_header)
         
         self.result_text = QTextEdit()
         self.result_text.setReadOnly(True)
@@ -198,6 +406,12 @@ class AISummarizeDialog(QDialog):
         self.result_text.setMinimumHeight(200)
         layout.addWidget(self.result_text)
         
+        # Where the time went, from the server's own measurements
+        self.timing_label = QLabel("")
+        self.timing_label.setStyleSheet("font-size: 13px; color: gray;")
+        self.timing_label.setVisible(False)
+        layout.addWidget(self.timing_label)
+        
         # Add stretch to push buttons to bottom
         layout.addStretch()
         
@@ -217,45 +431,85 @@ class AISummarizeDialog(QDialog):
         self.insert_btn.setEnabled(False)
         button_layout.addWidget(self.insert_btn)
         
-        cancel_btn = QPushButton("Cancel")
-        cancel_btn.setStyleSheet("font-size: 14px;")
-        cancel_btn.setFixedHeight(35)
-        cancel_btn.clicked.connect(self.reject)
-        button_layout.addWidget(cancel_btn)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setStyleSheet("font-size: 14px;")
+        self.cancel_btn.setFixedHeight(35)
+        self.cancel_btn.clicked.connect(self.on_cancel_clicked)
+        button_layout.addWidget(self.cancel_btn)
         
         # Set margins for button layout
         button_layout.setContentsMargins(0, 20, 0, 0)
         layout.addLayout(button_layout)
         
+    def client(self):
+        return get_client(self.url_input.text().strip() or DEFAULT_OLLAMA_URL)
+        
+    def _on_keep_alive_changed(self, minutes):
+        self.client().keep_alive_minutes = minutes
+        
+    def _on_warm_up_toggled(self, checked):
+        self.client().warm_up_on_open = checked
+        if checked:
+            self._warm_up_timer.start()
+        
+    def _on_model_changed(self):
+        if self.warm_up_check.isChecked():
+            self._warm_up_timer.start()
+        
+    def warm_up_model(self):
+        """Load the selected model in the background unless it should still be loaded"""
+        url = self.url_input.text().strip()
+        model = self.model_combo.currentText().strip()
+        if not url or not model:
+            return
+        if self.client().is_resident(model):
+            self.model_status_label.setText(f"{model} is loaded")
+            return
+        self.model_status_label.setText(f"Loading {model}...")
+        self._loading_model = model
+        client = self.client()
+        run_in_background(lambda: (model, client.warm_up(model, cancel=_shutdown)),
+                          self._on_model_loaded, self._on_warm_up_failed)
+        
+    def _on_model_loaded(self, result):
+        model, seconds = result
+        if model != self.model_combo.currentText().strip():
+            return  # The choice changed meanwhile
+        if seconds > 0:
+            self.model_status_label.setText(f"{model} loaded in {seconds:.1f} s")
+        else:
+            self.model_status_label.setText(f"{model} was already loaded")
+        
+    def _on_warm_up_failed(self, message):
+        model = self._loading_model
+        if model == self.model_combo.currentText().strip():
+            self.model_status_label.setText(f"Could not pre-load {model}: {message}")
+        
     def refresh_models(self):
-        """Refresh available models from Ollama"""
-        try:
-            url = self.url_input.text().strip()
-            if not url:
-                return
-                
-            response = requests.get(f"{url}/api/tags", timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                models = [model['name'] for model in data.get('models', [])]
-                
-                current_text = self.model_combo.currentText()
-                self.model_combo.clear()
-                self.model_combo.addItems(models)
-                
-                # Try to restore previous selection
-                index = self.model_combo.findText(current_text)
-                if index >= 0:
-                    self.model_combo.setCurrentIndex(index)
-                elif models:
-                    self.model_combo.setCurrentIndex(0)
-                    
-                QMessageBox.information(self, "Success", f"Found {len(models)} models")
-            else:
-                QMessageBox.warning(self, "Error", f"Failed to fetch models: {response.status_code}")
-                
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Could not connect to Ollama: {str(e)}")
+        """Refresh available models from Ollama, without blocking the UI"""
+        url = self.url_input.text().strip()
+        if not url:
+            return
+        self.refresh_btn.setEnabled(False)
+        self.refresh_btn.setText("Refreshing...")
+        fetch_models(url, self._on_models_refreshed, self._on_models_failed, max_age=0)
+        
+    def _load_models_quietly(self):
+        """Fill the model list when the dialog opens (cached, or fetched in the background)"""
+        url = self.url_input.text().strip()
+        if url:
+            fetch_models(url, functools.partial(apply_model_list, self.model_combo))
+        
+    def _on_models_refreshed(self, models):
+        self.refresh_btn.setEnabled(True)
+        self.refresh_btn.setText("Refresh Models")
+        apply_model_list(self.model_combo, models)
+        QMessageBox.information(self, "Success", f"Found {len(models)} models")
+        
+    def _on_models_failed(self, message):
+        self.refresh_btn.setEnabled(True)
+        self.refresh_btn.setText("Refresh Models")
+        QMessageBox.warning(self, "Error", f"Could not connect to Ollama: {message}")
     
     def generate_summary(self):
         """Generate AI summary"""
@@ -280,6 +534,18 @@ class AISummarizeDialog(QDialog):
         summary_type = type_mapping[self.type_combo.currentText()]
         max_length = self.length_spin.value()
         
+        # An unchanged document with the same settings is answered from the cache;
+        # asking again right after a cached answer runs the model
+        key = summary_key(self._content_hash, model, summary_type, max_length, PROMPT_VERSION)
+        if key != self._shown_cached_key:
+            cached = summary_cache().get(key)
+            if cached is not None:
+                self._show_cached(key, cached)
+                return
+        self._shown_cached_key = None
+        self._pending_key = key
+        self.cached_label.setVisible(False)
+        
         # Disable generate button and show progress
         self.generate_btn.setEnabled(False)
         self.generate_btn.setText("Generating...")
@@ -287,29 +553,101 @@ class AISummarizeDialog(QDialog):
         self.progress_bar.setRange(0, 0)  # Indeterminate progress
         self.progress_label.setVisible(True)
         self.progress_label.setText("Generating summary...")
+        self.result_text.clear()
+        self.timing_label.setVisible(False)
+        self.insert_btn.setEnabled(False)
+        self.cancel_btn.setText("Stop")
         
         # Start worker thread
-        self.worker = OllamaWorker(self.content, model, url, summary_type, max_length)
+        self.worker = OllamaWorker(self.content, model, url, summary_type, max_length,
+                                   html=self.html, max_workers=self.parallel_spin.value())
         self.worker.finished.connect(self.on_summary_finished)
         self.worker.error.connect(self.on_summary_error)
         self.worker.progress.connect(self.on_progress_update)
+        self.worker.partial.connect(self.on_partial_text)
+        self.worker.first_token.connect(self.on_first_token)
+        self.worker.timings.connect(self.on_timings)
         self.worker.start()
         
     def on_progress_update(self, message):
         """Update progress label"""
         self.progress_label.setText(message)
         
+    def on_first_token(self, seconds):
+        """Show time to first token; the text now streams in"""
+        self.progress_label.setText(f"First token after {seconds:.1f} s")
+        
+    def on_partial_text(self, text):
+        """Append streamed tokens to the result"""
+        cursor = self.result_text.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+        self.result_text.setTextCursor(cursor)
+        
+    def on_cancel_clicked(self):
+        """Stop a running generation, or close the dialog"""
+        if self.worker is not None:
+            self._stop_worker()
+            self._pending_key = None  # A partial summary is not cached
+            # Keep what was streamed so far; it can still be inserted
+            self.summary_result = self.result_text.toPlainText()
+            self._reset_controls()
+            self.insert_btn.setEnabled(bool(self.summary_result.strip()))
+        else:
+            self.reject()
+        
+    def _stop_worker(self):
+        """Abort the worker's requests and let its thread end on its own, without waiting"""
+        worker, self.worker = self.worker, None
+        if worker is None:
+            return
+        for signal in (worker.finished, worker.error, worker.progress, worker.partial,
+                       worker.first_token, worker.timings):
+            signal.disconnect()
+        worker.cancel()
+        # Requests waiting for the scheduler return at once and open streams are closed,
+        # so the thread ends promptly; keep it referenced until it has
+        _stopped_workers.difference_update([w for w in _stopped_workers if w.isFinished()])
+        _stopped_workers.add(worker)
+        
+    def _reset_controls(self):
+        self.generate_btn.setEnabled(True)
+        self.generate_btn.setText("Generate Summary")
+        self.cancel_btn.setText("Cancel")
+        self.progress_bar.setVisible(False)
+        self.progress_label.setVisible(False)
+        
+    def _show_cached(self, key, summary):
+        self._shown_cached_key = key
+        self.summary_result = summary
+        self.result_text.setPlainText(summary)
+        self.cached_label.setVisible(True)
+        self.generate_btn.setText("Regenerate")
+        self.insert_btn.setEnabled(True)
+        
+    def on_timings(self, timings):
+        """Show model load time apart from prompt and generation time"""
+        rate = timings["tokens"] / timings["generation"] if timings["generation"] > 0 else 0
+        text = (f"Model load {timings['load']:.1f} s · prompt {timings['prompt']:.1f} s · "
+                f"generation {timings['generation']:.1f} s ({rate:.1f} tokens/s)")
+        if timings["requests"] > 1:
+            text += f" · {timings['requests']} requests"
+        self.timing_label.setText(text)
+        self.timing_label.setVisible(True)
+        
     def on_summary_finished(self, summary):
         """Handle successful summary generation"""
+        if not summary.strip():
+            summary = "No summary generated."
+        elif self._pending_key is not None:
+            summary_cache().put(self._pending_key, summary)
+        self._pending_key = None
         self.summary_result = summary
         self.result_text.setPlainText(summary)
         
         # Re-enable controls
-        self.generate_btn.setEnabled(True)
-        self.generate_btn.setText("Generate Summary")
+        self._reset_controls()
         self.insert_btn.setEnabled(True)
-        self.progress_bar.setVisible(False)
-        self.progress_label.setVisible(False)
         
         # Clean up worker
         if self.worker:
@@ -318,14 +656,12 @@ class AISummarizeDialog(QDialog):
     
     def on_summary_error(self, error_message):
         """Handle summary generation error"""
+        self._pending_key = None
         QMessageBox.critical(self, "Error", 
                            f"Failed to generate summary:\n\n{error_message}")
         
         # Re-enable controls
-        self.generate_btn.setEnabled(True)
-        self.generate_btn.setText("Generate Summary")
-        self.progress_bar.setVisible(False)
-        self.progress_label.setVisible(False)
+        self._reset_controls()
         
         # Clean up worker
         if self.worker:
@@ -336,9 +672,12 @@ class AISummarizeDialog(QDialog):
         """Get the generated summary"""
         return self.summary_result
         
+    def done(self, result):
+        """Abort any running generation however the dialog is closed"""
+        self._stop_worker()
+        super().done(result)
+        
     def closeEvent(self, event):
         """Handle dialog close"""
-        if self.worker and self.worker.isRunning():
-            self.worker.quit()
-            self.worker.wait()
+        self._stop_worker()
         event.accept()
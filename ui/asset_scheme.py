@@ -0,0 +1,93 @@
+import os
+import mimetypes
+from PyQt5.QtCore import QBuffer, QByteArray, QFile, QIODevice
+from PyQt5.QtWebEngineCore import (QWebEngineUrlScheme, QWebEngineUrlSchemeHandler,
+                                   QWebEngineUrlRequestJob)
+from ui.script_registry import ASSETS_DIR
+
+ASSET_SCHEME = b"dwasset"
+ASSET_URL_PREFIX = "dwasset:///"
+
+# Assets served from Qt's own resources rather than ui/assets
+QT_RESOURCE_ASSETS = {
+    "qwebchannel.js": ":/qtwebchannel/qwebchannel.js",
+}
+
+MIME_TYPES = {
+    ".js": b"application/javascript",
+    ".css": b"text/css",
+    ".svg": b"image/svg+xml",
+    ".html": b"text/html",
+    ".woff2": b"font/woff2",
+}
+
+def register_asset_scheme():
+    """Register the dwasset:// scheme; must run before QApplication is created"""
+    scheme = QWebEngineUrlScheme(ASSET_SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Path)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme |
+                    QWebEngineUrlScheme.LocalAccessAllowed |
+                    QWebEngineUrlScheme.CorsEnabled)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+class AssetSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Serve editor assets from memory.
+
+    Every file under ui/assets plus qwebchannel.js is read once, on first
+    use, so page loads never touch the network or the disk afterwards.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._assets = None
+
+    def _load_assets(self):
+        assets = {}
+        for root, dirs, files in os.walk(ASSETS_DIR):
+            for name in files:
+                file_path = os.path.join(root, name)
+                rel_path = os.path.relpath(file_path, ASSETS_DIR).replace(os.sep, "/")
+                with open(file_path, "rb") as f:
+                    assets[rel_path] = f.read()
+        for name, resource_path in QT_RESOURCE_ASSETS.items():
+            resource = QFile(resource_path)
+            if resource.open(QIODevice.ReadOnly):
+                assets[name] = bytes(resource.readAll())
+                resource.close()
+            else:
+                print(f"Warning: Qt resource not found: {resource_path}")
+        return assets
+
+    def get_asset(self, path):
+        """Return the cached bytes for an asset path, or None"""
+        if self._assets is None:
+            self._assets = self._load_assets()
+        return self._assets.get(path.lstrip("/"))
+
+    def requestStarted(self, job):
+        path = job.requestUrl().path()
+        data = self.get_asset(path)
+        if data is None:
+            print(f"Asset not found: {path}")
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        ext = os.path.splitext(path)[1].lower()
+        mime = MIME_TYPES.get(ext)
+        if mime is None:
+            mime = (mimetypes.guess_type(path)[0] or "application/octet-stream").encode()
+        # The buffer is owned by the job and freed with it
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(mime, buffer)
+
+_handler = None
+
+def install_asset_handler(profile):
+    """Install the shared asset handler on a web engine profile once"""
+    global _handler
+    if _handler is None:
+        _handler = AssetSchemeHandler()
+    if profile.urlSchemeHandler(ASSET_SCHEME) is None:
+        profile.installUrlSchemeHandler(ASSET_SCHEME, _handler)
+    return _handler
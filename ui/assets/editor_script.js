@@ -2,6 +2,9 @@
 
 function attachImageHandlers() {
     var editor = document.getElementById('editor');
+    // Injected once per page load; never attach the click handler twice
+    if (!editor || editor.__imageHandlersAttached) return;
+    editor.__imageHandlersAttached = true;
     editor.addEventListener('click', function(e) {
         // Remove 'selected' from all images
         var imageWrappers = editor.querySelectorAll('.draggable-image');
@@ -15,9 +18,11 @@ function attachImageHandlers() {
     });
 }
 
-// Call on DOM load
-document.addEventListener("DOMContentLoaded", function(){
+// Call on DOM load (the script may be injected after DOMContentLoaded has fired)
+if (document.readyState === "loading") {
+    document.addEventListener("DOMContentLoaded", attachImageHandlers);
+} else {
     attachImageHandlers();
-});
+}
 
 // ...existing JS code...
@@ -0,0 +1,144 @@
+// Chunked (virtualized) editing for very large documents.
+// The document is split into chunks of top-level blocks on the Python side.
+// Only chunks near the viewport are mounted into #editor; the others are
+// empty placeholders sized to their last known height. Edits mark their
+// chunk dirty so saving serializes only the chunks that changed.
+
+var DocuWeaveChunks = DocuWeaveChunks || {
+    store: [],        // HTML of every chunk (stale for mounted, dirty chunks)
+    heights: [],      // Last measured height of every chunk in px
+    mounted: {},      // index -> true for chunks currently in the DOM
+    dirty: {},        // index -> true for chunks edited since the last collect
+    observer: null,
+    mutations: null,
+    active: false
+};
+
+function initChunkedEditor(count) {
+    var ed = document.getElementById('editor');
+    var state = DocuWeaveChunks;
+    state.store = new Array(count);
+    state.heights = new Array(count);
+    state.mounted = {};
+    state.dirty = {};
+    state.active = true;
+    if (state.observer) state.observer.disconnect();
+    if (state.mutations) state.mutations.disconnect();
+
+    ed.innerHTML = '';
+    var fragment = document.createDocumentFragment();
+    for (var i = 0; i < count; i++) {
+        var holder = document.createElement('div');
+        holder.className = 'dw-chunk';
+        holder.dataset.chunk = i;
+        holder.style.minHeight = '200px';
+        fragment.appendChild(holder);
+    }
+    ed.appendChild(fragment);
+
+    // Mount chunks within two viewport heights of the visible area
+    state.observer = new IntersectionObserver(function(entries) {
+        entries.forEach(function(entry) {
+            var index = parseInt(entry.target.dataset.chunk, 10);
+            if (entry.isIntersecting) mountChunk(index, entry.target);
+            else unmountChunk(index, entry.target);
+        });
+    }, { root: null, rootMargin: '200% 0px' });
+
+    state.mutations = new MutationObserver(markDirtyChunks);
+    state.mutations.observe(ed, { childList: true, subtree: true, characterData: true, attributes: true });
+}
+
+function loadChunks(start, chunks) {
+    var state = DocuWeaveChunks;
+    var holders = document.querySelectorAll('#editor > .dw-chunk');
+    for (var i = 0; i < chunks.length; i++) {
+        var index = start + i;
+        state.store[index] = chunks[i];
+        // Rough placeholder height until the chunk is measured
+        state.heights[index] = Math.max(50, Math.round(chunks[i].length / 20));
+        var holder = holders[index];
+        if (holder) {
+            holder.style.minHeight = state.heights[index] + 'px';
+            state.observer.observe(holder);
+        }
+    }
+}
+
+function markDirtyChunks(records) {
+    var state = DocuWeaveChunks;
+    records.forEach(function(record) {
+        var node = record.target.nodeType === 1 ? record.target : record.target.parentNode;
+        var holder = node && node.closest ? node.closest('.dw-chunk') : null;
+        if (holder && state.mounted[holder.dataset.chunk]) {
+            state.dirty[holder.dataset.chunk] = true;
+        }
+    });
+}
+
+function mountChunk(index, holder) {
+    var state = DocuWeaveChunks;
+    if (state.mounted[index] || state.store[index] === undefined) return;
+    state.mutations.takeRecords();  // Mounting is not an edit
+    holder.innerHTML = state.store[index];
+    holder.style.minHeight = '';
+    state.mounted[index] = true;
+    state.mutations.takeRecords();
+}
+
+function unmountChunk(index, holder) {
+    var state = DocuWeaveChunks;
+    if (!state.mounted[index]) return;
+    // Do not unmount the chunk holding the caret or selection
+    var sel = window.getSelection();
+    if (sel.rangeCount && holder.contains(sel.anchorNode)) return;
+    // Pick up edits still queued in the observer before serializing
+    markDirtyChunks(state.mutations.takeRecords());
+    if (state.dirty[index]) state.store[index] = holder.innerHTML;
+    state.heights[index] = holder.offsetHeight;
+    state.mutations.takeRecords();
+    holder.style.minHeight = state.heights[index] + 'px';
+    holder.innerHTML = '';
+    delete state.mounted[index];
+    state.mutations.takeRecords();
+}
+
+function collectDirtyChunks() {
+    // Returns {index: html} for chunks edited since the last call, or null
+    // when an edit merged or removed chunk containers and the chunk layout
+    // no longer matches the Python side.
+    var state = DocuWeaveChunks;
+    var holders = document.querySelectorAll('#editor > .dw-chunk');
+    if (holders.length !== state.store.length ||
+        document.getElementById('editor').children.length !== holders.length) {
+        return null;
+    }
+    markDirtyChunks(state.mutations.takeRecords());
+    var changes = {};
+    Object.keys(state.dirty).forEach(function(index) {
+        var holder = holders[index];
+        if (state.mounted[index]) state.store[index] = holder.innerHTML;
+        changes[index] = state.store[index];
+    });
+    state.dirty = {};
+    return changes;
+}
+
+function serializeChunkedEditor() {
+    // Full content in document order, used when the chunk layout was broken
+    var state = DocuWeaveChunks;
+    var parts = [];
+    var wrapper = document.createElement('div');
+    Array.prototype.forEach.call(document.getElementById('editor').childNodes, function(node) {
+        if (node.nodeType === 1 && node.classList.contains('dw-chunk')) {
+            var index = node.dataset.chunk;
+            parts.push(state.mounted[index] ? node.innerHTML : (state.store[index] || ''));
+        } else {
+            // Serialize stray nodes (e.g. text left by a cross-chunk edit) with escaping
+            wrapper.innerHTML = '';
+            wrapper.appendChild(node.cloneNode(true));
+            parts.push(wrapper.innerHTML);
+        }
+    });
+    return parts.join('');
+}
@@ -1,10 +1,14 @@
-(function() {
-    console.log("Enabling table editing...");
+function enableTableEditing() {
     var ed = document.getElementById('editor');
     if (!ed) {
         console.error("Editor element not found!");
         return;
     }
+    // Handlers are delegated on the editor, so one registration per page covers
+    // tables inserted later as well
+    if (ed.__tableEditingEnabled) return;
+    ed.__tableEditingEnabled = true;
+    console.log("Enabling table editing...");
     var removalTimer = null;
     function removeHandles() {
         document.querySelectorAll('.table-handle-btn-container').forEach(container => container.remove());
@@ -226,4 +230,6 @@
     }
     ed.addEventListener('mouseover', handleMouseOver);
     console.log("Table editing enabled!");
-})();
+}
+
+enableTableEditing();
@@ -0,0 +1,504 @@
+import os
+import json
+import time
+import queue
+import threading
+from functools import partial
+from PyQt5.QtWidgets import (QApplication, QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                             QComboBox, QLineEdit, QProgressBar, QSpinBox, QMessageBox)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from core.ai_client import get_client, CancelToken, DEFAULT_OLLAMA_URL
+from core.ai_scheduler import BACKGROUND
+from core.summarization import summarize_html, DEFAULT_WORKERS, MAX_WORKERS, PROMPT_VERSION
+from core.summary_cache import summary_key
+from core.events import content_hash
+from core.text_extraction import extract_text
+from core.token_budget import plan_summary
+from ui.ai_summarize_dialog import summary_cache, fetch_models, apply_model_list
+
+CHECKPOINT_FILE = ".summary_job.json"  # In the project's content folder
+CHECKPOINT_INTERVAL = 5  # Seconds between checkpoint writes while the job runs
+QUEUE_SIZE_PER_WORKER = 2  # Documents read ahead of the workers
+MIN_TEXT_LENGTH = 50  # Shorter documents are skipped, as in the single-document dialog
+SUMMARY_METADATA_KEY = "summary"
+
+SUMMARY_TYPES = [
+    ("Brief Summary", "brief"),
+    ("Detailed Summary", "detailed"),
+    ("Bullet Points", "bullet_points"),
+    ("Key Insights", "key_insights"),
+]
+
+def checkpoint_path(project):
+    """Where a project's batch summary checkpoint lives, or None for an unsaved project"""
+    if not project.project_path:
+        return None
+    return os.path.join(os.path.splitext(project.project_path)[0], CHECKPOINT_FILE)
+
+def read_checkpoint(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError, TypeError):
+        return None
+
+class BatchSummaryJob(QThread):
+    """Summarizes every document under a path, resumably.
+
+    run() reads documents into a bounded queue that `workers` threads take
+    from, so only a few documents are held in memory at a time. Finished
+    paths are checkpointed to disk after each document; a job started again
+    with the same root and settings skips them. Summaries come back through
+    item_done and are stored by the caller, on the GUI thread.
+    """
+    item_done = pyqtSignal(str, dict)  # path, summary metadata
+    item_failed = pyqtSignal(str, str)  # path, error message
+    progress = pyqtSignal(int, int, float)  # finished, total, documents per minute
+
+    def __init__(self, project, root_path, model, ollama_url, summary_type, max_length,
+                 workers=DEFAULT_WORKERS):
+        super().__init__()
+        self.project = project
+        self.root_path = root_path
+        self.model = model
+        self.client = get_client(ollama_url)
+        self.cache = summary_cache()  # Created here, on the GUI thread
+        self.summary_type = summary_type
+        self.max_length = max_length
+        self.workers = min(workers, self.client.scheduler.background_slots)  # More would only queue
+        self.paths = project.get_subtree_paths(root_path)
+        self.settings = {"model": model, "type": summary_type, "max_length": max_length,
+                         "prompt_version": PROMPT_VERSION}
+        self.checkpoint_path = checkpoint_path(project)
+
+        self._done = set()
+        checkpoint = read_checkpoint(self.checkpoint_path) if self.checkpoint_path else None
+        if checkpoint and checkpoint.get("root") == root_path and checkpoint.get("settings") == self.settings:
+            self._done = set(checkpoint.get("done", [])) & set(self.paths)
+        self.resumed_count = len(self._done)
+
+        self._queue = queue.Queue(maxsize=max(1, self.workers) * QUEUE_SIZE_PER_WORKER)
+        self._cancel = CancelToken()
+        self._discard_checkpoint = False
+        self._running = threading.Event()  # Cleared while paused
+        self._running.set()
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()  # Serializes checkpoint file writes
+        self._checkpoint_at = time.monotonic()
+        self._finished_this_run = 0
+        self.failed_count = 0
+        self._active_seconds = 0.0
+        self._active_since = None
+
+    # --- Control (GUI thread) ---
+
+    def pause(self):
+        """Finish the documents in progress, then wait"""
+        with self._lock:
+            if self._active_since is not None:
+                self._active_seconds += time.perf_counter() - self._active_since
+                self._active_since = None
+        self._running.clear()
+
+    def resume(self):
+        with self._lock:
+            if self._active_since is None:
+                self._active_since = time.perf_counter()
+        self._running.set()
+
+    def is_paused(self):
+        return not self._running.is_set()
+
+    def stop(self, discard_checkpoint=False):
+        """Abort the job; unless discarded, the checkpoint lets a later run resume"""
+        self._discard_checkpoint = discard_checkpoint
+        self._cancel.cancel()
+        self._running.set()  # Wake paused workers so they can exit
+
+    # --- Worker side ---
+
+    def run(self):
+        self._active_since = time.perf_counter()
+        self.progress.emit(len(self._done), len(self.paths), 0.0)
+        threads = [threading.Thread(target=self._work, daemon=True) for _ in range(max(1, self.workers))]
+        for thread in threads:
+            thread.start()
+
+        for path in self.paths:
+            if self._cancel.cancelled:
+                break
+            if path in self._done:
+                continue
+            content = self.project.get_content(path)  # Read only when the queue has room
+            if content is None:
+                continue  # Removed since the job started
+            while not self._cancel.cancelled:
+                try:
+                    self._queue.put((path, content), timeout=0.2)
+                    break
+                except queue.Full:
+                    pass
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+        with self._checkpoint_lock:
+            if self._discard_checkpoint or (not self._cancel.cancelled and not self.failed_count):
+                # Finished (or abandoned): nothing left to resume. After failures the
+                # checkpoint stays, so running again retries only the failed documents.
+                self._remove_checkpoint()
+                return
+        self._write_checkpoint()  # Documents finished since the last periodic write
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._running.wait()
+            if self._cancel.cancelled:
+                continue  # Drain the queue
+            path, content = item
+            try:
+                metadata = self._summarize(content)
+            except Exception as e:
+                if not self._cancel.cancelled:
+                    with self._lock:
+                        self.failed_count += 1
+                    self.item_failed.emit(path, str(e))
+                continue
+            if self._cancel.cancelled:
+                continue
+            if metadata is not None:
+                self.item_done.emit(path, metadata)
+            self._mark_done(path)
+
+    def _summarize(self, content):
+        """Summary metadata for one document, or None when it is too short to summarize"""
+        digest = content_hash(content)
+        text = extract_text(content, digest).text
+        if len(text) < MIN_TEXT_LENGTH:
+            return None
+        key = summary_key(digest, self.model, self.summary_type, self.max_length, PROMPT_VERSION)
+        summary = self.cache.get(key)
+        if summary is None:
+            # One request per document at a time; the job's workers give the parallelism
+            window = self.client.context_window(self.model, BACKGROUND, self._cancel)
+            plan = plan_summary(self.model, text, window, self.max_length)
+            summary = summarize_html(
+                content,
+                lambda prompt, final: self.client.generate(self.model, prompt, cancel=self._cancel,
+                                                           num_ctx=plan.context_window,
+                                                           priority=BACKGROUND),
+                self.summary_type, self.max_length, workers=1, max_chars=plan.max_chunk_chars,
+                is_cancelled=lambda: self._cancel.cancelled)
+            if self._cancel.cancelled or not summary.strip():
+                return None
+            self.cache.put(key, summary)
+        return {
+            "text": summary.strip(),
+            "model": self.model,
+            "type": self.summary_type,
+            "max_length": self.max_length,
+            "prompt_version": PROMPT_VERSION,
+            "content_hash": digest,
+            "created": time.time(),
+        }
+
+    def _mark_done(self, path):
+        with self._lock:
+            self._done.add(path)
+            self._finished_this_run += 1
+            active = self._active_seconds
+            if self._active_since is not None:
+                active += time.perf_counter() - self._active_since
+            rate = self._finished_this_run * 60 / active if active > 0 else 0.0
+            done = len(self._done)
+            checkpoint_due = time.monotonic() - self._checkpoint_at >= CHECKPOINT_INTERVAL
+            if checkpoint_due:
+                self._checkpoint_at = time.monotonic()
+        if checkpoint_due:
+            # Throttled; run() writes the final state when the job stops
+            self._write_checkpoint()
+        self.progress.emit(done, len(self.paths), rate)
+
+    def mark_failed(self, path):
+        """Undo a document's done mark, e.g. when its summary could not be stored (GUI thread).
+
+        The checkpoint is written again (even after the run ended), so
+        running again retries the document.
+        """
+        with self._lock:
+            self._done.discard(path)
+            self.failed_count += 1
+        if not self._discard_checkpoint:
+            self._write_checkpoint()
+
+    def _write_checkpoint(self):
+        """Write the current done set; workers are not held up by the disk write"""
+        if not self.checkpoint_path:
+            return
+        with self._checkpoint_lock:
+            with self._lock:
+                done = sorted(self._done)  # Taken here, so the last write has the latest state
+            self._write_checkpoint_file(
+                {"root": self.root_path, "settings": self.settings, "done": done})
+
+    def _write_checkpoint_file(self, data):
+        tmp_path = self.checkpoint_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.checkpoint_path)
+        except OSError as e:
+            print(f"\033[91mCould not write summary checkpoint: {e}\033[0m")
+
+    def _remove_checkpoint(self):
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            try:
+                os.remove(self.checkpoint_path)
+            except OSError as e:
+                print(f"\033[91mCould not remove summary checkpoint: {e}\033[0m")
+
+class BatchSummarizeDialog(QDialog):
+    """Settings and progress for summarizing a whole subtree in the background"""
+
+    def __init__(self, project, root_path, parent=None):
+        super().__init__(parent)
+        self.project = project
+        self.root_path = root_path
+        self.job = None
+        self.failed = []
+
+        self.setObjectName("batchSummarizeDialog")
+        self.setWindowTitle("Summarize Documents")
+        self.setFixedSize(600, 420)
+        self.setWindowFlags(Qt.Dialog | Qt.WindowTitleHint)
+
+        self.init_ui()
+        self._restore_checkpoint_settings()
+        fetch_models(self.url_input.text().strip(), partial(apply_model_list, self.model_combo))
+        QApplication.instance().aboutToQuit.connect(self._on_quit)
+
+    def _row(self, layout, text, widget):
+        row = QHBoxLayout()
+        label = QLabel(text)
+        label.setStyleSheet("font-size: 16px;")
+        label.setFixedWidth(120)
+        row.addWidget(label)
+        widget.setStyleSheet("font-size: 14px;")
+        widget.setFixedHeight(35)
+        row.addWidget(widget)
+        layout.addLayout(row)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(10)
+
+        count = len(self.project.get_subtree_paths(self.root_path))
+        scope = f'"{self.root_path}"' if self.root_path else "the whole project"
+        title = QLabel(f"Summarize {scope} ({count} documents)")
+        title.setStyleSheet("font-size: 18px; margin-bottom: 10px;")
+        title.setWordWrap(True)
+        layout.addWidget(title)
+
+        self.url_input = QLineEdit(DEFAULT_OLLAMA_URL)
+        self.url_input.editingFinished.connect(self._update_parallel_limit)
+        self._row(layout, "Ollama URL:", self.url_input)
+
+        self.model_combo = QComboBox()
+        self.model_combo.setEditable(True)
+        self.model_combo.addItems(["llama3.2:latest", "llama3.2:3b", "llama3.1:latest",
+                                   "mistral:latest", "gemma2:latest"])
+        self._row(layout, "Model:", self.model_combo)
+
+        self.type_combo = QComboBox()
+        self.type_combo.addItems([label for label, _ in SUMMARY_TYPES])
+        self._row(layout, "Summary Type:", self.type_combo)
+
+        self.length_spin = QSpinBox()
+        self.length_spin.setRange(50, 1000)
+        self.length_spin.setValue(200)
+        self.length_spin.setSuffix(" words")
+        self._row(layout, "Max Length:", self.length_spin)
+
+        self.parallel_spin = QSpinBox()
+        self.parallel_spin.setRange(1, MAX_WORKERS)
+        self.parallel_spin.setValue(DEFAULT_WORKERS)
+        self.parallel_spin.setSuffix(" documents")
+        self._row(layout, "Parallel:", self.parallel_spin)
+        self._update_parallel_limit()
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFixedHeight(25)
+        self.progress_bar.setRange(0, max(count, 1))
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("font-size: 14px;")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        layout.addStretch()
+
+        button_layout = QHBoxLayout()
+        self.start_btn = QPushButton("Start")
+        self.start_btn.clicked.connect(self.start)
+        self.pause_btn = QPushButton("Pause")
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.cancel_btn = QPushButton("Cancel Job")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_job)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        for button in (self.start_btn, self.pause_btn, self.cancel_btn, close_btn):
+            button.setStyleSheet("font-size: 14px;")
+            button.setFixedHeight(35)
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+
+    def _update_parallel_limit(self):
+        """Offer no more parallel documents than the server's background slots"""
+        client = get_client(self.url_input.text().strip() or DEFAULT_OLLAMA_URL)
+        self.parallel_spin.setMaximum(min(MAX_WORKERS, client.scheduler.background_slots))
+
+    def _restore_checkpoint_settings(self):
+        """Offer to resume an interrupted run of this subtree with its settings"""
+        path = checkpoint_path(self.project)
+        checkpoint = read_checkpoint(path) if path else None
+        if not checkpoint or checkpoint.get("root") != self.root_path:
+            return
+        settings = checkpoint.get("settings", {})
+        self.model_combo.setCurrentText(settings.get("model", self.model_combo.currentText()))
+        for i, (_, summary_type) in enumerate(SUMMARY_TYPES):
+            if summary_type == settings.get("type"):
+                self.type_combo.setCurrentIndex(i)
+        self.length_spin.setValue(settings.get("max_length", self.length_spin.value()))
+        self.start_btn.setText("Resume")
+        self.status_label.setText(f"A previous run stopped after {len(checkpoint.get('done', []))} "
+                                  "documents. Resume continues where it left off.")
+
+    def _set_settings_enabled(self, enabled):
+        for widget in (self.url_input, self.model_combo, self.type_combo,
+                       self.length_spin, self.parallel_spin):
+            widget.setEnabled(enabled)
+
+    def start(self):
+        url = self.url_input.text().strip()
+        model = self.model_combo.currentText().strip()
+        if not url or not model:
+            QMessageBox.warning(self, "Warning", "Please enter Ollama URL and model.")
+            return
+        summary_type = SUMMARY_TYPES[self.type_combo.currentIndex()][1]
+        self.failed = []
+        self.job = BatchSummaryJob(self.project, self.root_path, model, url, summary_type,
+                                   self.length_spin.value(), workers=self.parallel_spin.value())
+        self.job.item_done.connect(self.on_item_done)
+        self.job.item_failed.connect(self.on_item_failed)
+        self.job.progress.connect(self.on_progress)
+        self.job.finished.connect(self.on_job_finished)
+
+        self._set_settings_enabled(False)
+        self.start_btn.setEnabled(False)
+        self.pause_btn.setEnabled(True)
+        self.pause_btn.setText("Pause")
+        self.cancel_btn.setEnabled(True)
+        self.progress_bar.setRange(0, max(len(self.job.paths), 1))
+        if self.job.resumed_count:
+            self.status_label.setText(f"Resuming: {self.job.resumed_count} documents already done")
+        else:
+            self.status_label.setText("Starting...")
+        self.job.start()
+
+    def toggle_pause(self):
+        if self.job is None:
+            return
+        if self.job.is_paused():
+            self.job.resume()
+            self.pause_btn.setText("Pause")
+        else:
+            self.job.pause()
+            self.pause_btn.setText("Resume")
+            self.status_label.setText("Pausing after the documents in progress...")
+
+    def cancel_job(self):
+        if self.job is not None:
+            self.status_label.setText("Cancelling...")
+            self.job.stop(discard_checkpoint=True)
+
+    def on_item_done(self, path, metadata):
+        """Store the summary with the document (saved in the manifest, not the content)"""
+        if self.project.set_metadata(path, SUMMARY_METADATA_KEY, metadata):
+            return
+        # Renamed or moved since the job read it: find it again by its content
+        for candidate in self.project.get_subtree_paths(""):
+            if content_hash(self.project.get_content(candidate) or "") == metadata["content_hash"]:
+                self.project.set_metadata(candidate, SUMMARY_METADATA_KEY, metadata)
+                return
+        job = self.sender()
+        if job is not None:
+            job.mark_failed(path)
+        self.on_item_failed(path, "the document was renamed, moved or changed while it was summarized")
+
+    def on_item_failed(self, path, message):
+        self.failed.append(path)
+        print(f"\033[91mCould not summarize {path}: {message}\033[0m")
+
+    def on_progress(self, done, total, per_minute):
+        self.progress_bar.setValue(done)
+        status = f"{done} of {total} documents"
+        if per_minute > 0:
+            status += f" · {per_minute:.1f} documents/min"
+        if self.failed:
+            status += f" · {len(self.failed)} failed"
+        if self.job is not None and self.job.is_paused():
+            status += " · paused"
+        self.status_label.setText(status)
+
+    def on_job_finished(self):
+        job, self.job = self.job, None
+        if job is None:
+            return
+        self._set_settings_enabled(True)
+        self.start_btn.setEnabled(True)
+        self.start_btn.setText("Start")
+        self.pause_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(False)
+        if job._discard_checkpoint:
+            self.status_label.setText("Cancelled")
+        elif job._cancel.cancelled:
+            self.status_label.setText("Stopped; Resume continues where it left off")
+            self.start_btn.setText("Resume")
+        elif self.failed:
+            self.status_label.setText(f"Done; {len(self.failed)} documents failed (see the console)")
+            self.start_btn.setText("Retry Failed")
+        else:
+            self.status_label.setText("Done")
+        job.deleteLater()
+
+    def is_running(self):
+        return self.job is not None
+
+    def done(self, result):
+        """Closing stops the job but keeps its checkpoint, so it can be resumed later.
+
+        Does not wait: summaries finished meanwhile are still stored, and
+        on_job_finished cleans up once the workers have exited.
+        """
+        if self.job is not None:
+            self.job.stop()
+        super().done(result)
+
+    def _on_quit(self):
+        if self.job is not None:
+            self.job.stop()
+            self.job.wait(3000)  # Streams are closed, so the workers exit promptly
+
+    def closeEvent(self, event):
+        self.done(QDialog.Rejected)
+        event.accept()
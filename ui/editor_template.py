@@ -0,0 +1,70 @@
+import os
+from PyQt5.QtCore import QFileSystemWatcher
+
+# Styles and scripts placed ahead of the template on every editor page
+EDITOR_PAGE_PREFIX = """
+        <style>
+        a { color: var(--theme-link-color) !important; text-decoration: underline; cursor: pointer; }
+        a[href^="docuweave://"] { color: var(--theme-internal-link-color, #7cb342) !important; }
+        @font-face { font-family: 'emoji'; src: local('Apple Color Emoji'), local('Segoe UI Emoji'); }
+        img[alt="emoji"] { font-family: 'emoji'; }
+        </style>
+        <script>
+        // Enable local file access for images
+        const originalFetch = window.fetch;
+        window.fetch = function(url, options) {
+            if (url.startsWith('file://')) {
+                return new Promise((resolve) => {
+                    const img = new Image();
+                    img.src = url;
+                    resolve(new Response(img));
+                });
+            }
+            return originalFetch(url, options);
+        };
+        </script>
+        """
+
+class EditorTemplate:
+    """Editor page template compiled once into a static header and footer.
+
+    The theme variables are spliced in at compile time, so rendering a
+    document only concatenates its content between the two halves. A file
+    watcher on the theme stylesheet triggers a recompile when it changes.
+    """
+
+    def __init__(self, renderer, parent=None):
+        self.renderer = renderer
+        tmpl_path = os.path.join(os.path.dirname(__file__), "assets", "editor_template.html")
+        with open(tmpl_path, "r", encoding="utf-8") as f:
+            self.source = f.read()
+        self._header = None
+        self._footer = None
+
+        self._watcher = QFileSystemWatcher(parent)
+        self._watcher.addPath(self.renderer.theme_path)
+        self._watcher.fileChanged.connect(self._on_theme_changed)
+
+    def _compile(self):
+        """Split the template around {content} and format both halves"""
+        theme_vars = self.renderer.get_theme_variables()
+        head, _, tail = self.source.partition("{content}")
+        self._header = EDITOR_PAGE_PREFIX + head.format(theme_vars=theme_vars)
+        self._footer = tail.format()
+
+    def _on_theme_changed(self, path):
+        self.invalidate()
+        # Editors that save by replacing the file drop the watch; add it back
+        if path not in self._watcher.files() and os.path.exists(path):
+            self._watcher.addPath(path)
+
+    def invalidate(self):
+        """Recompile on the next render"""
+        self._header = None
+        self._footer = None
+
+    def render(self, content_html: str) -> str:
+        """Return the full editor page for the given content"""
+        if self._header is None:
+            self._compile()
+        return self._header + content_html + self._footer
@@ -9,6 +9,14 @@ from PyQt5.QtWebEngineWidgets import QWebEngineSettings, QWebEngineView, QWebEng
 from PyQt5.QtGui import QDesktopServices
 from ui.custom_webview import CustomWebEngineView
 from ui.js_bridge import JavaScriptBridge
+from ui.script_registry import install_editor_scripts, js_call
+from ui.editor_template import EditorTemplate
+from ui.web_profile import shared_profile, track_cache_stats
+from core.html_chunks import ChunkedContent, is_large_document
+from core.debug import startup_mark, print_startup_timing
+
+# Upper bound on chunk HTML sent to the page per runJavaScript call
+CHUNK_PUSH_SIZE = 1_000_000
 
 class CustomWebEnginePage(QWebEnginePage):
     def __init__(self, *args, **kwargs):
@@ -54,7 +62,7 @@ class CustomWebEnginePage(QWebEnginePage):
                 return False
                 
         # Handle existing URL types
-        if url.scheme() in ['data', 'qrc']:
+        if url.scheme() in ['data', 'qrc', 'dwasset']:
             return True
         
         # Handle external URLs
@@ -67,6 +75,7 @@ class CustomWebEnginePage(QWebEnginePage):
 
 class EditorWidget(QWidget):
     text_changed = pyqtSignal(str)  # Rename signal to avoid collision
+    ready = pyqtSignal()  # The editor page has loaded; queued content has been applied
 
     def __init__(self, renderer, project, parent=None):
         super().__init__(parent)
@@ -74,14 +83,40 @@ class EditorWidget(QWidget):
         self.project = project  # Store project reference
         # Removed inline background-style; styling is applied via dark_theme.qss.
         # self.setStyleSheet("background-color: var(--body-bg);")
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(0, 0, 0, 0)  # Remove margins
+        self._layout = QVBoxLayout(self)
+        self._layout.setContentsMargins(0, 0, 0, 0)  # Remove margins
+        
+        # The web engine is created by start(), after the window has been shown.
+        # Until its page has loaded, content and script calls are queued.
+        self.web_view = None
+        self.page_ready = False
+        self._queued_content = None  # Latest set_content() text before the page was ready
+        self._queued_js = []  # (js, callback) run once the page is ready and loaded
+        self._content_loading = False  # A set_content() page load has not finished yet
+        self.placeholder = QWidget()
+        self.placeholder.setObjectName("editorPlaceholder")
+        self._layout.addWidget(self.placeholder, stretch=1)
+
+        # Large documents are held as chunks and mounted lazily by the page
+        self.chunked_content = None
+        self._chunks_pending = False
+        
+        # Set default title
+        self.current_title = "Untitled Document"
+
+    def start(self):
+        """Create the web engine view, page and channel and load the editor page"""
+        if self.web_view is not None:
+            return
         self.web_view = QWebEngineView()
-        page = CustomWebEnginePage(self.web_view)
+        # Persistent profile shared by all pages, so remote images stay in its disk cache
+        page = CustomWebEnginePage(shared_profile(), self.web_view)
         self.web_view.setPage(page)
+        # Editor scripts are read once and injected by the page on every load
+        install_editor_scripts(page)
+        track_cache_stats(page)
         self.web_view.setContextMenuPolicy(Qt.PreventContextMenu)
         self.web_view.setFocusPolicy(Qt.StrongFocus)
-        layout.addWidget(self.web_view, stretch=1)  # Add stretch factor
 
         # Configure web settings
         settings = self.web_view.page().settings()
@@ -90,18 +125,10 @@ class EditorWidget(QWidget):
         settings.setAttribute(QWebEngineSettings.JavascriptCanAccessClipboard, True)
         settings.setAttribute(QWebEngineSettings.LocalStorageEnabled, True)
 
-        # Revert HTML template to original: only editable content is present.
-        tmpl_path = os.path.join(os.path.dirname(__file__), "assets", "editor_template.html")
-        with open(tmpl_path, "r", encoding="utf-8") as f:
-            self.html_template = f.read()
-        
-        # Set default title and content
-        self.current_title = "Untitled Document"
-        initial_content = self.renderer.render("")
-        # Get theme variables from qss via renderer helper
-        theme_vars = self.renderer.get_theme_variables()
-        html = self.html_template.format(content=initial_content, theme_vars=theme_vars)
-        self.web_view.setHtml(html, QUrl("qrc:///"))
+        page.loadFinished.connect(self._on_load_finished)
+
+        # Template is read and compiled once; theme changes recompile it
+        self.template = EditorTemplate(self.renderer, self)
 
         # Initialize JavaScript bridge
         self.js_bridge = JavaScriptBridge()
@@ -111,58 +138,76 @@ class EditorWidget(QWidget):
         self.channel = QWebChannel()
         self.web_view.page().setWebChannel(self.channel)
         self.channel.registerObject("content_bridge", self.js_bridge)
+        startup_mark("web engine created")
+
+        # Swap the placeholder for the view and load the empty editor page
+        self._layout.replaceWidget(self.placeholder, self.web_view)
+        self.placeholder.deleteLater()
+        self.placeholder = None
+        initial_content = self.renderer.render("")
+        self.web_view.setHtml(self.template.render(initial_content), QUrl("qrc:///"))
+
+    def _on_page_ready(self):
+        """First load finished: apply what was queued while the page was starting"""
+        self.page_ready = True
+        startup_mark("editor page loaded")
+        if self._queued_content is not None:
+            content, self._queued_content = self._queued_content, None
+            self.set_content(content)  # Queued JS waits for this load; see _on_load_finished
+        else:
+            self._run_queued_js()
+        self.ready.emit()
+        print_startup_timing()
 
     def _on_content_changed(self, content):
         """Handle content changes from JavaScript"""
         self.text_changed.emit(content)
 
+    def _run_queued_js(self):
+        queued, self._queued_js = self._queued_js, []
+        for js, callback in queued:
+            self.run_js(js, callback)
+
+    def run_js(self, js, callback=None):
+        """Run JavaScript in the editor page, queueing it until the page is ready and loaded"""
+        if not self.page_ready or self._content_loading:
+            self._queued_js.append((js, callback))
+            return
+        if callback:
+            self.web_view.page().runJavaScript(js, callback)
+        else:
+            self.web_view.page().runJavaScript(js)
+
+    def call_js(self, function_name, *args, callback=None):
+        """Call a function defined by one of the injected editor scripts"""
+        self.run_js(js_call(function_name, *args), callback)
+
     def format_text(self, command, value=None):
         # Log the applied formatting
         print("\033[94mApplying command: {} {}\033[0m".format(command, value if value else ""))
-        js = """"""
-        js_path = os.path.join(os.path.dirname(__file__), "assets", "editor_widget_formatter.js")
-        with open(js_path, "r", encoding="utf-8") as f:
-            js = f.read()
-        self.web_view.page().runJavaScript(js)
+        self.call_js("formatText", command, value)
 
     def set_content(self, text: str):
         import html
+        if not self.page_ready:
+            # Shown as soon as the editor page has loaded; only the latest content matters
+            self._queued_content = text
+            return
         if text.lstrip().startswith('<'):
             content_html = text
         else:
             rendered = self.renderer.render(text)
             content_html = html.unescape(rendered)
-        # Check if the template expects both placeholders
-        if "{theme_vars}" in self.html_template:
-            theme_vars = self.renderer.get_theme_variables()
-            final_html = self.html_template.format(content=content_html, theme_vars=theme_vars)
+        # Very large documents are sent to the page in chunks once it has loaded
+        if is_large_document(content_html):
+            self.chunked_content = ChunkedContent.from_html(content_html)
+            self._chunks_pending = True
+            content_html = ""
         else:
-            final_html = self.html_template.format(content=content_html)
-        
-        # Inject CSS to style links and fix local file access
-        styles = """
-        <style>
-        a { color: var(--theme-link-color) !important; text-decoration: underline; cursor: pointer; }
-        a[href^="docuweave://"] { color: var(--theme-internal-link-color, #7cb342) !important; }
-        @font-face { font-family: 'emoji'; src: local('Apple Color Emoji'), local('Segoe UI Emoji'); }
-        img[alt="emoji"] { font-family: 'emoji'; }
-        </style>
-        <script>
-        // Enable local file access for images
-        const originalFetch = window.fetch;
-        window.fetch = function(url, options) {
-            if (url.startsWith('file://')) {
-                return new Promise((resolve) => {
-                    const img = new Image();
-                    img.src = url;
-                    resolve(new Response(img));
-                });
-            }
-            return originalFetch(url, options);
-        };
-        </script>
-        """
-        final_html = styles + final_html
+            self.chunked_content = None
+            self._chunks_pending = False
+        # Only the content changes between documents; header and footer are precompiled
+        final_html = self.template.render(content_html)
         
         if self.project.project_path:
             project_folder = os.path.splitext(self.project.project_path)[0]
@@ -174,14 +219,66 @@ class EditorWidget(QWidget):
         settings.setAttribute(QWebEngineSettings.LocalContentCanAccessFileUrls, True)
         settings.setAttribute(QWebEngineSettings.AllowRunningInsecureContent, True)
         
+        # Table editing is enabled by the injected table_editing.js once the page is ready
+        self._content_loading = True  # JavaScript would run against the page being replaced
         self.web_view.setHtml(final_html, base_url)
-        self.enable_table_editing()
+
+    def _on_load_finished(self, ok):
+        if not self.page_ready:
+            self._on_page_ready()
+            return
+        self._content_loading = False
+        if ok and self._chunks_pending:
+            self._chunks_pending = False
+            self._push_chunks()
+        self._run_queued_js()  # After the chunks, which the queued JS may rely on
+
+    def _push_chunks(self):
+        """Create the chunk placeholders and send chunk HTML in bounded batches"""
+        chunks = self.chunked_content.chunks
+        print(f"\033[94mLarge document mode: {len(chunks)} chunks\033[0m")
+        self.call_js("initChunkedEditor", len(chunks))
+        start = 0
+        while start < len(chunks):
+            end = start
+            size = 0
+            while end < len(chunks) and (end == start or size + len(chunks[end]) <= CHUNK_PUSH_SIZE):
+                size += len(chunks[end])
+                end += 1
+            self.call_js("loadChunks", start, chunks[start:end])
+            start = end
+
+    def get_content(self, callback):
+        """Serialize the editor content and pass it to callback.
+
+        In large-document mode only the chunks edited since the last call
+        are serialized by the page. Before the page is ready the content is
+        what was last set, or None if nothing was: callers must not store
+        None over the document.
+        """
+        if not self.page_ready:
+            # Nothing has been edited yet
+            callback(self._queued_content)
+            return
+        if self.chunked_content is None:
+            self.run_js("document.getElementById('editor').innerHTML;", callback)
+            return
+
+        chunked_content = self.chunked_content
+
+        def on_changes(changes):
+            if changes is None:
+                # An edit spanned chunk containers; fall back to full serialization
+                self.call_js("serializeChunkedEditor", callback=callback)
+                return
+            if changes:
+                chunked_content.apply_changes(changes)
+            callback(chunked_content.to_html())
+
+        self.call_js("collectDirtyChunks", callback=on_changes)
 
     def enable_table_editing(self):
-        js_path = os.path.join(os.path.dirname(__file__), "assets", "table_editing.js")
-        with open(js_path, "r", encoding="utf-8") as f:
-            js = f.read()
-        self.web_view.page().runJavaScript(js)
+        self.call_js("enableTableEditing")
 
     def add_image_to_project(self, file_path):
         """Copy image to project's image directory and return relative path"""
@@ -224,13 +321,13 @@ class EditorWidget(QWidget):
                 '<div class="scalable-image" contenteditable="false" style="display: inline-block; resize: horizontal; overflow: auto; border: 1px solid #ccc; margin: 5px; width:300px;"><img src="{src}" alt="Inserted image" style="display: block; width: 100%; height: auto;"/></div>'
             );
             """
-            self.web_view.page().runJavaScript(js)
+            self.run_js(js)
         else:
             print("\033[91mAttempted to insert image with empty src\033[0m")
 
     def insert_info_box(self):
         """Insert an editable info box into the document."""
-        self.web_view.page().runJavaScript("insertInfoBox();")
+        self.run_js("insertInfoBox();")
 
     def insert_table(self, rows, cols):
         js = f"""
@@ -253,4 +350,5 @@ class EditorWidget(QWidget):
             document.execCommand('insertHTML', false, table.outerHTML);
         }})();
         """
-        self.web_view.page().runJavaScript(js, lambda result: self.enable_table_editing())
\ No newline at end of file
+        # Table handlers are delegated on the editor, so the new table needs no setup
+        self.run_js(js)
\ No newline at end of file
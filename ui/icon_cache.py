@@ -0,0 +1,218 @@
+import os
+import json
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QIcon, QImage, QPixmap, QPainter, QColor, QTransform
+from PyQt5.QtCore import (Qt, QSize, QRectF, QRect, QObject, QRunnable, QThreadPool,
+                          QTimer, QStandardPaths, pyqtSignal)
+
+ATLAS_NAME = "icon_atlas"
+ATLAS_COLUMNS = 8
+SAVE_DELAY_MS = 2000  # Write the atlas once misses have settled
+
+def render_icon_image(file_path, color, size, stroke_color=None, stroke_width=2,
+                      flipped=False, dpr=1.0):
+    """Rasterize a tinted (optionally stroked and mirrored) SVG icon.
+
+    Works on QImage only, so it is safe to call from a worker thread.
+    """
+    from PyQt5.QtSvg import QSvgRenderer  # Not needed at all when the atlas is warm
+    width, height = round(size.width() * dpr), round(size.height() * dpr)
+    image = QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+    image.fill(Qt.transparent)
+    painter = QPainter(image)
+    # Render SVG into the full area of the image
+    QSvgRenderer(file_path).render(painter, QRectF(0, 0, width, height))
+    painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
+    painter.fillRect(image.rect(), color)
+    painter.end()
+
+    # Add stroke if requested
+    if stroke_color is not None and stroke_width > 0:
+        stroke = round(stroke_width * dpr)
+        stroked = QImage(width + stroke * 2, height + stroke * 2, QImage.Format_ARGB32_Premultiplied)
+        stroked.fill(Qt.transparent)
+        painter = QPainter(stroked)
+        # Offsets to simulate stroke around the icon
+        for dx in (-stroke, 0, stroke):
+            for dy in (-stroke, 0, stroke):
+                if dx or dy:
+                    painter.drawImage(dx + stroke, dy + stroke, image)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
+        painter.fillRect(stroked.rect(), stroke_color)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        # Draw original icon in the center
+        painter.drawImage(stroke, stroke, image)
+        painter.end()
+        image = stroked
+
+    if flipped:
+        image = image.transformed(QTransform().scale(-1, 1))
+    return image
+
+class _RenderSignals(QObject):
+    finished = pyqtSignal(str, QImage)
+
+class _RenderTask(QRunnable):
+    def __init__(self, key, args, signals):
+        super().__init__()
+        self.key = key
+        self.args = args
+        self.signals = signals
+
+    def run(self):
+        try:
+            image = render_icon_image(*self.args)
+        except Exception as e:
+            print(f"\033[91mError rendering icon {self.args[0]}: {e}\033[0m")
+            image = QImage()
+        self.signals.finished.emit(self.key, image)
+
+class IconCache(QObject):
+    """Tinted SVG icons backed by a PNG atlas on disk.
+
+    Icons are keyed by (svg path, mtime, color, size, stroke, flip, device
+    pixel ratio). On a warm start every icon is cut from the atlas loaded in
+    one PNG decode, without rasterizing any SVG. Misses are rendered on the
+    thread pool and the atlas is rewritten shortly after they settle.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache_dir = os.path.join(
+            QStandardPaths.writableLocation(QStandardPaths.CacheLocation), "icons")
+        self._images = {}  # key -> QImage
+        self._used = set()  # Keys requested this session; the atlas keeps only these
+        self._waiting = {}  # key -> callbacks waiting for a background render
+        self._dirty = False
+        self._signals = _RenderSignals()
+        self._signals.finished.connect(self._on_rendered)
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(SAVE_DELAY_MS)
+        self._save_timer.timeout.connect(self.save)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.save)
+        self._load_atlas()
+
+    def _key(self, file_path, color, size, stroke_color, stroke_width, flipped, dpr):
+        try:
+            mtime = os.stat(file_path).st_mtime_ns
+        except OSError:
+            mtime = 0
+        stroke = f"{stroke_color.name(QColor.HexArgb)}/{stroke_width}" if stroke_color is not None else "-"
+        return "|".join((os.path.abspath(file_path), str(mtime), color.name(QColor.HexArgb),
+                         f"{size.width()}x{size.height()}", stroke, "f" if flipped else "-",
+                         f"{dpr:g}"))
+
+    def _spec(self, file_path, color, size, stroke_color, stroke_width, flipped):
+        color = QColor(color) if color is not None else QColor("white")
+        stroke_color = QColor(stroke_color) if stroke_color is not None else None
+        app = QApplication.instance()
+        dpr = app.devicePixelRatio() if app is not None else 1.0
+        args = (file_path, color, size, stroke_color, stroke_width, flipped, dpr)
+        return self._key(*args), args
+
+    def _to_icon(self, image, dpr):
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(dpr)
+        return QIcon(pixmap)
+
+    def icon(self, file_path, color=None, size=QSize(60, 60), stroke_color=None,
+             stroke_width=2, flipped=False):
+        """Get an icon now, rendering it on this thread on a miss"""
+        key, args = self._spec(file_path, color, size, stroke_color, stroke_width, flipped)
+        self._used.add(key)
+        image = self._images.get(key)
+        if image is None:
+            image = render_icon_image(*args)
+            self._store(key, image)
+        return self._to_icon(image, args[-1])
+
+    def request(self, callback, file_path, color=None, size=QSize(60, 60), stroke_color=None,
+                stroke_width=2, flipped=False):
+        """Call callback(QIcon) with the icon: at once on a hit, after a background render on a miss"""
+        key, args = self._spec(file_path, color, size, stroke_color, stroke_width, flipped)
+        self._used.add(key)
+        dpr = args[-1]
+        image = self._images.get(key)
+        if image is not None:
+            callback(self._to_icon(image, dpr))
+            return
+        waiting = self._waiting.get(key)
+        if waiting is not None:
+            waiting.append((callback, dpr))
+            return
+        self._waiting[key] = [(callback, dpr)]
+        QThreadPool.globalInstance().start(_RenderTask(key, args, self._signals))
+
+    def _on_rendered(self, key, image):
+        if not image.isNull():
+            self._store(key, image)
+        for callback, dpr in self._waiting.pop(key, []):
+            callback(self._to_icon(image, dpr))
+
+    def _store(self, key, image):
+        self._images[key] = image
+        self._dirty = True
+        self._save_timer.start()
+
+    def _atlas_paths(self):
+        base = os.path.join(self.cache_dir, ATLAS_NAME)
+        return base + ".png", base + ".json"
+
+    def _load_atlas(self):
+        png_path, index_path = self._atlas_paths()
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return  # Cold start
+        atlas = QImage(png_path)
+        if atlas.isNull():
+            return
+        for key, (x, y, w, h) in index.items():
+            self._images[key] = atlas.copy(QRect(x, y, w, h))
+
+    def save(self):
+        """Pack the icons used this session into the atlas PNG and its JSON index"""
+        if not self._dirty:
+            return
+        keys = sorted(key for key in self._used if key in self._images)
+        if not keys:
+            return
+        cell_w = max(self._images[key].width() for key in keys)
+        cell_h = max(self._images[key].height() for key in keys)
+        rows = (len(keys) + ATLAS_COLUMNS - 1) // ATLAS_COLUMNS
+        atlas = QImage(cell_w * min(len(keys), ATLAS_COLUMNS), cell_h * rows,
+                       QImage.Format_ARGB32_Premultiplied)
+        atlas.fill(Qt.transparent)
+        painter = QPainter(atlas)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        index = {}
+        for i, key in enumerate(keys):
+            image = self._images[key]
+            x, y = (i % ATLAS_COLUMNS) * cell_w, (i // ATLAS_COLUMNS) * cell_h
+            painter.drawImage(x, y, image)
+            index[key] = [x, y, image.width(), image.height()]
+        painter.end()
+
+        png_path, index_path = self._atlas_paths()
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if not atlas.save(png_path, "PNG"):
+                raise OSError(f"could not write {png_path}")
+            with open(index_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            self._dirty = False
+        except OSError as e:
+            print(f"\033[91mCould not save icon cache: {e}\033[0m")
+
+_icon_cache = None
+
+def icon_cache():
+    """The application's icon cache (created on first use, after QApplication)"""
+    global _icon_cache
+    if _icon_cache is None:
+        _icon_cache = IconCache()
+    return _icon_cache
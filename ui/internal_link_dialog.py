@@ -1,23 +1,16 @@
-import sys
-import ctypes
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                             QPushButton, QTreeView, QAbstractItemView)
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QIcon
 from PyQt5.QtCore import Qt, pyqtSignal
-
-# Enable high DPI awareness on Windows
-if sys.platform == "win32":
-    try:
-        ctypes.windll.shcore.SetProcessDpiAwareness(1)
-    except Exception:
-        pass
+from ui.project_model import ProjectTreeModel
 
 class InternalLinkDialog(QDialog):
     """Dialog for selecting an internal document to link to"""
     
-    def __init__(self, project, parent=None):
+    def __init__(self, project, parent=None, model=None):
         super().__init__(parent)
         self.project = project
+        # Reuse the sidebar's tree model when given, so nothing is rebuilt
+        self.model = model
         self.selected_path = None
         
         self.setWindowTitle("Link to Document")
@@ -76,66 +69,11 @@ class InternalLinkDialog(QDialog):
         self.link_button.setEnabled(False)
         
     def populate_tree(self):
-        """Populate tree with documents from project"""
-        self.model = QStandardItemModel()
-        root_item = self.model.invisibleRootItem()
-        
-        # Add all documents to the tree
-        self._add_documents_to_tree(root_item)
-        
+        """Show the project's documents; children load as folders are expanded"""
+        if self.model is None:
+            self.model = ProjectTreeModel(self.project, self)
         self.tree_view.setModel(self.model)
-        self.tree_view.expandAll()
         
-    def _add_documents_to_tree(self, root_item):
-        """Add all documents to tree recursively"""
-        all_docs = self.project.get_all_documents()
-        
-        # Create a dictionary representation of the tree
-        tree_dict = {}
-        
-        for doc_path in all_docs:
-            if not doc_path:  # Skip empty paths
-                continue
-                
-            path_parts = doc_path.split('/')
-            current_dict = tree_dict
-            
-            # Build path in tree dictionary
-            for i, part in enumerate(path_parts):
-                if part not in current_dict:
-                    current_dict[part] = {}
-                
-                if i < len(path_parts) - 1:
-                    current_dict = current_dict[part]
-        
-        # Recursively build tree from dictionary
-        self._build_tree_from_dict(tree_dict, root_item, "")
-        
-    def _build_tree_from_dict(self, tree_dict, parent_item, current_path):
-        """Build tree items from dictionary recursively"""
-        for key, children in sorted(tree_dict.items()):
-            # Create path for this item
-            if current_path:
-                item_path = f"{current_path}/{key}"
-            else:
-                item_path = key
-                
-            # Create item for this document
-            item = QStandardItem(key)
-            item.setData(item_path, Qt.UserRole)
-            
-            # Set icon based on whether it has children
-            if children:
-                item.setIcon(QIcon.fromTheme("folder"))
-            else:
-                item.setIcon(QIcon.fromTheme("text-x-generic"))
-                
-            parent_item.appendRow(item)
-            
-            # Add children
-            if children:
-                self._build_tree_from_dict(children, item, item_path)
-    
     def on_tree_item_clicked(self, index):
         """Handle tree item selection"""
         if index.isValid():
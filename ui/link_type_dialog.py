@@ -1,15 +1,6 @@
-import sys
-import ctypes
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QRadioButton, QButtonGroup
 from PyQt5.QtCore import Qt
 
-# Enable high DPI awareness on Windows
-if sys.platform == "win32":
-    try:
-        ctypes.windll.shcore.SetProcessDpiAwareness(1)
-    except Exception:
-        pass
-
 class LinkTypeDialog(QDialog):
     """Dialog for selecting between external and internal links"""
     
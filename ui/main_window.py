@@ -1,27 +1,19 @@
 import os  # Added import for os
 import sys  # Added import for sys.exit
-from PyQt5.QtWidgets import QMainWindow, QVBoxLayout, QWidget, QPushButton, QFileDialog, QFrame, QHBoxLayout, QMenu, QSplitter, QLabel, QApplication, QMenuBar, QShortcut, QInputDialog
-from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtWidgets import QMainWindow, QVBoxLayout, QWidget, QPushButton, QFileDialog, QFrame, QHBoxLayout, QMenu, QSplitter, QLabel, QApplication, QMenuBar, QShortcut, QInputDialog, QMessageBox
+from PyQt5.QtCore import Qt, QPoint, QTimer
 from PyQt5.QtGui import QFont, QCursor, QKeySequence, QIcon  # Remove QShortcut from here
-from PyQt5.QtWebEngineWidgets import QWebEngineView
 from core.editor import Editor
 from core.renderer import Renderer
 from core.project import Project
+from core.events import DocumentMoved
+from core.autosave import AutosaveWriter
+from core.debug import startup_mark
 from .editor_widget import EditorWidget
 from .toolbar_widget import ToolbarWidget
 from .project_sidebar import ProjectSidebar
 from .startup_dialog import StartupDialog  # Add this import
 from ui.hover_label import HoverLabel  # new import
-import colorama
-colorama.init(autoreset=True)
-
-# New: Custom QWebEngineView with modern styled context menu
-class CustomWebEngineView(QWebEngineView):
-    def contextMenuEvent(self, event):
-        menu = self.page().createStandardContextMenu()
-        # Removed inline style; rely on QSS styling via widget objectNames
-        menu.exec_(event.globalPos())
-
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -61,9 +53,14 @@ class MainWindow(QMainWindow):
         self.renderer = Renderer()
         self.project = Project()
         self.menu = None
+        self.autosave = None
+        self._batch_dialog = None  # Kept while its background job runs
+        self._related_dialog = None
         
-        # Initialize UI first
+        # Initialize UI first; the editor's web engine starts after the window is shown
         self.init_ui()
+        self._attach_project()
+        startup_mark("window shell and sidebar")
         
         # Add shortcuts for saving (Ctrl+S) and opening projects (Ctrl+O)
         self.shortcut_save = QShortcut(QKeySequence("Ctrl+S"), self)
@@ -74,6 +71,7 @@ class MainWindow(QMainWindow):
         
         # Handle project selection; if canceled, continue with a new document.
         self.show_startup_dialog()
+        startup_mark("startup dialog")
         
         # Only create a new document if none already exist
         if not self.get_document_count():
@@ -132,6 +130,30 @@ class MainWindow(QMainWindow):
         """Refresh the title bar to display the current project name"""
         self.title_label.setText(f"DocuWeave - {self.project.name}")
 
+    def _attach_project(self):
+        """Point every consumer at self.project and subscribe them to its change events"""
+        events = self.project.events
+        # Queued subscribers (autosave) run once per burst of changes
+        events.set_dispatcher(lambda flush: QTimer.singleShot(0, flush))
+        if self.autosave is None or self.autosave.project is not self.project:
+            if self.autosave is not None:
+                self.autosave.detach()
+            self.autosave = AutosaveWriter(self.project)
+        events.unsubscribe(self._on_project_event)
+        events.subscribe(self._on_project_event, DocumentMoved)
+        
+        self.sidebar.update_tree(self.project)
+        self.editor_widget.project = self.project
+        self.toolbar_widget.editor_widget = self.editor_widget
+
+    def _on_project_event(self, event):
+        """Keep the title bar in sync when the open document is renamed or moved"""
+        current = self.project.current_document
+        if current and (current == event.new_path or current.startswith(event.new_path + '/')):
+            name = current.split('/')[-1]
+            document_type = "Container" if self.project.has_children(current) else "Document"
+            self.title_label.setText(f"DocuWeave - {self.project.name} - {name} ({document_type})")
+
     def show_menu(self, event):
         if not self.menu:
             self.menu = QMenu(self)
@@ -219,6 +241,10 @@ class MainWindow(QMainWindow):
         self.sidebar.document_created.connect(self.create_document)
         self.sidebar.document_deleted.connect(self.delete_document)
         self.sidebar.document_renamed.connect(self.rename_document)
+        self.sidebar.documents_moved.connect(self.move_documents)
+        self.sidebar.sort_children_requested.connect(self.sort_children)
+        self.sidebar.summarize_requested.connect(self.show_batch_summarize)
+        self.sidebar.related_requested.connect(self.show_related_documents)
         self.editor_widget.text_changed.connect(self.update_current_content)
         
         # Remove save button as we're doing real-time saves
@@ -231,11 +257,12 @@ class MainWindow(QMainWindow):
     def _save_current_content(self, callback=None):
         """Save current document content; then call callback."""
         if self.project.current_document:
-            self.editor_widget.web_view.page().runJavaScript(
-                "document.getElementById('editor').innerHTML;",
-                lambda content: (self.project.update_content(self.project.current_document, content), 
-                                callback() if callback else None)
-            )
+            def store(content):
+                if content is not None:  # None: the editor has not shown anything yet
+                    self.project.update_content(self.project.current_document, content)
+                if callback:
+                    callback()
+            self.editor_widget.get_content(store)
         else:
             if callback:
                 callback()
@@ -260,7 +287,7 @@ class MainWindow(QMainWindow):
                 self.title_label.setText(f"DocuWeave - {self.project.name} - {name} ({document_type})")
                 
                 # Update selection in project sidebar
-                self.sidebar._restore_selection(self.sidebar.model.invisibleRootItem(), document_path)
+                self.sidebar.reveal_path(document_path)
             else:
                 # If content not found, create a new document
                 self.create_new_document()
@@ -272,7 +299,6 @@ class MainWindow(QMainWindow):
         def after_save():
             try:
                 new_doc_path = self.project.create_untitled_document(parent_path)
-                self.sidebar.update_tree(self.project)
                 self.editor_widget.set_content("")
                 self.project.current_document = new_doc_path
                 
@@ -294,7 +320,6 @@ class MainWindow(QMainWindow):
             try:
                 # Create document with the user-specified name
                 new_doc_path = self.project.create_document(doc_name, "", parent_path)
-                self.sidebar.update_tree(self.project)
                 self.editor_widget.set_content("")
                 self.project.current_document = new_doc_path
                 
@@ -308,12 +333,7 @@ class MainWindow(QMainWindow):
         """Create a new document with specified name at the parent path"""
         try:
             doc_path = self.project.create_document(document_name, "", parent_path)
-            self.sidebar.update_tree(self.project)
             
-            # Auto-save project to persist document structure
-            if self.project.project_path:
-                self.project.save_project(self.project.project_path)
-                
             # Switch to the new document automatically
             self.change_document(doc_path)
         except Exception as e:
@@ -346,11 +366,9 @@ class MainWindow(QMainWindow):
     def save_markdown(self):
         """Update current document in project"""
         if self.project.current_document:
-            self.editor_widget.web_view.page().runJavaScript(
-                "document.getElementById('editor').innerHTML;",
+            self.editor_widget.get_content(
                 lambda content: self._handle_document_save(content)
             )
-            self.sidebar.update_tree(self.project)
 
     def _handle_save(self, html_content, file_name):
         with open(file_name, 'w', encoding='utf-8') as file:
@@ -360,10 +378,8 @@ class MainWindow(QMainWindow):
     def new_project(self):
         self.project = Project()
         self.project.name = "Untitled Project"
-        self.sidebar.update_tree(self.project)
+        self._attach_project()
         self.editor_widget.set_content("")
-        self.editor_widget.project = self.project
-        self.toolbar_widget.editor_widget = self.editor_widget
         self.update_title_bar()  # Update title bar
 
     def open_project(self, file_path=None):
@@ -381,9 +397,7 @@ class MainWindow(QMainWindow):
         if file_path:
             try:
                 self.project.load_project(file_path)
-                self.sidebar.update_tree(self.project)
-                self.editor_widget.project = self.project
-                self.toolbar_widget.editor_widget = self.editor_widget
+                self._attach_project()
                 self.update_title_bar()  # Update title bar after project load
                 
                 # Load the current document if specified in project
@@ -427,7 +441,7 @@ class MainWindow(QMainWindow):
         try:
             # Update current document content before saving
             def after_content_save(content):
-                if self.project.current_document:
+                if self.project.current_document and content is not None:
                     self.project.update_content(self.project.current_document, content)
                 print(f"\033[94mBefore save_project, project_path: {self.project.project_path}\033[0m")
                 self.project.save_project(self.project.project_path)
@@ -438,10 +452,7 @@ class MainWindow(QMainWindow):
                     callback()
 
             if self.project.current_document:
-                self.editor_widget.web_view.page().runJavaScript(
-                    "document.getElementById('editor').innerHTML;",
-                    after_content_save
-                )
+                self.editor_widget.get_content(after_content_save)
             else:
                 self.project.save_project(self.project.project_path)
                 if callback:
@@ -455,22 +466,18 @@ class MainWindow(QMainWindow):
             return False
 
     def _handle_document_save(self, content):
-        if self.project.current_document:
+        if self.project.current_document and content is not None:
             self.project.update_document(self.project.current_document, content)
 
     def update_current_content(self, content):
         """Real-time update of current document content"""
         if self.project.current_document:
+            # The autosave writer persists just this document's content file
             self.project.update_content(self.project.current_document, content)
-            # Auto-save to persist changes
-            if self.project.project_path:
-                 self.project.save_project(self.project.project_path)
 
     def delete_document(self, doc_path):
         """Delete a document by its path"""
         if self.project.remove_document(doc_path):
-            self.sidebar.update_tree(self.project)
-            
             # If current document was deleted, load a new one
             if not self.project.current_document:
                 # Find another document to load
@@ -481,10 +488,6 @@ class MainWindow(QMainWindow):
                 else:
                     # No documents left, create a new one
                     self.create_new_document()
-                    
-            # Autosave to persist changes
-            if self.project.project_path:
-                self.project.save_project(self.project.project_path)
 
     def rename_document(self, old_path: str, new_path: str):
         """Handle document rename requests"""
@@ -492,16 +495,88 @@ class MainWindow(QMainWindow):
         
         if self.project.rename_document(old_path, new_path):
             print("Document rename successful in project")  # Debug log
-            # Update tree view
-            self.sidebar.update_tree(self.project)
-            
-            # Auto-save project if path exists
-            if self.project.project_path:
-                self.project.save_project(self.project.project_path)
+            # The sidebar, title bar and autosave follow the DocumentMoved event
         else:
             print("Document rename failed in project")  # Debug log
-            # Update tree to restore previous state
-            self.sidebar.update_tree(self.project)
+            # Restore the item's previous name
+            self.sidebar.revert_rename(old_path)
+
+    def move_documents(self, moves, parent_path="", insert_at=-1):
+        """Apply drag-and-drop moves as one transaction: one link pass, one save, one tree update"""
+        def apply_moves():
+            taken = set()
+            skipped = []
+            placed = []
+            # Remember the drop position by the document it was next to; rows shift
+            # as documents move in
+            parent_doc = self.project.get_document_by_path(parent_path)
+            anchor = None
+            if parent_doc is not None and 0 <= insert_at < len(parent_doc.child_order):
+                anchor = parent_doc.child_order[insert_at]
+            try:
+                with self.project.transaction():
+                    for old_path, new_path in moves:
+                        if old_path == new_path:
+                            placed.append(new_path.split('/')[-1])  # Only changes position
+                            continue
+                        if new_path in taken or self.project.get_document_by_path(new_path) is not None:
+                            skipped.append(new_path)  # Never overwrite an existing document
+                            continue
+                        if not self.project.rename_document(old_path, new_path):
+                            raise ValueError(f"Could not move {old_path} to {new_path}")
+                        taken.add(new_path)
+                        placed.append(new_path.split('/')[-1])
+                    if insert_at >= 0 and placed and parent_doc is not None:
+                        order = parent_doc.child_order
+                        index = order.index(anchor) if anchor in parent_doc.children else len(order)
+                        self.project.reorder_documents(parent_path, placed, index)
+            except Exception as e:
+                print(f"\033[91mError moving documents, nothing was moved: {e}\033[0m")
+                QMessageBox.warning(self, "Move Error", f"Could not move the documents: {e}")
+                return
+            if skipped:
+                QMessageBox.information(self, "Move Documents",
+                                        "These documents already exist and were not moved:\n" +
+                                        "\n".join(skipped))
+        
+        # The open document may be among those moved; store its edits first
+        self._save_current_content(apply_moves)
+
+    def sort_children(self, path):
+        """Drop a hand-made child order in favour of alphabetical order"""
+        self.project.sort_children(path)
+
+    def show_batch_summarize(self, path):
+        """Summarize a subtree in the background; one job at a time"""
+        from ui.batch_summarize_dialog import BatchSummarizeDialog
+        dialog = self._batch_dialog
+        if dialog is not None and dialog.is_running():
+            if dialog.project is not self.project:
+                QMessageBox.information(self, "Summarize Documents",
+                                        "A summarization job for another project is still stopping.")
+                return
+            # Show the running job instead of starting a second one
+        else:
+            if dialog is not None:
+                dialog.deleteLater()
+            dialog = self._batch_dialog = BatchSummarizeDialog(self.project, path, self)
+        dialog.show()
+        dialog.raise_()
+
+    def show_related_documents(self, path):
+        """Documents similar to path; one dialog, reused while the project stays open"""
+        from ui.related_documents_dialog import RelatedDocumentsDialog
+        dialog = self._related_dialog
+        if dialog is not None and dialog.project is self.project:
+            dialog.set_path(path)
+        else:
+            if dialog is not None:
+                dialog.close()
+                dialog.deleteLater()
+            dialog = self._related_dialog = RelatedDocumentsDialog(self.project, path, self)
+            dialog.document_requested.connect(self.change_document)
+        dialog.show()
+        dialog.raise_()
 
     def mousePressEvent(self, event):
         pos = event.pos()
@@ -575,8 +650,7 @@ class MainWindow(QMainWindow):
         self.project.project_path = project_file
         
         # Update editor references before saving
-        self.editor_widget.project = self.project
-        self.toolbar_widget.editor_widget = self.editor_widget
+        self._attach_project()
         
         # Save the project immediately to create necessary folders
         self.project.save_project(project_file)
@@ -0,0 +1,310 @@
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, QPersistentModelIndex, pyqtSignal
+from PyQt5.QtGui import QIcon
+
+class _Node:
+    """A document in the model; children are loaded on first expansion"""
+    __slots__ = ("path", "name", "parent", "row", "children", "fetched")
+
+    def __init__(self, path, name, parent=None, row=0):
+        self.path = path
+        self.name = name
+        self.parent = parent
+        self.row = row  # Position among the parent's children
+        self.children = []  # In the document's display order once fetched
+        self.fetched = False
+
+class ProjectTreeModel(QAbstractItemModel):
+    """Lazy tree model reading straight from a Project's Document tree.
+
+    Children of a document are only materialized when a view expands it
+    (canFetchMore/fetchMore), so opening a view over a huge project only
+    touches the top level. Nodes are indexed by path, and the sidebar and
+    the internal link dialog share one instance.
+    """
+
+    # Flag indicating if a document has children
+    HAS_CHILDREN_ROLE = Qt.UserRole + 1
+
+    rename_requested = pyqtSignal(str, str)  # old_path, new_path (from inline editing)
+
+    def __init__(self, project=None, parent=None):
+        super().__init__(parent)
+        self.project = project
+        self._root = _Node("", "root")
+        self._nodes = {"": self._root}
+        self._folder_icon = None
+        self._document_icon = None
+
+    def set_project(self, project):
+        """Show a different project; drops every loaded node"""
+        self.beginResetModel()
+        self.project = project
+        self._root = _Node("", "root")
+        self._nodes = {"": self._root}
+        self.endResetModel()
+
+    # --- Lookup helpers ---
+
+    def _document(self, node):
+        if self.project is None:
+            return None
+        return self.project.get_document_by_path(node.path)
+
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self._root
+
+    def _index(self, node):
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    def _doc_has_children(self, node):
+        doc = self._document(node)
+        return doc is not None and len(doc.children) > 0
+
+    def _ensure_fetched(self, node):
+        if not node.fetched:
+            self.fetchMore(self._index(node))
+
+    def index_for_path(self, path):
+        """Model index for a document path, loading its ancestors as needed"""
+        node = self._nodes.get(path)
+        if node is not None:
+            return self._index(node)
+        node = self._root
+        prefix = ""
+        for part in path.split('/'):
+            self._ensure_fetched(node)
+            prefix = f"{prefix}/{part}" if prefix else part
+            node = self._nodes.get(prefix)
+            if node is None:
+                return QModelIndex()
+        return self._index(node)
+
+    def path_for_index(self, index):
+        return self._node(index).path if index.isValid() else ""
+
+    # --- QAbstractItemModel interface ---
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if column != 0 or row < 0 or row >= len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self._index(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node.fetched:
+            return len(node.children) > 0
+        return self._doc_has_children(node)
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return not node.fetched and self._doc_has_children(node)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if node.fetched:
+            return
+        node.fetched = True
+        doc = self._document(node)
+        if doc is None or not doc.children:
+            return
+        names = doc.child_order  # Kept in display order by Document; no sorting here
+        self.beginInsertRows(parent, 0, len(names) - 1)
+        for row, name in enumerate(names):
+            child_path = f"{node.path}/{name}" if node.path else name
+            child = _Node(child_path, name, node, row)
+            node.children.append(child)
+            self._nodes[child_path] = child
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return node.name
+        if role == Qt.UserRole:
+            return node.path
+        if role == self.HAS_CHILDREN_ROLE:
+            return self.hasChildren(index)
+        if role == Qt.DecorationRole:
+            if self._folder_icon is None:
+                self._folder_icon = QIcon.fromTheme("folder")
+                self._document_icon = QIcon.fromTheme("text-x-generic")
+            return self._folder_icon if self.hasChildren(index) else self._document_icon
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """Inline rename: ask for the project change, which updates the model"""
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        node = index.internalPointer()
+        new_name = str(value).strip()
+        if not new_name or new_name == node.name or '/' in new_name:
+            return False
+        parent_path = node.parent.path
+        new_path = f"{parent_path}/{new_name}" if parent_path else new_name
+        self.rename_requested.emit(node.path, new_path)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemIsDropEnabled
+        return (Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable |
+                Qt.ItemIsDragEnabled | Qt.ItemIsDropEnabled)
+
+    def supportedDropActions(self):
+        return Qt.MoveAction
+
+    # --- Incremental updates from project changes ---
+
+    def _renumber(self, node, start=0):
+        for row in range(start, len(node.children)):
+            node.children[row].row = row
+
+    def _ordered_row(self, parent_node, name, exclude=None):
+        """Row for name among the loaded children, following the document's order"""
+        doc = self._document(parent_node)
+        if doc is None:
+            return len(parent_node.children)
+        children = [child for child in parent_node.children if child is not exclude]
+        target = doc.child_index(name)
+        # Binary search, looking up the document order of one loaded row per probe
+        low, high = 0, len(children)
+        while low < high:
+            middle = (low + high) // 2
+            if doc.child_index(children[middle].name) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _parent_changed(self, node):
+        """Refresh a parent's expand arrow and icon after its children changed"""
+        if node is not self._root:
+            index = self._index(node)
+            self.dataChanged.emit(index, index)
+
+    def _forget(self, node):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self._nodes.pop(current.path, None)
+            stack.extend(current.children)
+
+    def _rekey(self, node, old_prefix, new_prefix):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self._nodes.pop(current.path, None)
+            current.path = new_prefix + current.path[len(old_prefix):]
+            self._nodes[current.path] = current
+            stack.extend(current.children)
+
+    def document_added(self, path):
+        """A document (and possibly new ancestors) was created at path"""
+        parent_node = self._root
+        prefix = ""
+        for part in path.split('/'):
+            prefix = f"{prefix}/{part}" if prefix else part
+            node = self._nodes.get(prefix)
+            if node is None:
+                if parent_node.fetched:
+                    # Insert the first missing ancestor; its children load lazily
+                    row = self._ordered_row(parent_node, part)
+                    self.beginInsertRows(self._index(parent_node), row, row)
+                    node = _Node(prefix, part, parent_node, row)
+                    parent_node.children.insert(row, node)
+                    self._renumber(parent_node, row)
+                    self._nodes[prefix] = node
+                    self.endInsertRows()
+                self._parent_changed(parent_node)
+                return
+            parent_node = node
+
+    def document_removed(self, path):
+        """The document at path and its subtree were deleted"""
+        node = self._nodes.get(path)
+        if node is None:
+            parent_path = path.rsplit('/', 1)[0] if '/' in path else ""
+            parent_node = self._nodes.get(parent_path)
+            if parent_node is not None:
+                self._parent_changed(parent_node)
+            return
+        parent_node = node.parent
+        self.beginRemoveRows(self._index(parent_node), node.row, node.row)
+        del parent_node.children[node.row]
+        self._renumber(parent_node, node.row)
+        self._forget(node)
+        self.endRemoveRows()
+        self._parent_changed(parent_node)
+
+    def document_moved(self, old_path, new_path):
+        """A document was renamed or moved; persistent indexes follow it"""
+        node = self._nodes.get(old_path)
+        new_parent_path = new_path.rsplit('/', 1)[0] if '/' in new_path else ""
+        new_parent = self._nodes.get(new_parent_path)
+        if node is None or new_parent is None or not new_parent.fetched:
+            # Not loaded on one side; a remove plus lazy add is enough
+            self.document_removed(old_path)
+            self.document_added(new_path)
+            return
+
+        old_parent = node.parent
+        new_name = new_path.split('/')[-1]
+        target_row = self._ordered_row(new_parent, new_name, exclude=node)
+        # beginMoveRows counts the destination before the source row is removed
+        destination = target_row
+        if new_parent is old_parent and target_row >= node.row:
+            destination = target_row + 1
+        moving = not (new_parent is old_parent and destination in (node.row, node.row + 1))
+        if moving:
+            self.beginMoveRows(self._index(old_parent), node.row, node.row,
+                               self._index(new_parent), destination)
+            del old_parent.children[node.row]
+            self._renumber(old_parent, 0)
+            new_parent.children.insert(target_row, node)
+            node.parent = new_parent
+            self._renumber(new_parent, 0)
+        node.name = new_name
+        self._rekey(node, old_path, new_path)
+        if moving:
+            self.endMoveRows()
+        index = self._index(node)
+        self.dataChanged.emit(index, index)
+        if new_parent is not old_parent:
+            self._parent_changed(old_parent)
+            self._parent_changed(new_parent)
+
+    def children_reordered(self, path):
+        """A document's children changed display order; rows follow, indexes stay valid"""
+        node = self._nodes.get(path)
+        doc = self._document(node) if node is not None else None
+        if node is None or doc is None or not node.fetched:
+            return
+        parent_index = self._index(node)
+        # An empty list means the top level (or the whole model) changed layout
+        parents = [QPersistentModelIndex(parent_index)] if parent_index.isValid() else []
+        self.layoutAboutToBeChanged.emit(parents)
+        old_indexes = self.persistentIndexList()
+        old_nodes = [index.internalPointer() if index.isValid() else None for index in old_indexes]
+        node.children.sort(key=lambda child: doc.child_index(child.name))
+        self._renumber(node)
+        new_indexes = [self._index(n) if n is not None else QModelIndex() for n in old_nodes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit(parents)
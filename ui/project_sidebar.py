@@ -1,7 +1,12 @@
 from PyQt5.QtWidgets import (QTreeView, QFileDialog, QMenu, QInputDialog,
-                           QMessageBox)
-from PyQt5.QtGui import QStandardItemModel, QStandardItem, QIcon
+                           QMessageBox, QAbstractItemView)
 from PyQt5.QtCore import Qt, pyqtSignal
+from core.events import (DocumentCreated, DocumentRemoved, DocumentMoved, ChildrenReordered,
+                         ProjectLoaded)
+from ui.project_model import ProjectTreeModel
+
+# Event batches larger than this reload the (lazy) model instead of applying row changes
+BATCH_RESET_THRESHOLD = 200
 
 class ProjectSidebar(QTreeView):
     # Unified signals for document operations
@@ -10,10 +15,17 @@ class ProjectSidebar(QTreeView):
     new_document_requested = pyqtSignal(str)  # Parent document path
     document_created = pyqtSignal(str, str)  # Parent path, document name
     document_renamed = pyqtSignal(str, str)  # old_path, new_path
+    # One drag and drop: [(old_path, new_path), ...], target parent path, and the
+    # display position to place the dropped documents at (-1 to keep the order)
+    documents_moved = pyqtSignal(list, str, int)
+    sort_children_requested = pyqtSignal(str)  # Parent path
+    summarize_requested = pyqtSignal(str)  # Root of the documents to summarize ("" for all)
+    related_requested = pyqtSignal(str)  # Document to find related documents for
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.model = QStandardItemModel()
+        # Lazy model over the project, shared with the internal link dialog
+        self.model = ProjectTreeModel()
         self.setModel(self.model)
         self.setHeaderHidden(True)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
@@ -21,13 +33,15 @@ class ProjectSidebar(QTreeView):
         self.clicked.connect(self._on_item_clicked)
         self.setEditTriggers(QTreeView.DoubleClicked |
                            QTreeView.EditKeyPressed)
-        self.model.itemChanged.connect(self._on_item_renamed)
+        self.model.rename_requested.connect(self._on_item_renamed)
         
         # Set up tree behavior
         self.setDragEnabled(True)
         self.setAcceptDrops(True)
         self.setDropIndicatorShown(True)
         self.setDragDropMode(QTreeView.InternalMove)
+        self.setDefaultDropAction(Qt.MoveAction)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
         
         # Store expanded states
         self.expanded_paths = set()
@@ -35,57 +49,95 @@ class ProjectSidebar(QTreeView):
         self.collapsed.connect(self._on_item_collapsed)
         
         # Flag indicating if a document has children
-        self.HAS_CHILDREN_ROLE = Qt.UserRole + 1
+        self.HAS_CHILDREN_ROLE = ProjectTreeModel.HAS_CHILDREN_ROLE
 
     def update_tree(self, project):
-        """Update tree with hierarchical document structure from Project"""
-        # Store selection and expanded states before clearing
+        """Show a (newly loaded) project; children are loaded as they are expanded"""
+        # Follow the project's change events instead of being told by MainWindow
+        if self.model.project is not None:
+            self.model.project.events.unsubscribe(self._on_project_events)
+        project.events.subscribe(self._on_project_events,
+                                 (DocumentCreated, DocumentRemoved, DocumentMoved,
+                                  ChildrenReordered, ProjectLoaded),
+                                 batch=True)
+        self._reload(project)
+
+    def _reload(self, project):
+        """Reset the model, keeping expansion and selection by path"""
+        # Store selection before resetting
         current = self.currentIndex()
         current_path = current.data(Qt.UserRole) if current.isValid() else None
         
-        self.model.clear()
-        root = self.model.invisibleRootItem()
-        
-        # Recursively build tree from root document
-        self._build_tree(project.root_document, root, project)
+        self.model.set_project(project)
         
         # Restore expansion states
-        self._restore_expansion_states(root)
+        self._restore_expansion_states()
         
         # Restore selection
         if current_path:
-            self._restore_selection(root, current_path)
-
-    def _build_tree(self, doc, parent_item, project):
-        """Recursively build tree from document structure"""
-        # Skip the root document
-        if doc.name != "root":
-            # Create item for this document
-            doc_item = QStandardItem(doc.name)
-            doc_item.setData(doc.get_full_path(), Qt.UserRole)
-            
-            # Set flags based on whether it has children
-            has_children = len(doc.children) > 0
-            doc_item.setData(has_children, self.HAS_CHILDREN_ROLE)
-            
-            # Set appropriate icon based on children
-            if has_children:
-                doc_item.setIcon(QIcon.fromTheme("folder"))
-            else:
-                doc_item.setIcon(QIcon.fromTheme("text-x-generic"))
-            
-            parent_item.appendRow(doc_item)
-            parent_item = doc_item
-        
-        # Sort children by name for consistent display
-        sorted_children = sorted(doc.children.keys())
+            self.reveal_path(current_path)
+
+    def _on_project_events(self, events):
+        """Apply a batch of project changes (one per call outside transactions)"""
+        if len(events) > BATCH_RESET_THRESHOLD or any(isinstance(e, ProjectLoaded) for e in events):
+            # Cheaper to reload the lazy model once than to apply each row change
+            for event in events:
+                if isinstance(event, DocumentRemoved):
+                    self._forget_expanded(event.path)
+                elif isinstance(event, DocumentMoved):
+                    self._move_expanded(event.old_path, event.new_path)
+            self._reload(self.model.project)
+            return
         
-        # Add children documents
-        for child_name in sorted_children:
-            child_doc = doc.children[child_name]
-            # Recursively process child
-            self._build_tree(child_doc, parent_item, project)
-    
+        self.setUpdatesEnabled(False)
+        try:
+            for event in events:
+                if isinstance(event, DocumentCreated):
+                    self.model.document_added(event.path)
+                elif isinstance(event, DocumentRemoved):
+                    self.remove_document(event.path)
+                elif isinstance(event, DocumentMoved):
+                    self.move_document(event.old_path, event.new_path)
+                elif isinstance(event, ChildrenReordered):
+                    self.model.children_reordered(event.path)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def add_document(self, project, path):
+        """Insert a newly created document (and any new ancestors) into the tree"""
+        if self.model.project is not project:
+            # First document of a project the tree is not showing yet
+            self.update_tree(project)
+            return
+        self.model.document_added(path)
+
+    def remove_document(self, path):
+        """Remove a deleted document and its subtree from the tree"""
+        self._forget_expanded(path)
+        self.model.document_removed(path)
+
+    def move_document(self, old_path, new_path):
+        """Apply a rename or move; the view keeps the moved rows' state"""
+        self._move_expanded(old_path, new_path)
+        self.model.document_moved(old_path, new_path)
+
+    def _forget_expanded(self, path):
+        prefix = path + '/'
+        self.expanded_paths = {p for p in self.expanded_paths
+                               if p != path and not p.startswith(prefix)}
+
+    def _move_expanded(self, old_path, new_path):
+        prefix = old_path + '/'
+        moved = {p for p in self.expanded_paths if p == old_path or p.startswith(prefix)}
+        self.expanded_paths -= moved
+        self.expanded_paths |= {new_path + p[len(old_path):] for p in moved}
+
+    def revert_rename(self, path):
+        """Nothing to undo: inline edits only change the project, never the model"""
+        index = self.model.index_for_path(path)
+        if index.isValid():
+            self.model.dataChanged.emit(index, index)
+
     def _on_item_expanded(self, index):
         """Track expanded state"""
         if index.isValid():
@@ -100,51 +152,45 @@ class ProjectSidebar(QTreeView):
             if path and path in self.expanded_paths:
                 self.expanded_paths.remove(path)
     
-    def _restore_expansion_states(self, parent_item):
-        """Recursively restore expansion states"""
-        row_count = parent_item.rowCount()
-        for row in range(row_count):
-            item = parent_item.child(row)
-            if not item:
-                continue
-                
-            path = item.data(Qt.UserRole)
-            has_children = item.data(self.HAS_CHILDREN_ROLE)
-            
-            # Only expand documents with children
-            if has_children and path in self.expanded_paths:
-                index = self.model.indexFromItem(item)
-                self.setExpanded(index, True)
-            
-            # Check children
-            self._restore_expansion_states(item)
+    def _restore_expansion_states(self):
+        """Re-expand remembered paths, shallowest first so parents load before children"""
+        self.setUpdatesEnabled(False)
+        try:
+            for path in sorted(self.expanded_paths, key=lambda p: p.count('/')):
+                index = self.model.index_for_path(path)
+                if index.isValid() and self.model.hasChildren(index):
+                    self.setExpanded(index, True)
+        finally:
+            self.setUpdatesEnabled(True)
     
-    def _restore_selection(self, parent_item, path_to_select):
-        """Recursively find and select an item by path"""
-        if not path_to_select:
-            return
-
-        # Iterate through the children of the parent item
-        for row in range(parent_item.rowCount()):
-            child = parent_item.child(row)
-            if not child:
-                continue
-                
-            item_path = child.data(Qt.UserRole)
-            if item_path == path_to_select:
-                # Found the item, select it and make sure it's visible
-                index = self.model.indexFromItem(child)
-                self.setCurrentIndex(index)
-                self.scrollTo(index)
-                return True
-            elif path_to_select.startswith(item_path + '/'):
-                # Path is under this item, expand it and recursively search
-                index = self.model.indexFromItem(child)
-                self.setExpanded(index, True)
-                if self._restore_selection(child, path_to_select):
-                    return True
-
-        return False
+    def reveal_path(self, path):
+        """Select a document by path: expand its ancestors, select and scroll once"""
+        if not path:
+            return False
+        index = self.model.index_for_path(path)  # Path map lookup, loads ancestors if needed
+        if not index.isValid():
+            return False
+        if index == self.currentIndex():
+            self.scrollTo(index)
+            return True
+        
+        ancestors = []
+        parent = index.parent()
+        while parent.isValid():
+            if not self.isExpanded(parent):
+                ancestors.append(parent)
+            parent = parent.parent()
+        
+        # Repaint once, not once per expanded ancestor
+        self.setUpdatesEnabled(False)
+        try:
+            for ancestor in reversed(ancestors):
+                self.setExpanded(ancestor, True)
+            self.setCurrentIndex(index)
+            self.scrollTo(index)
+        finally:
+            self.setUpdatesEnabled(True)
+        return True
 
     def _on_item_clicked(self, index):
         """Handle item click - emit signal for document"""
@@ -156,40 +202,63 @@ class ProjectSidebar(QTreeView):
             # Emit the item_selected signal for the document
             self.item_selected.emit(path)
 
-    def _on_item_renamed(self, item):
-        """Handle item rename events"""
-        if item is None:
-            return
-            
+    def _on_item_renamed(self, old_path, new_path):
+        """Handle inline rename requests from the model"""
         try:
-            old_path = item.data(Qt.UserRole)
-            new_name = item.text()
-            
-            # Calculate new path based on parent
-            parent = item.parent() or self.model.invisibleRootItem()
-            parent_path = parent.data(Qt.UserRole) if parent != self.model.invisibleRootItem() else ""
-            
-            if parent_path:
-                new_path = f"{parent_path}/{new_name}"
-            else:
-                new_path = new_name
-            
             if old_path != new_path:
-                # Block signals to prevent recursive calls
-                self.model.blockSignals(True)
-                
-                # Emit document renamed signal
+                # MainWindow applies the rename to the project; the tree follows
+                # the resulting DocumentMoved event (see _on_project_events)
                 self.document_renamed.emit(old_path, new_path)
-                
-                # The update_tree method should be called from MainWindow after rename
-                self.model.blockSignals(False)
         except Exception as e:
-            # Restore the model and show error
-            print(f"Error during rename: {e}")
-            self.model.blockSignals(False)
             QMessageBox.warning(self, "Rename Error", 
                                f"An error occurred during renaming: {str(e)}")
 
+    def _selected_paths(self):
+        """Selected document paths, without those inside another selected document"""
+        paths = sorted({index.data(Qt.UserRole) for index in self.selectedIndexes()
+                        if index.data(Qt.UserRole)})
+        result = []
+        for path in paths:
+            # Sorted order puts a parent directly before its descendants
+            if result and path.startswith(result[-1] + '/'):
+                continue
+            result.append(path)
+        return result
+
+    def dropEvent(self, event):
+        """Turn a drop into document moves; the project changes, then the model follows"""
+        if event.source() is not self:
+            event.ignore()
+            return
+        
+        target = self.indexAt(event.pos())
+        position = self.dropIndicatorPosition()
+        insert_at = -1
+        if not target.isValid() or position == QAbstractItemView.OnViewport:
+            parent_path = ""
+        elif position == QAbstractItemView.OnItem:
+            parent_path = target.data(Qt.UserRole)
+        else:
+            # Dropped between rows: move next to the target, in that position
+            parent_path = self.model.path_for_index(target.parent())
+            insert_at = target.row() + (1 if position == QAbstractItemView.BelowItem else 0)
+        
+        moves = []
+        for path in self._selected_paths():
+            if parent_path == path or parent_path.startswith(path + '/'):
+                continue  # Cannot move a document into itself
+            name = path.split('/')[-1]
+            moves.append((path, f"{parent_path}/{name}" if parent_path else name))
+        if insert_at < 0:
+            # Moves already in that parent only matter when placing them
+            moves = [(old, new) for old, new in moves if old != new]
+        
+        # The view must not move or remove rows itself
+        event.setDropAction(Qt.IgnoreAction)
+        event.accept()
+        if moves:
+            self.documents_moved.emit(moves, parent_path, insert_at)
+
     def show_context_menu(self, position):
         """Show context menu with actions appropriate for documents"""
         index = self.indexAt(position)
@@ -198,6 +267,7 @@ class ProjectSidebar(QTreeView):
         
         # Default action - new document at root
         new_doc_action = menu.addAction("New Document")
+        summarize_all_action = menu.addAction("Summarize Project with AI...")
         
         # Include item-specific actions if an item is selected
         delete_action = None
@@ -213,6 +283,11 @@ class ProjectSidebar(QTreeView):
             # Add document-specific actions
             menu.addSeparator()
             new_child_doc_action = menu.addAction("New Child Document")
+            doc = self.model.project.get_document_by_path(path) if self.model.project else None
+            if doc is not None and doc.manual_order:
+                sort_children_action = menu.addAction("Sort Children A-Z")
+            summarize_action = menu.addAction("Summarize with AI...")
+            related_action = menu.addAction("Find Related Documents...")
         
         # Show menu and handle action
         action = menu.exec_(self.mapToGlobal(position))
@@ -225,6 +300,9 @@ class ProjectSidebar(QTreeView):
         if action == new_doc_action:
             self.new_document_requested.emit("")  # Empty path for root
             return
+        if action == summarize_all_action:
+            self.summarize_requested.emit("")
+            return
         
         # Item-specific actions (only available if index is valid)
         if not index.isValid():
@@ -238,6 +316,12 @@ class ProjectSidebar(QTreeView):
             self.edit(index)  # Use built-in editor
         elif action == locals().get('new_child_doc_action'):
             self.new_document_requested.emit(path)
+        elif action == locals().get('sort_children_action'):
+            self.sort_children_requested.emit(path)
+        elif action == locals().get('summarize_action'):
+            self.summarize_requested.emit(path)
+        elif action == locals().get('related_action'):
+            self.related_requested.emit(path)
 
     def _delete_document(self, path):
         """Delete a document after confirmation"""
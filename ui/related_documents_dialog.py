@@ -0,0 +1,203 @@
+import os
+import time
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QLineEdit,
+                             QListWidget, QListWidgetItem)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from core.ai_client import get_client, CancelToken, DEFAULT_OLLAMA_URL
+from core.ai_scheduler import BACKGROUND
+from core.related_index import RelatedIndex, DEFAULT_EMBED_MODEL, DEFAULT_TOP_K
+
+_indexes = {}  # (project folder, server, model) -> RelatedIndex, reused while the app runs
+
+def related_index(project, url, model):
+    """The shared index for a project and embedding model; loaded from disk on first use"""
+    directory = os.path.splitext(project.project_path)[0] if project.project_path else None
+    key = (directory or id(project), url, model)
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = RelatedIndex(directory, model, client_embed(url, model))
+    return index
+
+def client_embed(url, model, cancel=None):
+    """Embedding function for an index, as a background request"""
+    client = get_client(url)
+    return lambda text: client.embed(model, text, priority=BACKGROUND, cancel=cancel)
+
+class RelatedIndexWorker(QThread):
+    """Brings the index up to date with the project, then finds the documents related to one"""
+    progress = pyqtSignal(int, int)  # embedded, to embed
+    results = pyqtSignal(list, int, float)  # [(path, score)], documents embedded, query milliseconds
+    error = pyqtSignal(str)
+
+    def __init__(self, index, project, path, url):
+        super().__init__()
+        self.index = index
+        self.project = project
+        self.path = path
+        self.paths = project.get_subtree_paths("")  # Taken on the GUI thread
+        self.cancelled = False
+        self._cancel = CancelToken()
+        self._embed = client_embed(url, index.model, self._cancel)
+
+    def cancel(self):
+        """Stop after the current document; an embedding request in flight is abandoned at once"""
+        self.cancelled = True
+        self._cancel.cancel()
+
+    def run(self):
+        try:
+            documents = {}
+            for path in self.paths:
+                content = self.project.get_content(path)
+                if content is not None:
+                    documents[path] = content
+            embedded = self.index.update(documents, on_progress=self.progress.emit,
+                                         is_cancelled=lambda: self.cancelled, embed=self._embed)
+            if self.cancelled:
+                return
+            started = time.perf_counter()
+            related = self.index.related(self.path, DEFAULT_TOP_K)
+            self.results.emit(related, embedded, (time.perf_counter() - started) * 1000)
+        except ImportError:
+            self.error.emit("Related documents need numpy (pip install numpy).")
+        except Exception as e:
+            if not self.cancelled:
+                self.error.emit(f"Error: {str(e)}")
+
+class RelatedDocumentsDialog(QDialog):
+    """Documents whose content is most similar to a given one, by embedding similarity"""
+    document_requested = pyqtSignal(str)  # Path to open
+
+    def __init__(self, project, path, parent=None):
+        super().__init__(parent)
+        self.project = project
+        self.path = path
+        self.worker = None
+        self._stopping = set()  # Cancelled workers, kept until their thread exits
+
+        self.setObjectName("relatedDocumentsDialog")
+        self.setWindowTitle("Related Documents")
+        self.setFixedSize(600, 480)
+        self.setWindowFlags(Qt.Dialog | Qt.WindowTitleHint)
+
+        self.init_ui()
+        self.refresh()
+
+    def _row(self, layout, text, widget):
+        row = QHBoxLayout()
+        label = QLabel(text)
+        label.setStyleSheet("font-size: 16px;")
+        label.setFixedWidth(120)
+        row.addWidget(label)
+        widget.setStyleSheet("font-size: 14px;")
+        widget.setFixedHeight(35)
+        row.addWidget(widget)
+        layout.addLayout(row)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(10)
+
+        self.title_label = QLabel()
+        self.title_label.setStyleSheet("font-size: 18px; margin-bottom: 10px;")
+        self.title_label.setWordWrap(True)
+        layout.addWidget(self.title_label)
+
+        self.url_input = QLineEdit(DEFAULT_OLLAMA_URL)
+        self._row(layout, "Ollama URL:", self.url_input)
+
+        self.model_input = QLineEdit(DEFAULT_EMBED_MODEL)
+        self._row(layout, "Embed Model:", self.model_input)
+
+        self.result_list = QListWidget()
+        self.result_list.setStyleSheet("font-size: 14px;")
+        self.result_list.itemDoubleClicked.connect(self.on_item_double_clicked)
+        layout.addWidget(self.result_list)
+
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("font-size: 14px;")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        button_layout = QHBoxLayout()
+        self.refresh_btn = QPushButton("Refresh")
+        self.refresh_btn.clicked.connect(self.refresh)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.close)
+        for button in (self.refresh_btn, close_btn):
+            button.setStyleSheet("font-size: 14px;")
+            button.setFixedHeight(35)
+            button_layout.addWidget(button)
+        layout.addLayout(button_layout)
+
+    def set_path(self, path):
+        """Show the documents related to another document"""
+        self.path = path
+        self.refresh()
+
+    def refresh(self):
+        url = self.url_input.text().strip()
+        model = self.model_input.text().strip()
+        self.title_label.setText(f'Related to "{self.path}"')
+        self.result_list.clear()
+        if not url or not model:
+            self.status_label.setText("Please enter Ollama URL and embedding model.")
+            return
+        self._stop_worker()
+        self.status_label.setText("Indexing documents...")
+        self.refresh_btn.setEnabled(False)
+        self.worker = RelatedIndexWorker(related_index(self.project, url, model), self.project,
+                                         self.path, url)
+        self.worker.progress.connect(self.on_progress)
+        self.worker.results.connect(self.on_results)
+        self.worker.error.connect(self.on_error)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.worker.start()
+
+    def _stop_worker(self):
+        """Cancel the running worker without waiting; its embedding request is abandoned"""
+        worker, self.worker = self.worker, None
+        if worker is not None:
+            worker.cancel()
+            for signal in (worker.progress, worker.results, worker.error):
+                signal.disconnect()
+            self._stopping.add(worker)
+        self.refresh_btn.setEnabled(True)
+
+    def on_progress(self, done, total):
+        self.status_label.setText(f"Indexing changed documents: {done} of {total}")
+
+    def on_results(self, related, embedded, query_ms):
+        for path, score in related:
+            item = QListWidgetItem(f"{path}    ({score:.2f})")
+            item.setData(Qt.UserRole, path)
+            self.result_list.addItem(item)
+        status = f"{len(related)} related documents ({query_ms:.1f} ms)" if related else \
+            "No related documents found"
+        if embedded:
+            status += f" · {embedded} documents indexed"
+        self.status_label.setText(status)
+
+    def on_error(self, message):
+        self.status_label.setText(message)
+        print(f"\033[91mRelated documents: {message}\033[0m")
+
+    def on_worker_finished(self):
+        worker = self.sender()
+        self._stopping.discard(worker)
+        if worker is self.worker:
+            self.worker = None
+            self.refresh_btn.setEnabled(True)
+        worker.deleteLater()
+
+    def on_item_double_clicked(self, item):
+        self.document_requested.emit(item.data(Qt.UserRole))
+
+    def done(self, result):
+        self._stop_worker()
+        super().done(result)
+
+    def closeEvent(self, event):
+        self.done(QDialog.Rejected)
+        event.accept()
@@ -0,0 +1,51 @@
+import os
+import json
+from PyQt5.QtWebEngineWidgets import QWebEngineScript
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
+
+# Scripts injected into every editor page, in injection order. Each one only
+# defines functions and guards its own setup, so re-running it is harmless.
+# editor_widget.js and link_handler.js are older copies and are not injected.
+EDITOR_SCRIPTS = (
+    "editor_script.js",
+    "table_editing.js",
+    "editor_widget_formatter.js",
+    "large_document.js",
+)
+
+_script_sources = None
+
+def load_scripts():
+    """Read every ui/assets/*.js file once and keep the sources in memory"""
+    global _script_sources
+    if _script_sources is None:
+        sources = {}
+        for name in sorted(os.listdir(ASSETS_DIR)):
+            if name.endswith(".js"):
+                with open(os.path.join(ASSETS_DIR, name), "r", encoding="utf-8") as f:
+                    sources[name] = f.read()
+        _script_sources = sources
+    return _script_sources
+
+def get_script_source(name):
+    """Get the cached source of a script in ui/assets"""
+    return load_scripts()[name]
+
+def install_editor_scripts(page):
+    """Register the editor scripts on a page so they run at DocumentReady on every load"""
+    collection = page.scripts()
+    for name in EDITOR_SCRIPTS:
+        if not collection.findScript(name).isNull():
+            continue  # Already registered on this page
+        script = QWebEngineScript()
+        script.setName(name)
+        script.setSourceCode(get_script_source(name))
+        script.setInjectionPoint(QWebEngineScript.DocumentReady)
+        script.setWorldId(QWebEngineScript.MainWorld)
+        script.setRunsOnSubFrames(False)
+        collection.insert(script)
+
+def js_call(function_name, *args):
+    """Build a call to an injected JS function with JSON-encoded arguments"""
+    return "{}({});".format(function_name, ", ".join(json.dumps(arg) for arg in args))
@@ -1,15 +1,6 @@
-import sys
-import ctypes
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QSpinBox, QPushButton
 from PyQt5.QtCore import Qt
 
-# Enable high DPI awareness on Windows
-if sys.platform == "win32":
-    try:
-        ctypes.windll.shcore.SetProcessDpiAwareness(1)
-    except Exception:
-        pass
-
 class TableDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
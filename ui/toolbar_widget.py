@@ -1,11 +1,8 @@
 import sys
 import os
 from PyQt5.QtWidgets import QFrame, QHBoxLayout, QPushButton, QFileDialog, QMessageBox, QMainWindow, QInputDialog  # Added QInputDialog
-from PyQt5.QtGui import QIcon, QPixmap, QPainter, QColor, QTransform
-from PyQt5.QtCore import Qt, QSize, QEvent, QRectF, QUrl  # Added QUrl
-from PyQt5.QtSvg import QSvgRenderer
-from ui.image_dialog import ImageDialog
-from ui.emoji_selector import EmojiSelector  # New import
+from PyQt5.QtCore import Qt, QSize, QEvent, QUrl  # Added QUrl
+from ui.icon_cache import icon_cache
 
 # Add helper to get resource path in bundle or during development
 def get_resource_path(relative_path):
@@ -43,46 +40,10 @@ class ToolbarButton(QPushButton):
         super().mouseReleaseEvent(event)
 
 def getColoredIcon(file_path, color=None, size=QSize(60,60), stroke_color=None, stroke_width=2):
-    if color is None:
-        color = QColor("white")
-    renderer = QSvgRenderer(file_path)
-    pixmap = QPixmap(size)
-    pixmap.fill(Qt.transparent)
-    painter = QPainter(pixmap)
-    # Render SVG into the full area of pixmap
-    renderer.render(painter, QRectF(0, 0, size.width(), size.height()))
-    painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
-    painter.fillRect(pixmap.rect(), color)
-    painter.end()
-    
-    # Add stroke if requested
-    if stroke_color and stroke_width > 0:
-        new_size = QSize(size.width() + stroke_width * 2, size.height() + stroke_width * 2)
-        stroked_pixmap = QPixmap(new_size)
-        stroked_pixmap.fill(Qt.transparent)
-        painter = QPainter(stroked_pixmap)
-        # Offsets to simulate stroke around the icon
-        offsets = [(-stroke_width, 0), (stroke_width, 0), (0, -stroke_width), (0, stroke_width),
-                   (-stroke_width, -stroke_width), (stroke_width, -stroke_width),
-                   (-stroke_width, stroke_width), (stroke_width, stroke_width)]
-        for dx, dy in offsets:
-            painter.drawPixmap(dx + stroke_width, dy + stroke_width, pixmap)
-        painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
-        painter.fillRect(stroked_pixmap.rect(), stroke_color)
-        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-        # Draw original icon in the center
-        painter.drawPixmap(stroke_width, stroke_width, pixmap)
-        painter.end()
-        pixmap = stroked_pixmap
-
-    return QIcon(pixmap)
+    return icon_cache().icon(file_path, color, size, stroke_color, stroke_width)
 
 def getFlippedIcon(file_path, color=None, size=QSize(60,60)):  # Changed size to 48x48
-    icon = getColoredIcon(file_path, color, size)
-    pixmap = icon.pixmap(size)
-    transform = QTransform().scale(-1, 1)
-    flipped_pixmap = pixmap.transformed(transform)
-    return QIcon(flipped_pixmap)
+    return icon_cache().icon(file_path, color, size, flipped=True)
 
 class ToolbarWidget(QFrame):
     def __init__(self, editor_widget, parent=None):
@@ -94,17 +55,17 @@ class ToolbarWidget(QFrame):
         
         # Group 1: Undo/Redo at start
         undo_button = ToolbarButton()
-        undo_button.setIcon(getColoredIcon(get_resource_path("resources/undo.svg")))  # Using colored icon
+        self._set_icon(undo_button, "resources/undo.svg")  # Using colored icon
         undo_button.setIconSize(QSize(28,28))
         undo_button.setToolTip("Undo")
-        undo_button.clicked.connect(lambda: self.editor_widget.web_view.page().runJavaScript("document.execCommand('undo');"))
+        undo_button.clicked.connect(lambda: self.editor_widget.run_js("document.execCommand('undo');"))
         layout.addWidget(undo_button)
         
         redo_button = ToolbarButton()
-        redo_button.setIcon(getFlippedIcon(get_resource_path("resources/undo.svg")))  # Use flipped undo icon for redo
+        self._set_icon(redo_button, "resources/undo.svg", flipped=True)  # Use flipped undo icon for redo
         redo_button.setIconSize(QSize(28,28))
         redo_button.setToolTip("Redo")
-        redo_button.clicked.connect(lambda: self.editor_widget.web_view.page().runJavaScript("document.execCommand('redo');"))
+        redo_button.clicked.connect(lambda: self.editor_widget.run_js("document.execCommand('redo');"))
         layout.addWidget(redo_button)
         
         # Vertical separator after Undo/Redo
@@ -116,105 +77,105 @@ class ToolbarWidget(QFrame):
         
         # Group 2: Text formatting buttons (headings, bold, italic, underline, strike, quote, lists, alignments)
         h1_button = ToolbarButton()
-        h1_button.setIcon(getColoredIcon(get_resource_path("resources/h1.svg")))
+        self._set_icon(h1_button, "resources/h1.svg")
         h1_button.setIconSize(QSize(28,28))
         h1_button.setToolTip("Heading 1")
         h1_button.clicked.connect(lambda: self.editor_widget.format_text('formatBlock', '<H1>'))
         layout.addWidget(h1_button)
         
         h2_button = ToolbarButton()
-        h2_button.setIcon(getColoredIcon(get_resource_path("resources/h2.svg")))
+        self._set_icon(h2_button, "resources/h2.svg")
         h2_button.setIconSize(QSize(28,28))
         h2_button.setToolTip("Heading 2")
         h2_button.clicked.connect(lambda: self.editor_widget.format_text('formatBlock', '<H2>'))
         layout.addWidget(h2_button)
         
         h3_button = ToolbarButton()
-        h3_button.setIcon(getColoredIcon(get_resource_path("resources/h3.svg")))
+        self._set_icon(h3_button, "resources/h3.svg")
         h3_button.setIconSize(QSize(28,28))
         h3_button.setToolTip("Heading 3")
         h3_button.clicked.connect(lambda: self.editor_widget.format_text('formatBlock', '<H3>'))
         layout.addWidget(h3_button)
         
         normal_button = ToolbarButton()
-        normal_button.setIcon(getColoredIcon(get_resource_path("resources/normal.svg")))
+        self._set_icon(normal_button, "resources/normal.svg")
         normal_button.setIconSize(QSize(28,28))
         normal_button.setToolTip("Normal Text")
         normal_button.clicked.connect(lambda: self.editor_widget.format_text('formatBlock', '<P>'))
         layout.addWidget(normal_button)
         
         bold_button = ToolbarButton()
-        bold_button.setIcon(getColoredIcon(get_resource_path("resources/bold.svg")))
+        self._set_icon(bold_button, "resources/bold.svg")
         bold_button.setIconSize(QSize(28,28))
         bold_button.setToolTip("Bold")
         bold_button.clicked.connect(lambda: self.editor_widget.format_text('bold'))
         layout.addWidget(bold_button)
         
         italic_button = ToolbarButton()
-        italic_button.setIcon(getColoredIcon(get_resource_path("resources/italic.svg")))
+        self._set_icon(italic_button, "resources/italic.svg")
         italic_button.setIconSize(QSize(28,28))
         italic_button.setToolTip("Italic")
         italic_button.clicked.connect(lambda: self.editor_widget.format_text('italic'))
         layout.addWidget(italic_button)
         
         underline_button = ToolbarButton()
-        underline_button.setIcon(getColoredIcon(get_resource_path("resources/underline.svg")))
+        self._set_icon(underline_button, "resources/underline.svg")
         underline_button.setIconSize(QSize(28,28))
         underline_button.setToolTip("Underline")
         underline_button.clicked.connect(lambda: self.editor_widget.format_text('underline'))
         layout.addWidget(underline_button)
         
         strike_button = ToolbarButton()
-        strike_button.setIcon(getColoredIcon(get_resource_path("resources/strikethrough.svg")))
+        self._set_icon(strike_button, "resources/strikethrough.svg")
         strike_button.setIconSize(QSize(28,28))
         strike_button.setToolTip("Strike Through")
         strike_button.clicked.connect(lambda: self.editor_widget.format_text('strikeThrough'))
         layout.addWidget(strike_button)
         
         quote_button = ToolbarButton()
-        quote_button.setIcon(getColoredIcon(get_resource_path("resources/quote.svg")))
+        self._set_icon(quote_button, "resources/quote.svg")
         quote_button.setIconSize(QSize(28,28))
         quote_button.setToolTip("Blockquote")
         quote_button.clicked.connect(lambda: self.editor_widget.format_text('formatBlock', '<BLOCKQUOTE>'))
         layout.addWidget(quote_button)
         
         bullet_list_button = ToolbarButton()
-        bullet_list_button.setIcon(getColoredIcon(get_resource_path("resources/bullet.svg")))
+        self._set_icon(bullet_list_button, "resources/bullet.svg")
         bullet_list_button.setIconSize(QSize(28,28))
         bullet_list_button.setToolTip("Bullet List")
         bullet_list_button.clicked.connect(lambda: self.editor_widget.format_text('insertUnorderedList'))
         layout.addWidget(bullet_list_button)
         
         numbered_list_button = ToolbarButton()
-        numbered_list_button.setIcon(getColoredIcon(get_resource_path("resources/numbered.svg")))
+        self._set_icon(numbered_list_button, "resources/numbered.svg")
         numbered_list_button.setIconSize(QSize(28,28))
         numbered_list_button.setToolTip("Numbered List")
         numbered_list_button.clicked.connect(lambda: self.editor_widget.format_text('insertOrderedList'))
         layout.addWidget(numbered_list_button)
         
         align_left = ToolbarButton()
-        align_left.setIcon(getColoredIcon(get_resource_path("resources/align_left.svg")))
+        self._set_icon(align_left, "resources/align_left.svg")
         align_left.setIconSize(QSize(28,28))
         align_left.setToolTip("Align Left")
         align_left.clicked.connect(lambda: self.editor_widget.format_text('justifyLeft'))
         layout.addWidget(align_left)
         
         align_center = ToolbarButton()
-        align_center.setIcon(getColoredIcon(get_resource_path("resources/align_center.svg")))
+        self._set_icon(align_center, "resources/align_center.svg")
         align_center.setIconSize(QSize(28,28))
         align_center.setToolTip("Center")
         align_center.clicked.connect(lambda: self.editor_widget.format_text('justifyCenter'))
         layout.addWidget(align_center)
         
         align_right = ToolbarButton()
-        align_right.setIcon(getColoredIcon(get_resource_path("resources/align_right.svg")))
+        self._set_icon(align_right, "resources/align_right.svg")
         align_right.setIconSize(QSize(28,28))
         align_right.setToolTip("Align Right")
         align_right.clicked.connect(lambda: self.editor_widget.format_text('justifyRight'))
         layout.addWidget(align_right)
         
         justify = ToolbarButton()
-        justify.setIcon(getColoredIcon(get_resource_path("resources/justify.svg")))
+        self._set_icon(justify, "resources/justify.svg")
         justify.setIconSize(QSize(28,28))
         justify.setToolTip("Justify")
         justify.clicked.connect(lambda: self.editor_widget.format_text('justifyFull'))
@@ -229,28 +190,28 @@ class ToolbarWidget(QFrame):
         
         # Group 3: Inserter buttons at end
         emoji_button = ToolbarButton()
-        emoji_button.setIcon(getColoredIcon(get_resource_path("resources/emoji.svg")))
+        self._set_icon(emoji_button, "resources/emoji.svg")
         emoji_button.setIconSize(QSize(28,28))
         emoji_button.setToolTip("Insert Emoji")
         emoji_button.clicked.connect(self.show_emoji_selector)
         layout.addWidget(emoji_button)
         
         link_button = ToolbarButton()
-        link_button.setIcon(getColoredIcon(get_resource_path("resources/link.svg")))
+        self._set_icon(link_button, "resources/link.svg")
         link_button.setIconSize(QSize(28,28))
         link_button.setToolTip("Insert Link")
         link_button.clicked.connect(self.insert_link)
         layout.addWidget(link_button)
         
         info_box_btn = ToolbarButton()
-        info_box_btn.setIcon(getColoredIcon(get_resource_path("resources/info_box.svg")))
+        self._set_icon(info_box_btn, "resources/info_box.svg")
         info_box_btn.setIconSize(QSize(28,28))
         info_box_btn.setToolTip("Insert Info Box")
         info_box_btn.clicked.connect(self.editor_widget.insert_info_box)
         layout.addWidget(info_box_btn)
         
         image_button = ToolbarButton()
-        image_button.setIcon(getColoredIcon(get_resource_path("resources/image.svg")))
+        self._set_icon(image_button, "resources/image.svg")
         image_button.setIconSize(QSize(28,28))
         image_button.setToolTip("Insert Image")
         image_button.clicked.connect(self.show_image_dialog)
@@ -258,7 +219,7 @@ class ToolbarWidget(QFrame):
         
         # Example: Insert Table button
         table_button = ToolbarButton()
-        table_button.setIcon(getColoredIcon(get_resource_path("resources/table.svg")))
+        self._set_icon(table_button, "resources/table.svg")
         table_button.setIconSize(QSize(28,28))
         table_button.setToolTip("Insert Table")
         table_button.clicked.connect(self.insert_table_dialog)
@@ -273,7 +234,7 @@ class ToolbarWidget(QFrame):
 
         # AI Summarize button
         ai_summarize_button = ToolbarButton()
-        ai_summarize_button.setIcon(getColoredIcon(get_resource_path("resources/ai_summarize.svg")))
+        self._set_icon(ai_summarize_button, "resources/ai_summarize.svg")
         ai_summarize_button.setIconSize(QSize(28,28))
         ai_summarize_button.setToolTip("Summarize with AI")
         ai_summarize_button.clicked.connect(self.show_ai_summarize_dialog)
@@ -282,6 +243,10 @@ class ToolbarWidget(QFrame):
         layout.addStretch()
         self.setStyleSheet("background-color: #1e1e1e;")
 
+    def _set_icon(self, button, relative_path, flipped=False):
+        """Set a toolbar icon from the icon cache; misses render in the background"""
+        icon_cache().request(button.setIcon, get_resource_path(relative_path), flipped=flipped)
+
     def set_editor_widget(self, editor_widget):
         self.editor_widget = editor_widget
 
@@ -316,6 +281,7 @@ class ToolbarWidget(QFrame):
 
     def _show_image_dialog_impl(self):
         """Internal method to show the image dialog after project path is confirmed"""
+        from ui.image_dialog import ImageDialog
         print("\033[92mOpening image dialog...\033[0m")
         dialog = ImageDialog(self)
         dialog.setWindowModality(Qt.ApplicationModal)
@@ -379,7 +345,14 @@ class ToolbarWidget(QFrame):
         from ui.internal_link_dialog import InternalLinkDialog
         from PyQt5.QtCore import Qt
         
-        dialog = InternalLinkDialog(self.editor_widget.project, self)
+        # Share the sidebar's tree model when it shows the same project
+        model = None
+        main_window = self.window()
+        sidebar = getattr(main_window, 'sidebar', None)
+        if sidebar is not None and sidebar.model.project is self.editor_widget.project:
+            model = sidebar.model
+        
+        dialog = InternalLinkDialog(self.editor_widget.project, self, model=model)
         dialog.setWindowModality(Qt.ApplicationModal)
         
         if dialog.exec_():
@@ -390,7 +363,7 @@ class ToolbarWidget(QFrame):
                 
                 # Get display text (either selected text or document name)
                 display_name = doc_path.split('/')[-1]  # Use document name by default
-                self.editor_widget.web_view.page().runJavaScript(
+                self.editor_widget.run_js(
                     "window.getSelection().toString();",
                     lambda selected_text: self._create_link(internal_url, selected_text or display_name)
                 )
@@ -425,9 +398,10 @@ class ToolbarWidget(QFrame):
             # Simply create link from selection
             js = f"document.execCommand('createLink', false, '{url}');"
         
-        self.editor_widget.web_view.page().runJavaScript(js)
+        self.editor_widget.run_js(js)
 
     def show_emoji_selector(self):
+        from ui.emoji_selector import EmojiSelector
         selector = EmojiSelector(self)
         selector.emojiSelected.connect(self.insert_emoji)
         selector.exec_()
@@ -449,7 +423,7 @@ class ToolbarWidget(QFrame):
             "style=\"width:24px; height:24px; vertical-align: middle;\"/>"
             "</object>')"
         ).format(url=url)
-        self.editor_widget.web_view.page().runJavaScript(js)
+        self.editor_widget.run_js(js)
 
     def insert_table_dialog(self):
         from PyQt5.QtWidgets import QMainWindow, QMessageBox
@@ -502,12 +476,9 @@ class ToolbarWidget(QFrame):
                 )
                 return
             
-            # Remove HTML tags for cleaner text processing
-            import re
-            # Basic HTML tag removal - you might want to use a proper HTML parser for better results
-            clean_content = re.sub(r'<[^>]+>', '', content)
-            clean_content = clean_content.replace('&nbsp;', ' ').replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
-            clean_content = ' '.join(clean_content.split())  # Normalize whitespace
+            # Readable text without markup, scripts or styles (parsed once per content)
+            from core.text_extraction import extract_text
+            clean_content = extract_text(content).text
             
             if len(clean_content.strip()) < 50:
                 from PyQt5.QtWidgets import QMessageBox
@@ -520,7 +491,7 @@ class ToolbarWidget(QFrame):
                 return
             
             # Show the AI summarization dialog
-            dialog = AISummarizeDialog(clean_content, self)
+            dialog = AISummarizeDialog(clean_content, self, html=content)
             dialog.setWindowModality(Qt.ApplicationModal)
             
             if dialog.exec_():
@@ -530,10 +501,7 @@ class ToolbarWidget(QFrame):
                     self.insert_ai_summary(summary)
         
         # Get content from the editor
-        self.editor_widget.web_view.page().runJavaScript(
-            "document.getElementById('editor').innerHTML;",
-            handle_content
-        )
+        self.editor_widget.get_content(handle_content)
     
     def insert_ai_summary(self, summary):
         """Insert AI-generated summary into the document"""
@@ -569,4 +537,4 @@ class ToolbarWidget(QFrame):
         }})();
         """
         
-        self.editor_widget.web_view.page().runJavaScript(js_code)
\ No newline at end of file
+        self.editor_widget.run_js(js_code)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+from PyQt5.QtCore import QStandardPaths
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile
+from core.debug import is_debug, debug_log
+from ui.asset_scheme import install_asset_handler
+
+PROFILE_NAME = "DocuWeave"
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024  # Upper bound for the on-disk HTTP cache
+
+# Classifies the page's remote resources using the Resource Timing API: a
+# resource with a body but no bytes transferred was served from the cache.
+# Cross-origin resources without Timing-Allow-Origin report no sizes at all.
+CACHE_STATS_JS = """
+(function() {
+    var stats = {hits: 0, misses: 0, opaque: 0};
+    performance.getEntriesByType('resource').forEach(function(entry) {
+        if (!/^https?:/.test(entry.name)) return;
+        if (entry.transferSize === 0 && entry.decodedBodySize > 0) stats.hits++;
+        else if (entry.transferSize > 0) stats.misses++;
+        else stats.opaque++;
+    });
+    return stats;
+})();
+"""
+
+class CacheStats:
+    """Running HTTP cache hit/miss counters, collected in debug mode"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.opaque = 0
+
+    def add(self, result):
+        if not result:
+            return
+        self.hits += result.get("hits", 0)
+        self.misses += result.get("misses", 0)
+        self.opaque += result.get("opaque", 0)
+        debug_log(f"HTTP cache: {self.hits} hits, {self.misses} misses, "
+                  f"{self.opaque} unknown (this page: {result})")
+
+cache_stats = CacheStats()
+
+_profile = None
+
+def get_profile_storage_path() -> str:
+    """Per-user directory holding the web profile's storage and HTTP cache"""
+    base = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".docuweave")
+    return os.path.join(base, "webengine")
+
+def shared_profile() -> QWebEngineProfile:
+    """Return the persistent profile shared by every editor and offscreen page"""
+    global _profile
+    if _profile is None:
+        storage_path = get_profile_storage_path()
+        os.makedirs(storage_path, exist_ok=True)
+        _profile = QWebEngineProfile(PROFILE_NAME, QApplication.instance())
+        _profile.setPersistentStoragePath(storage_path)
+        _profile.setCachePath(os.path.join(storage_path, "cache"))
+        _profile.setHttpCacheType(QWebEngineProfile.DiskHttpCache)
+        _profile.setHttpCacheMaximumSize(HTTP_CACHE_MAX_BYTES)
+        install_asset_handler(_profile)
+        debug_log(f"Web profile '{PROFILE_NAME}' using {storage_path}")
+    return _profile
+
+def track_cache_stats(page):
+    """Count cache hits and misses for every load of the page in debug mode"""
+    if not is_debug():
+        return
+    page.loadFinished.connect(
+        lambda ok: page.runJavaScript(CACHE_STATS_JS, cache_stats.add) if ok else None
+    )